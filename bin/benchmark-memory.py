@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+Compare the memory used by different in-memory representations of records.
+
+Allocations are traced with tracemalloc, separately for every data file and
+representation, so the interpreter's own memory is not included.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import sys
+import tempfile
+
+
+try:
+    from cine import readers
+except ImportError:
+    # Add parent folder to import path
+    sys.path.append(str(Path(__file__).parent.parent))
+    from cine import readers
+
+from cine.benchmarks.memory import BUILDERS, MemoryResult, compare
+from cine.importer import Importer
+from cine.metrics import peak_rss
+from cine.synthetic import generate
+
+
+# Configure global logger
+logging.basicConfig(
+    format="%(levelname)-7s %(message)s",
+    level=logging.WARNING,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+RECORD_CLASSES = {
+    record_class.__name__: record_class for record_class in Importer.sources
+}
+
+
+def print_result(result: MemoryResult) -> None:
+    print(
+        f"{result.record_class:<16} {result.representation:<12} {result.records:>12,} "
+        f"{result.num_bytes:>14,} {result.bytes_per_record:>12,.1f} {result.seconds:>10.3f}"
+    )
+
+
+def benchmark(folder: Path, options: argparse.Namespace) -> list[MemoryResult]:
+    record_classes = [RECORD_CLASSES[name] for name in options.record or RECORD_CLASSES]
+    print(
+        f"{'Class':<16} {'Type':<12} {'Records':>12} "
+        f"{'Bytes':>14} {'Bytes/record':>12} {'Seconds':>10}"
+    )
+    return compare(
+        folder,
+        record_classes,
+        representations=options.representation or tuple(BUILDERS),
+        limit=options.limit,
+        progress=print_result,
+    )
+
+
+def main(options: argparse.Namespace) -> int:
+    baseline = peak_rss()
+    print(f"Interpreter baseline RSS: {baseline:,} bytes (not included below)")
+
+    if options.folder is not None:
+        results = benchmark(options.folder.expanduser().resolve(), options)
+    else:
+        with tempfile.TemporaryDirectory(prefix='cine-memory-') as temp:
+            folder = Path(temp)
+            generate(folder, scale=options.scale, seed=options.seed)
+            results = benchmark(folder, options)
+
+    if options.json is not None:
+        data = {
+            'baseline_rss': baseline,
+            'results': [result.to_dict() for result in results],
+        }
+        with open(options.json, 'wt', encoding='utf-8') as fp:
+            json.dump(data, fp, indent=2)
+            fp.write('\n')
+    return 0
+
+
+def parse(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        'folder',
+        metavar='FOLDER',
+        nargs='?',
+        type=Path,
+        help='folder of IMDb data files (default: generate synthetic data)',
+    )
+    parser.add_argument(
+        '--json',
+        metavar='PATH',
+        type=Path,
+        help='also save results to a JSON file',
+    )
+    parser.add_argument(
+        '--limit',
+        metavar='N',
+        type=int,
+        help='read at most N records from each data file',
+    )
+    parser.add_argument(
+        '--record',
+        action='append',
+        choices=RECORD_CLASSES,
+        metavar='CLASS',
+        help=f"measure only this record class, eg. {readers.TitleBasics.__name__}. "
+             "May be repeated.",
+    )
+    parser.add_argument(
+        '--representation',
+        action='append',
+        choices=BUILDERS,
+        metavar='NAME',
+        help=f"measure only this representation, one of: {', '.join(BUILDERS)}. "
+             "May be repeated.",
+    )
+    parser.add_argument(
+        '--scale',
+        default=0.1,
+        metavar='N',
+        type=float,
+        help='size of synthetic data, if no folder given (default: 0.1)',
+    )
+    parser.add_argument(
+        '--seed',
+        default=0,
+        metavar='N',
+        type=int,
+        help='seed for synthetic data (default: 0)',
+    )
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    options = parse(sys.argv[1:])
+    sys.exit(main(options))
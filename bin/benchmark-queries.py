@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""
+Replay a realistic mix of queries against a built database, reporting
+p50/p95/p99 latencies and queries per second, cold and warm, for each
+number of threads.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import sys
+
+
+try:
+    from cine.benchmarks.queries import CACHES, LatencyResult, make_workload, run
+except ImportError:
+    # Add parent folder to import path
+    sys.path.append(str(Path(__file__).parent.parent))
+    from cine.benchmarks.queries import CACHES, LatencyResult, make_workload, run
+
+from cine.database import Database
+
+
+# Configure global logger
+logging.basicConfig(
+    format="%(levelname)-7s %(message)s",
+    level=logging.WARNING,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def print_result(result: LatencyResult) -> None:
+    print(
+        f"{result.query:<12} {result.cache:<5} {result.threads:>7} {result.count:>7,} "
+        f"{result.p50 * 1000:>9.3f} {result.p95 * 1000:>9.3f} {result.p99 * 1000:>9.3f} "
+        f"{result.qps:>10,.0f}"
+    )
+
+
+def thread_counts(maximum: int) -> list[int]:
+    """
+    Powers of two up to the given maximum, and the maximum itself.
+    """
+    counts = []
+    threads = 1
+    while threads < maximum:
+        counts.append(threads)
+        threads *= 2
+    counts.append(maximum)
+    return counts
+
+
+def main(options: argparse.Namespace) -> int:
+    path = options.database.expanduser().resolve()
+    db = Database(path, immutable=True)
+    try:
+        workload = make_workload(db, options.queries, options.seed)
+    finally:
+        db.connection.close()
+
+    print(
+        f"{'Query':<12} {'Cache':<5} {'Threads':>7} {'Count':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'QPS':>10}"
+    )
+    results = run(
+        path,
+        workload,
+        thread_counts=thread_counts(options.threads),
+        caches=options.cache or CACHES,
+        progress=print_result,
+    )
+
+    if options.json is not None:
+        with open(options.json, 'wt', encoding='utf-8') as fp:
+            json.dump([result.to_dict() for result in results], fp, indent=2)
+            fp.write('\n')
+    return 0
+
+
+def parse(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        'database',
+        metavar='DATABASE',
+        type=Path,
+        help='database file, built by db-create.py',
+    )
+    parser.add_argument(
+        '--cache',
+        action='append',
+        choices=CACHES,
+        help='measure only this cache state. May be repeated.',
+    )
+    parser.add_argument(
+        '--json',
+        metavar='PATH',
+        type=Path,
+        help='also save results to a JSON file',
+    )
+    parser.add_argument(
+        '--queries',
+        default=1_000,
+        metavar='N',
+        type=int,
+        help='number of queries in the workload (default: 1000)',
+    )
+    parser.add_argument(
+        '--seed',
+        default=0,
+        metavar='N',
+        type=int,
+        help='seed used to choose queries (default: 0)',
+    )
+    parser.add_argument(
+        '--threads',
+        default=1,
+        metavar='N',
+        type=int,
+        help='largest number of threads, doubling from one (default: 1)',
+    )
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    options = parse(sys.argv[1:])
+    sys.exit(main(options))
@@ -4,6 +4,8 @@
 Run the IMDb text file readers at full speed, without saving to database.
 """
 
+import argparse
+from contextlib import nullcontext
 import logging
 import os
 from pathlib import Path
@@ -18,6 +20,8 @@ except ImportError:
     sys.path.append(str(Path(__file__).parent.parent))
     from cine import readers
 
+from cine.profiling import Profiler
+
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +30,18 @@ def print_row(*args):
     print("{:<16} {:>12} {:>12} {:>12}".format(*args))
 
 
-def benchmark_reader(data_folder, reader_class):
+def benchmark_reader(data_folder, reader_class, profiler=None):
     """
-    Run a single reader.
+    Run a single reader, profiling it if a profiler is given.
     """
     reader = reader_class.from_folder(data_folder)
+    profile = nullcontext() if profiler is None else profiler.stage(
+        'read', reader_class.__name__)
     start_time = perf_counter()
     count = 0
-    for obj in reader:
-        count += 1
+    with profile:
+        for obj in reader:
+            count += 1
     elapsed = perf_counter() - start_time
     per_sec = int(count // elapsed)
 
@@ -49,7 +56,7 @@ def benchmark_reader(data_folder, reader_class):
     return count
 
 
-def benchmark_readers(data_folder, reader_classes):
+def benchmark_readers(data_folder, reader_classes, profiler=None):
     # Header
     width = 55
     separator = '=' * width
@@ -63,7 +70,7 @@ def benchmark_readers(data_folder, reader_classes):
     total_records = 0
     for reader_class in reader_classes:
         logger.debug("Reading data using the %s class", reader_class.__name__)
-        total_records += benchmark_reader(data_folder, reader_class)
+        total_records += benchmark_reader(data_folder, reader_class, profiler)
     elapsed_time = perf_counter() - start_time
     total_records_sec = int(total_records // elapsed_time)
     total_time = f"{elapsed_time:0.3f}s"
@@ -98,18 +105,44 @@ def logging_setup(level):
     )
 
 
-def main(folder):
+def main(folder, profiler=None):
     logger.debug("Looking for files in folder '%s'", folder)
-    benchmark_readers(folder, readers)
+    benchmark_readers(folder, readers, profiler)
     return 0
 
 
-if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print('usage: {} DATA_FOLDER', file=sys.stderr)
-        sys.exit(1)
+def parse(args):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('folder', metavar='DATA_FOLDER', type=Path)
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="run every reader under cProfile, saving 'read-CLASS.prof' files",
+    )
+    parser.add_argument(
+        '--profile-folder',
+        default=Path.cwd(),
+        metavar='PATH',
+        type=Path,
+        help='folder for profiles and allocation reports (default: cwd)',
+    )
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='report the largest memory allocations of every reader',
+    )
+    return parser.parse_args(args)
+
 
+if __name__ == '__main__':
+    options = parse(sys.argv[1:])
     logging_setup(logging.INFO)
-    folder = Path(sys.argv[1])
-    folder = folder.expanduser().resolve()
-    sys.exit(main(folder))
+    folder = options.folder.expanduser().resolve()
+    profiler = None
+    if options.profile or options.profile_memory:
+        profiler = Profiler(
+            options.profile_folder,
+            stages=['read'] if options.profile else [],
+            memory=options.profile_memory,
+        )
+    sys.exit(main(folder, profiler))
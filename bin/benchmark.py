@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark reading, converting, inserting, indexing, and querying IMDb data.
+
+Results are added to a JSON history file. Exits with status 1 if any result
+is worse than the previous comparable run by more than the threshold.
+"""
+
+import argparse
+import logging
+from pathlib import Path
+import sys
+import tempfile
+
+
+try:
+    from cine.benchmarks.cases import STAGES, Dataset, build_cases
+except ImportError:
+    # Add parent folder to import path
+    sys.path.append(str(Path(__file__).parent.parent))
+    from cine.benchmarks.cases import STAGES, Dataset, build_cases
+
+from cine.benchmarks.core import History, Result, Run, find_regressions, run_cases
+from cine.synthetic import generate
+
+
+# Configure global logger
+logging.basicConfig(
+    format="%(levelname)-7s %(message)s",
+    level=logging.WARNING,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def print_result(result: Result) -> None:
+    print(
+        f"{result.name:<40} {result.records:>12,} {result.seconds:>10.3f} "
+        f"{result.records_per_second:>14,.0f} {result.bytes_per_record:>12,.1f}"
+    )
+
+
+def benchmark(folder: Path, dataset_name: str, options: argparse.Namespace) -> int:
+    dataset = Dataset(folder, seed=options.seed)
+    cases = build_cases(dataset, stages=tuple(options.only or STAGES))
+    print(f"{'Case':<40} {'Records':>12} {'Seconds':>10} {'Records/sec':>14} {'Bytes/record':>12}")
+    run = Run(dataset_name)
+    run.results = run_cases(cases, repeat=options.repeat, progress=print_result)
+
+    history = History(options.history)
+    previous = history.previous(run)
+    history.append(run)
+    history.save()
+    logger.info("Saved results to '%s'", options.history)
+
+    if previous is None:
+        print(f"No earlier run of {dataset_name!r} on this machine to compare with")
+        return 0
+
+    regressions = find_regressions(previous, run, options.threshold)
+    if not regressions:
+        print(f"No regressions since {previous.timestamp}")
+        return 0
+
+    print(f"Regressions of more than {options.threshold}% since {previous.timestamp}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    return 1
+
+
+def main(options: argparse.Namespace) -> int:
+    if options.folder is not None:
+        folder = options.folder.expanduser().resolve()
+        return benchmark(folder, options.name or folder.name, options)
+
+    name = options.name or f"synthetic-{options.scale:g}-{options.seed}"
+    with tempfile.TemporaryDirectory(prefix='cine-benchmark-') as temp:
+        folder = Path(temp)
+        generate(folder, scale=options.scale, seed=options.seed)
+        return benchmark(folder, name, options)
+
+
+def parse(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        'folder',
+        metavar='FOLDER',
+        nargs='?',
+        type=Path,
+        help='folder of IMDb data files (default: generate synthetic data)',
+    )
+    parser.add_argument(
+        '--history',
+        default=Path('benchmarks.json'),
+        metavar='PATH',
+        type=Path,
+        help='JSON file of earlier results (default: benchmarks.json)',
+    )
+    parser.add_argument(
+        '--name',
+        metavar='NAME',
+        help='name of dataset, to compare like with like (default: folder name)',
+    )
+    parser.add_argument(
+        '--only',
+        action='append',
+        choices=STAGES,
+        metavar='STAGE',
+        help=f"run only this stage, one of: {', '.join(STAGES)}. May be repeated.",
+    )
+    parser.add_argument(
+        '--repeat',
+        default=3,
+        metavar='N',
+        type=int,
+        help='run each case N times, keeping the fastest (default: 3)',
+    )
+    parser.add_argument(
+        '--scale',
+        default=0.1,
+        metavar='N',
+        type=float,
+        help='size of synthetic data, if no folder given (default: 0.1)',
+    )
+    parser.add_argument(
+        '--seed',
+        default=0,
+        metavar='N',
+        type=int,
+        help='seed for synthetic data and query keys (default: 0)',
+    )
+    parser.add_argument(
+        '--threshold',
+        default=10.0,
+        metavar='PERCENT',
+        type=float,
+        help='largest change allowed before failing (default: 10)',
+    )
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    options = parse(sys.argv[1:])
+    sys.exit(main(options))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""
+Write synthetic IMDb data files, for benchmarking without the real data.
+"""
+
+import argparse
+import logging
+from pathlib import Path
+import sys
+
+
+try:
+    from cine.synthetic import TITLES_PER_SCALE, generate
+except ImportError:
+    # Add parent folder to import path
+    sys.path.append(str(Path(__file__).parent.parent))
+    from cine.synthetic import TITLES_PER_SCALE, generate
+
+
+# Configure global logger
+logging.basicConfig(
+    format="%(levelname)-7s %(message)s",
+    level=logging.INFO,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(options: argparse.Namespace) -> None:
+    counts = generate(options.folder, scale=options.scale, seed=options.seed)
+    for name, count in counts.items():
+        logger.info(f"{count:,} rows written to {name!r}")
+
+
+def parse(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        'folder',
+        metavar='FOLDER',
+        type=Path,
+        help='folder to write data files into, created if needed',
+    )
+    parser.add_argument(
+        '--scale',
+        default=1.0,
+        metavar='N',
+        type=float,
+        help=f'size of data, with {TITLES_PER_SCALE:,} titles per unit (default: 1)',
+    )
+    parser.add_argument(
+        '--seed',
+        default=0,
+        metavar='N',
+        type=int,
+        help='seed for the random number generator (default: 0)',
+    )
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    options = parse(sys.argv[1:])
+    main(options)
@@ -1,36 +1,59 @@
 #!/usr/bin/env python3
 
+"""
+(Re)build the full-text and fuzzy search indexes in an existing database.
+"""
+
+import argparse
 import logging
-import os
+from pathlib import Path
 import sys
 
-from db import db
+from cine.database import Database
 
 
 # Configure global logger
 logging.basicConfig(
-    #~ format="%(asctime)s %(levelname)s %(name)s %(message)s",
-    format="%(message)s",
+    format="%(levelname)-7s %(message)s",
     level=logging.INFO,
 )
 
 
-log = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
 
-if __name__ == '__main__':
+def main(options: argparse.Namespace) -> int:
+    if not options.database.is_file():
+        logger.error("Database not found: %s", options.database)
+        return 1
+
+    db = Database(options.database)
+    db.title_search.build()
+    db.fuzzy_search.build()
+    if options.query:
+        for result in db.title_search.search(options.query):
+            print(f"{result.tconst} {result.start_year} {result.primary_title}")
+        for match in db.fuzzy_search.titles(options.query):
+            print(f"{match.key} ~{match.distance} {match.text}")
+    return 0
 
-    path_in = 'imdb.db'
-    path_out = 'imdb-search.db'
 
-    # Input database must already exist
-    if not os.path.exists(path_in):
-        log.error("Source database not found: {}".format(path_in))
-        sys.exit(1)
+def parse(args: list[str]) -> argparse.Namespace:
+    description = "Build search indexes in existing database"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        'database',
+        metavar='PATH',
+        type=Path,
+        help='database file created by db-create.py',
+    )
+    parser.add_argument(
+        '-q', '--query',
+        help='run a test search once the index is built',
+    )
+    return parser.parse_args(args)
 
-    # Create search database, deleting existing
-    if os.path.exists(path_out):
-        log.info('Deleting existing search database')
-        os.unlink(path_out)
-    search_db = db.SearchDB(path_in, path_out)
-    search_db.create()
+
+if __name__ == '__main__':
+    options = parse(sys.argv[1:])
+    sys.exit(main(options))
@@ -4,8 +4,13 @@ import argparse
 import logging
 from pathlib import Path
 import sys
+from typing import Optional
 
 from cine.importer import Importer
+from cine.metrics import ImportMetrics
+from cine.profiling import Profiler
+from cine.subset import TitleFilter
+from cine.tables import Ratings
 from cine.utils import argparse_existing_folder
 
 import builtins
@@ -24,8 +29,53 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Tables that may be chosen using --table.
+TABLES = sorted(name for names in Importer.sources.values() for name in names)
+
+
+# Stages of `Importer.build()` that may be profiled.
+PROFILE_STAGES = (
+    'aggregates', 'analyze', 'index', 'load', 'merge', 'search', 'vacuum',
+)
+
+
+def get_title_filter(options: argparse.Namespace) -> Optional[TitleFilter]:
+    """
+    Build a title filter from the command-line options, if any were given.
+    """
+    title_filter = TitleFilter(
+        title_types=frozenset(options.title_type) if options.title_type else None,
+        min_votes=options.min_votes,
+        min_year=options.min_year,
+        max_year=options.max_year,
+        regions=frozenset(options.region) if options.region else None,
+    )
+    return None if title_filter == TitleFilter() else title_filter
+
+
 def main(options: argparse.Namespace) -> None:
-    importer = Importer(options.folder)
+    metrics = None if options.metrics is None else ImportMetrics()
+    profiler = None
+    if options.profile or options.profile_memory:
+        profiler = Profiler(
+            options.profile_folder,
+            stages=options.profile,
+            memory=options.profile_memory,
+        )
+    Importer.build(
+        options.folder,
+        options.database,
+        parallel=options.parallel,
+        workers=options.workers,
+        search=options.search,
+        metrics=metrics,
+        profiler=profiler,
+        tables=options.table,
+        title_filter=get_title_filter(options),
+        weighted_min_votes=options.weighted_min_votes,
+    )
+    if metrics is not None:
+        metrics.write(options.metrics)
 
 
 def parse(args: list[str]) -> argparse.Namespace:
@@ -38,6 +88,105 @@ def parse(args: list[str]) -> argparse.Namespace:
         type=argparse_existing_folder,
         help='folder containing IMDB data files',
     )
+    parser.add_argument(
+        '-d', '--database',
+        default=Path.cwd() / 'imdb.db',
+        metavar='PATH',
+        type=Path,
+        help='database file to create or replace (default: imdb.db)',
+    )
+    parser.add_argument(
+        '-m', '--metrics',
+        metavar='PATH',
+        type=Path,
+        help='time every stage of the import, saving results as JSON',
+    )
+    parser.add_argument(
+        '--max-year',
+        metavar='YEAR',
+        type=int,
+        help='keep only titles first released in or before YEAR',
+    )
+    parser.add_argument(
+        '--min-votes',
+        default=0,
+        metavar='N',
+        type=int,
+        help='keep only titles with at least N votes',
+    )
+    parser.add_argument(
+        '--min-year',
+        metavar='YEAR',
+        type=int,
+        help='keep only titles first released in or after YEAR',
+    )
+    parser.add_argument(
+        '-p', '--parallel',
+        action='store_true',
+        help='import each data file in its own process, then merge',
+    )
+    parser.add_argument(
+        '--profile',
+        action='append',
+        choices=PROFILE_STAGES,
+        default=[],
+        metavar='STAGE',
+        help=(
+            'run stage under cProfile, saving a .prof file per table or '
+            'data file. One of: ' + ', '.join(PROFILE_STAGES)
+        ),
+    )
+    parser.add_argument(
+        '--profile-folder',
+        default=Path.cwd(),
+        metavar='PATH',
+        type=Path,
+        help='folder for profiles and allocation reports (default: cwd)',
+    )
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='report the largest memory allocations of every stage',
+    )
+    parser.add_argument(
+        '--region',
+        action='append',
+        metavar='CODE',
+        help="keep only titles with an alternate title in region, eg. 'NZ'. May be repeated.",
+    )
+    parser.add_argument(
+        '-s', '--search',
+        action='store_true',
+        help='also build full-text and fuzzy search indexes',
+    )
+    parser.add_argument(
+        '-t', '--table',
+        action='append',
+        choices=TABLES,
+        metavar='NAME',
+        help='fill only this table, eg. titles. May be repeated. (default: all)',
+    )
+    parser.add_argument(
+        '--title-type',
+        action='append',
+        metavar='TYPE',
+        help="keep only titles of this type, eg. 'movie'. May be repeated.",
+    )
+    parser.add_argument(
+        '--weighted-min-votes',
+        metavar='N',
+        type=int,
+        help=(
+            'votes needed before a title\'s own rating outweighs the mean, '
+            f'when weighting ratings (default: {Ratings.weighted_min_votes:,})'
+        ),
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        metavar='N',
+        type=int,
+        help='maximum number of processes for --parallel (default: CPUs)',
+    )
     return parser.parse_args(args)
 
 
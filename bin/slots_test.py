@@ -24,6 +24,9 @@ Tuples AND slots:
 Something is wrong! That did practically nothing. Let's try and save memory
 by other avenues. Maybe by using tuples instead of lists for the
 embeded lists found in records.
+
+See `benchmark-memory.py`, which compares many representations at once,
+using tracemalloc rather than the RSS of the whole interpreter.
 """
 
 import logging
@@ -0,0 +1,185 @@
+"""
+Summary tables for dashboards, computed once after each import.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+import logging
+import time
+from typing import Any, Optional
+
+from . import database
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class SeriesSummary:
+    """
+    Episode totals for a single TV series.
+    """
+    parent: str                             # 'tt0112178'
+    num_episodes: int                       # 172
+    num_seasons: int                        # 7
+    first_year: Optional[int]               # 1995
+    last_year: Optional[int]                # 2001
+    average_rating: Optional[float]         # 7.6, weighted by votes
+    num_votes: int                          # 312,400
+
+
+class Aggregates:
+    """
+    Computes the summary tables from the main tables.
+
+    Each build records the import run it was computed from, so that stale
+    summaries can be detected after a later import. Summaries are never
+    maintained as rows change: after inserting, updating, or replacing rows
+    outside of an import, eg. new ratings, run `build()` again.
+    """
+    # Metadata key holding the import run used by the last build.
+    metadata_key = 'aggregates_import'
+
+    def __init__(self, db: database.Database):
+        """
+        Args:
+            db:
+                Reference to the `Database` instance to summarise.
+        """
+        self.db = db
+
+    def build(self) -> dict[str, int]:
+        """
+        Replace the contents of every summary table.
+
+        Title counts and ratings are summarised in a single pass over the
+        titles and their ratings. Counts per person use the principals
+        table's index on nconst, and series totals the episodes table's
+        index on parent.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        start = time.perf_counter()
+        genre_years: Counter[tuple[int, int, str]] = Counter()
+        decades: dict[tuple[int, str], list[Any]] = {}
+        query = (
+            "SELECT titles.title_type, titles.start_year, titles.genres, "
+            "ratings.average_rating, ratings.num_votes FROM titles "
+            "LEFT JOIN ratings ON ratings.tconst = titles.tconst "
+            "WHERE titles.start_year IS NOT NULL;"
+        )
+        for title_type, year, genres, rating, votes in self.db.connection.execute(query):
+            bit = 0
+            while genres:
+                if genres & 1:
+                    genre_years[(bit + 1, year, title_type)] += 1
+                genres >>= 1
+                bit += 1
+
+            totals = decades.setdefault((year // 10 * 10, title_type), [0, 0, 0.0, 0])
+            totals[0] += 1
+            if rating is not None:
+                totals[1] += 1
+                totals[2] += rating
+                totals[3] += votes
+
+        connection = self.db.connection
+        counts = {}
+        tables = (
+            self.db.genre_year_counts,
+            self.db.decade_ratings,
+            self.db.person_title_counts,
+            self.db.series_rollups,
+        )
+        connection.execute('BEGIN;')
+        for table in tables:
+            connection.execute(f"DELETE FROM {table.table_name};")
+
+        connection.executemany(self.db.genre_year_counts.insert_query, (
+            {
+                'genre_id': genre_id,
+                'start_year': year,
+                'title_type': title_type,
+                'num_titles': count,
+            }
+            for (genre_id, year, title_type), count in genre_years.items()
+        ))
+        counts['genre_year_counts'] = len(genre_years)
+
+        connection.executemany(self.db.decade_ratings.insert_query, (
+            {
+                'decade': decade,
+                'title_type': title_type,
+                'num_titles': num_titles,
+                'num_rated': num_rated,
+                'average_rating': total / num_rated if num_rated else None,
+                'num_votes': votes,
+            }
+            for (decade, title_type), (num_titles, num_rated, total, votes)
+            in decades.items()
+        ))
+        counts['decade_ratings'] = len(decades)
+
+        cursor = connection.execute(
+            "INSERT INTO person_title_counts "
+            "SELECT nconst, count(DISTINCT tconst) FROM principals GROUP BY nconst;"
+        )
+        counts['person_title_counts'] = cursor.rowcount
+
+        cursor = connection.execute(
+            "INSERT INTO series_rollups "
+            "SELECT episodes.parent, count(*), count(DISTINCT episodes.season), "
+            "min(titles.start_year), max(titles.start_year), "
+            "sum(ratings.average_rating * ratings.num_votes) / sum(ratings.num_votes), "
+            "coalesce(sum(ratings.num_votes), 0) FROM episodes "
+            "LEFT JOIN titles ON titles.tconst = episodes.tconst "
+            "LEFT JOIN ratings ON ratings.tconst = episodes.tconst "
+            "GROUP BY episodes.parent;"
+        )
+        counts['series_rollups'] = cursor.rowcount
+
+        marker = self.import_marker()
+        if marker is not None:
+            self.db.metadata.set_value(self.metadata_key, marker)
+        connection.execute('COMMIT;')
+        for table in tables:
+            table.update_count()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Built summary tables in {elapsed:.3f} seconds")
+        return counts
+
+    def is_fresh(self) -> bool:
+        """
+        Were the summary tables built from the most recent import?
+
+        Changes made outside of an import are not noticed.
+        """
+        current = self.import_marker()
+        if current is None:
+            return False
+        return self.db.metadata.get_value(self.metadata_key) == current
+
+    def import_marker(self) -> Optional[str]:
+        """
+        Fetch the marker of the most recent import run, if any.
+        """
+        return self.db.metadata.get_value('import')
+
+    def series(self, parent: str) -> Optional[SeriesSummary]:
+        """
+        Fetch the episode totals of a TV series.
+
+        Args:
+            parent:
+                Identifier of the series, eg. 'tt0112178'
+
+        Returns:
+            Summary, or none if the series has no episodes.
+        """
+        query = "SELECT * FROM series_rollups WHERE parent = ?;"
+        row = self.db.connection.execute(query, (parent,)).fetchone()
+        return None if row is None else SeriesSummary(**row)
@@ -0,0 +1,5 @@
+"""
+Benchmarks of reading, loading, indexing, and querying, with history.
+
+See `bin/benchmark.py` to run them.
+"""
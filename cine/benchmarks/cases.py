@@ -0,0 +1,287 @@
+"""
+Benchmark cases for every stage of building and using the database.
+
+Cases are named by stage, then by what they run, eg. 'read.TitleBasics',
+'insert.titles', or 'query.ratings.top'. See `build_cases()`.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+import gzip
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Callable, Iterator
+
+from ..database import Database
+from ..importer import Importer
+from ..readers import Record
+from ..tables import TableBase
+from ..utils import tsv_rows
+from .core import Case, Measurement
+
+
+logger = logging.getLogger(__name__)
+
+
+# Stages, in the order they are run.
+STAGES = ('read', 'convert', 'insert', 'index', 'query')
+
+
+class Dataset:
+    """
+    Data shared between benchmark cases, loaded once and only if needed.
+    """
+    # Number of keys looked up by each query case
+    num_queries: int = 1_000
+
+    def __init__(self, folder: Path, seed: int = 0):
+        """
+        Args:
+            folder:
+                Directory containing IMDB data files, real or synthetic.
+            seed:
+                Seed used to choose which keys to query.
+        """
+        self.folder = folder
+        self.seed = seed
+        self._records: dict[type[Record], list[Record]] = {}
+        self._rows: dict[type[Record], list[list[str]]] = {}
+
+    @cached_property
+    def db(self) -> Database:
+        """
+        In-memory database, with every table loaded and indexed.
+        """
+        db = Database()
+        importer = Importer(self.folder, db)
+        importer.run()
+        return db
+
+    def keys(self, table: TableBase, column: str) -> list[str]:
+        """
+        Choose values of a column to query for, at random.
+        """
+        query = f"SELECT DISTINCT {column} FROM {table.table_name} WHERE {column} IS NOT NULL;"
+        values = [row[0] for row in self.db.connection.execute(query)]
+        values.sort()
+        count = min(self.num_queries, len(values))
+        return random.Random(self.seed).sample(values, count)
+
+    def records(self, record_class: type[Record]) -> list[Record]:
+        """
+        Every record of a data file, read into memory.
+        """
+        if record_class not in self._records:
+            self._records[record_class] = list(record_class.from_folder(self.folder))
+        return self._records[record_class]
+
+    def rows(self, record_class: type[Record]) -> list[list[str]]:
+        """
+        Every row of a data file, split into strings but not converted.
+        """
+        if record_class not in self._rows:
+            path = self.folder / record_class.file_name
+            self._rows[record_class] = list(tsv_rows(path, skip_header=True))
+        return self._rows[record_class]
+
+
+def build_cases(dataset: Dataset, stages: tuple[str, ...] = STAGES) -> list[Case]:
+    """
+    Create the benchmark cases for the chosen stages.
+
+    Args:
+        dataset:
+            Data to run the cases over.
+        stages:
+            Names of stages to include, from `STAGES`.
+
+    Returns:
+        Cases, in the order they should be run.
+    """
+    factories: dict[str, Callable[[Dataset], Iterator[Case]]] = {
+        'read': read_cases,
+        'convert': convert_cases,
+        'insert': insert_cases,
+        'index': index_cases,
+        'query': query_cases,
+    }
+    cases: list[Case] = []
+    for stage in STAGES:
+        if stage in stages:
+            cases.extend(factories[stage](dataset))
+    return cases
+
+
+def read_cases(dataset: Dataset) -> Iterator[Case]:
+    """
+    Read and convert every record of each data file.
+
+    Bytes per record is the compressed size of the file.
+    """
+    for record_class in Importer.sources:
+        def run(record_class: type[Record] = record_class) -> Measurement:
+            path = dataset.folder / record_class.file_name
+            start = time.perf_counter()
+            count = 0
+            for _ in record_class.from_folder(dataset.folder):
+                count += 1
+            seconds = time.perf_counter() - start
+            return Measurement(count, seconds, path.stat().st_size)
+        yield Case(f"read.{record_class.__name__}", run)
+
+
+def convert_cases(dataset: Dataset) -> Iterator[Case]:
+    """
+    Convert rows of strings into records, without reading the file.
+
+    Bytes per record is the size of the plain text.
+    """
+    for record_class in Importer.sources:
+        def run(record_class: type[Record] = record_class) -> Measurement:
+            rows = dataset.rows(record_class)
+            from_strings = record_class.from_strings
+            start = time.perf_counter()
+            for row in rows:
+                from_strings(row)
+            seconds = time.perf_counter() - start
+            path = dataset.folder / record_class.file_name
+            with gzip.open(path, 'rb') as fp:
+                num_bytes = sum(len(block) for block in iter(lambda: fp.read(1 << 20), b''))
+            return Measurement(len(rows), seconds, num_bytes)
+        yield Case(f"convert.{record_class.__name__}", run)
+
+
+def insert_cases(dataset: Dataset) -> Iterator[Case]:
+    """
+    Bulk-load records already in memory into a new, in-memory, database.
+
+    Bytes per record is the size of the database pages used.
+    """
+    for record_class, names in Importer.sources.items():
+        def run(
+            record_class: type[Record] = record_class,
+            names: tuple[str, ...] = names,
+        ) -> Measurement:
+            records = dataset.records(record_class)
+            db = Database()
+            try:
+                before = _pages_used(db)
+                tables = [getattr(db, name) for name in names]
+                start = time.perf_counter()
+                Importer(dataset.folder, db).load(records, tables)
+                seconds = time.perf_counter() - start
+                return Measurement(len(records), seconds, _pages_used(db) - before)
+            finally:
+                db.connection.close()
+        yield Case(f"insert.{'+'.join(names)}", run)
+
+
+def index_cases(dataset: Dataset) -> Iterator[Case]:
+    """
+    Build the indexes of every table that has any, from scratch.
+
+    Bytes per record is the size of the index pages built.
+    """
+    schema = Database()
+    for names in Importer.sources.values():
+        for name in names:
+            if not getattr(schema, name).index_queries:
+                continue
+
+            def run(name: str = name) -> Measurement:
+                table = getattr(dataset.db, name)
+                _drop_indexes(table)
+                before = _pages_used(dataset.db)
+                start = time.perf_counter()
+                table.create_indexes()
+                seconds = time.perf_counter() - start
+                num_bytes = _pages_used(dataset.db) - before
+                return Measurement(table.count(), seconds, num_bytes)
+            yield Case(f"index.{name}", run)
+
+
+def query_cases(dataset: Dataset) -> Iterator[Case]:
+    """
+    Run typical queries against a fully loaded database.
+
+    Records per second counts the records returned.
+    """
+    def timed(run: Callable[[], int]) -> Measurement:
+        start = time.perf_counter()
+        count = run()
+        return Measurement(count, time.perf_counter() - start)
+
+    def get_titles() -> Measurement:
+        keys = dataset.keys(dataset.db.titles, 'tconst')
+        return timed(lambda: sum(dataset.db.titles.get(key) is not None for key in keys))
+
+    def get_many_titles() -> Measurement:
+        keys = dataset.keys(dataset.db.titles, 'tconst')
+        return timed(lambda: len(dataset.db.titles.get_many(keys)))
+
+    def get_names() -> Measurement:
+        keys = dataset.keys(dataset.db.names, 'nconst')
+        return timed(lambda: sum(dataset.db.names.get(key) is not None for key in keys))
+
+    def top_ratings() -> Measurement:
+        ratings = dataset.db.ratings
+        def run() -> int:
+            found = 0
+            for order_by in ratings.top_orders:
+                found += len(ratings.top(order_by=order_by))
+            return found
+        return timed(run)
+
+    def series_episodes() -> Measurement:
+        keys = dataset.keys(dataset.db.episodes, 'parent')
+        episodes = dataset.db.episodes
+        return timed(lambda: sum(len(episodes.for_series(key)) for key in keys))
+
+    def fuzzy_titles() -> Measurement:
+        fuzzy_search = dataset.db.fuzzy_search
+        if not fuzzy_search.exists():
+            fuzzy_search.build()
+        # Misspell each title by dropping a character from its middle
+        texts = [
+            title[:len(title) // 2] + title[len(title) // 2 + 1:]
+            for title in dataset.keys(dataset.db.titles, 'primary_title')
+        ]
+        return timed(lambda: sum(len(fuzzy_search.titles(text, limit=1)) for text in texts))
+
+    yield Case('query.titles.get', get_titles)
+    yield Case('query.titles.get_many', get_many_titles)
+    yield Case('query.names.get', get_names)
+    yield Case('query.ratings.top', top_ratings)
+    yield Case('query.episodes.for_series', series_episodes)
+    yield Case('query.fuzzy_search.titles', fuzzy_titles)
+
+
+def _drop_indexes(table: TableBase) -> None:
+    """
+    Drop every index created by `create_indexes()` on the given table.
+    """
+    connection = table.db.connection
+    query = (
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL;"
+    )
+    names = [row[0] for row in connection.execute(query, (table.table_name,))]
+    for name in names:
+        connection.execute(f"DROP INDEX {name};")
+
+
+def _pages_used(db: Database) -> int:
+    """
+    Number of bytes used by the database pages in use, ie. not free.
+    """
+    connection = db.connection
+    page_count = connection.execute("PRAGMA page_count;").fetchone()[0]
+    free_count = connection.execute("PRAGMA freelist_count;").fetchone()[0]
+    page_size = connection.execute("PRAGMA page_size;").fetchone()[0]
+    assert isinstance(page_count, int)
+    assert isinstance(free_count, int)
+    assert isinstance(page_size, int)
+    return (page_count - free_count) * page_size
@@ -0,0 +1,234 @@
+"""
+Run benchmark cases, and compare their results with earlier runs.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import platform
+import sqlite3
+import sys
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from .. import __version__
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Measurement:
+    """
+    What a single run of a benchmark case did, and how long it took.
+    """
+    records: int                            # Records read, written, or found
+    seconds: float
+    num_bytes: int = 0                      # Bytes read or stored, if known
+
+
+@dataclass(slots=True)
+class Case:
+    """
+    A single benchmark.
+
+    Its run function does any setup it needs, then returns a measurement
+    of just the part being benchmarked.
+    """
+    name: str                               # 'read.TitleBasics'
+    run: Callable[[], Measurement]
+
+
+@dataclass(slots=True)
+class Result:
+    """
+    The best of a benchmark's repeated runs.
+    """
+    name: str
+    records: int
+    seconds: float
+    records_per_second: float
+    bytes_per_record: float
+
+    @classmethod
+    def from_measurement(cls, name: str, measurement: Measurement) -> Result:
+        records = measurement.records
+        seconds = measurement.seconds
+        return cls(
+            name=name,
+            records=records,
+            seconds=seconds,
+            records_per_second=records / seconds if seconds else 0.0,
+            bytes_per_record=measurement.num_bytes / records if records else 0.0,
+        )
+
+
+@dataclass
+class Run:
+    """
+    Results of one run of the suite, with where and when it ran.
+    """
+    dataset: str                            # 'synthetic-1-0'
+    machine: dict[str, Any] = field(default_factory=lambda: machine_info())
+    results: dict[str, Result] = field(default_factory=dict)
+    timestamp: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec='seconds'))
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Run:
+        results = {
+            name: Result(**result) for name, result in data['results'].items()
+        }
+        return cls(data['dataset'], data['machine'], results, data['timestamp'])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'dataset': self.dataset,
+            'machine': self.machine,
+            'results': {name: asdict(result) for name, result in self.results.items()},
+            'timestamp': self.timestamp,
+        }
+
+
+class History:
+    """
+    Every run of the suite, saved in a JSON file.
+    """
+    def __init__(self, path: Path):
+        """
+        Load history from path, if it exists.
+        """
+        self.path = path
+        self.runs: list[Run] = []
+        if path.exists():
+            with open(path, 'rt', encoding='utf-8') as fp:
+                data = json.load(fp)
+            self.runs = [Run.from_dict(run) for run in data['runs']]
+
+    def append(self, run: Run) -> None:
+        self.runs.append(run)
+
+    def previous(self, run: Run) -> Optional[Run]:
+        """
+        Find the latest earlier run comparable with the given one.
+
+        Runs are only comparable if they used the same dataset, on the
+        same machine.
+        """
+        for other in reversed(self.runs):
+            if other is run:
+                continue
+            if (
+                other.dataset == run.dataset
+                and other.machine.get('node') == run.machine.get('node')
+            ):
+                return other
+        return None
+
+    def save(self) -> None:
+        data = {'runs': [run.to_dict() for run in self.runs]}
+        temp = self.path.with_name(self.path.name + '.tmp')
+        with open(temp, 'wt', encoding='utf-8') as fp:
+            json.dump(data, fp, indent=2)
+            fp.write('\n')
+        os.replace(temp, self.path)
+
+
+def find_regressions(previous: Run, current: Run, threshold: float) -> list[str]:
+    """
+    Compare two runs, describing every metric that got worse by too much.
+
+    Args:
+        previous:
+            Earlier run, to compare against.
+        current:
+            Latest run.
+        threshold:
+            Percentage change allowed, eg. 10 for ten percent.
+
+    Returns:
+        Description of each regression, or an empty list.
+    """
+    regressions = []
+    for name, result in current.results.items():
+        before = previous.results.get(name)
+        if before is None:
+            continue
+
+        # Fewer records per second is worse
+        if before.records_per_second:
+            change = percent_change(before.records_per_second, result.records_per_second)
+            if change < -threshold:
+                regressions.append(
+                    f"{name}: {result.records_per_second:,.0f} records/sec, "
+                    f"{-change:.1f}% slower than {before.records_per_second:,.0f}"
+                )
+
+        # More bytes per record is worse
+        if before.bytes_per_record:
+            change = percent_change(before.bytes_per_record, result.bytes_per_record)
+            if change > threshold:
+                regressions.append(
+                    f"{name}: {result.bytes_per_record:,.1f} bytes/record, "
+                    f"{change:.1f}% larger than {before.bytes_per_record:,.1f}"
+                )
+    return regressions
+
+
+def machine_info() -> dict[str, Any]:
+    """
+    Describe this machine and its software, to make results comparable.
+    """
+    return {
+        'cine': __version__,
+        'cpu_count': os.cpu_count(),
+        'machine': platform.machine(),
+        'node': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+    }
+
+
+def percent_change(before: float, after: float) -> float:
+    return (after - before) / before * 100
+
+
+def run_cases(
+    cases: Iterable[Case],
+    repeat: int = 3,
+    progress: Optional[Callable[[Result], None]] = None,
+) -> dict[str, Result]:
+    """
+    Run every benchmark case, keeping the best of its repeated runs.
+
+    Args:
+        cases:
+            Cases to run.
+        repeat:
+            Number of times to run each case.
+        progress:
+            Called with each result as it is found.
+
+    Returns:
+        Results, keyed by case name.
+    """
+    results = {}
+    for case in cases:
+        start = time.perf_counter()
+        best = min((case.run() for _ in range(repeat)), key=lambda m: m.seconds)
+        result = Result.from_measurement(case.name, best)
+        results[case.name] = result
+        logger.debug(
+            "Ran %r %s times in %.3f seconds",
+            case.name, repeat, time.perf_counter() - start,
+        )
+        if progress is not None:
+            progress(result)
+    return results
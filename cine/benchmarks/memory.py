@@ -0,0 +1,333 @@
+"""
+Compare the memory used by different ways of holding records in memory.
+
+Each representation of a data file's records is built from scratch while
+tracing allocations with `tracemalloc`, so the result counts every object
+kept, including strings, but not the interpreter itself or anything freed
+along the way. For example, to compare all of the representations of the
+ratings data file:
+
+    for result in compare(folder, [readers.TitleRatings]):
+        print(result.representation, result.bytes_per_record)
+
+The representations are:
+
+    dataclass
+        Plain dataclass, with a ``__dict__`` per record.
+    slots
+        Slotted dataclass, as used by `cine.readers`.
+    namedtuple
+        `collections.namedtuple` instance per record.
+    tuple
+        Bare tuple of field values per record.
+    columns
+        One container per field. Integers, floats, and booleans are packed
+        into `array.array` columns, with a sentinel for missing values.
+    interned
+        Slotted dataclass, with every string passed through `sys.intern()`,
+        so that repeated values are stored only once.
+"""
+
+from __future__ import annotations
+
+from array import array
+import collections
+import dataclasses
+from dataclasses import dataclass
+import gc
+from itertools import islice
+import logging
+import math
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable, Iterator, Optional, Union, cast, get_args, get_origin
+
+from ..readers import Record
+
+
+logger = logging.getLogger(__name__)
+
+
+# Stored in place of a missing integer in an array column. Missing booleans
+# are stored as -1, and missing floats as NaN.
+MISSING_INT = -(2 ** 63)
+
+
+def record_fields(record_class: type[Record]) -> tuple[dataclasses.Field[Any], ...]:
+    """
+    Fields of a record class. Every sub-class of `Record` is a dataclass.
+    """
+    return dataclasses.fields(cast(Any, record_class))
+
+
+@dataclass(slots=True)
+class MemoryResult:
+    """
+    Memory used by one representation of one data file's records.
+    """
+    record_class: str                       # 'TitleBasics'
+    representation: str                     # 'slots'
+    records: int
+    num_bytes: int                          # Traced bytes kept once built
+    peak_bytes: int                         # Largest traced bytes while building
+    seconds: float                          # Time to read and build
+
+    @property
+    def bytes_per_record(self) -> float:
+        return self.num_bytes / self.records if self.records else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        data = dataclasses.asdict(self)
+        data['bytes_per_record'] = round(self.bytes_per_record, 1)
+        return data
+
+
+class Builder:
+    """
+    Builds a single representation of records, one record at a time.
+    """
+    name: str
+
+    def __init__(self, record_class: type[Record]):
+        self.record_class = record_class
+        self.fields = [field.name for field in record_fields(record_class)]
+
+    def build(self, records: Iterable[Record]) -> Any:
+        """
+        Convert records into this representation.
+
+        Returns:
+            Container holding every record.
+        """
+        convert = self.convert
+        return [convert(record) for record in records]
+
+    def convert(self, record: Record) -> Any:
+        raise NotImplementedError('Sub-classes require convert() method')
+
+    def values(self, record: Record) -> tuple[Any, ...]:
+        return tuple(getattr(record, name) for name in self.fields)
+
+
+class DataclassBuilder(Builder):
+    name = 'dataclass'
+
+    def __init__(self, record_class: type[Record]):
+        super().__init__(record_class)
+        self.cls: type = dataclasses.make_dataclass(
+            f"Plain{record_class.__name__}",
+            [(field.name, field.type) for field in record_fields(record_class)],
+        )
+
+    def convert(self, record: Record) -> Any:
+        return self.cls(*self.values(record))
+
+
+class SlotsBuilder(Builder):
+    name = 'slots'
+
+    def convert(self, record: Record) -> Any:
+        return record
+
+
+class NamedTupleBuilder(Builder):
+    name = 'namedtuple'
+
+    def __init__(self, record_class: type[Record]):
+        super().__init__(record_class)
+        self.cls = cast(type, collections.namedtuple(record_class.__name__, self.fields))
+
+    def convert(self, record: Record) -> Any:
+        return self.cls(*self.values(record))
+
+
+class TupleBuilder(Builder):
+    name = 'tuple'
+
+    def convert(self, record: Record) -> Any:
+        return self.values(record)
+
+
+class ColumnsBuilder(Builder):
+    """
+    Store each field in its own column, rather than an object per record.
+    """
+    name = 'columns'
+
+    def build(self, records: Iterable[Record]) -> Any:
+        fields = record_fields(self.record_class)
+        columns = {field.name: self.make_column(field.type) for field in fields}
+        appends = [
+            (field.name, columns[field.name].append, self.missing(columns[field.name]))
+            for field in fields
+        ]
+        for record in records:
+            for name, append, missing in appends:
+                value = getattr(record, name)
+                append(missing if value is None else value)
+        return columns
+
+    def convert(self, record: Record) -> Any:
+        raise NotImplementedError('Columns are built all at once, using build()')
+
+    @staticmethod
+    def make_column(type_: Any) -> Union[array, list[Any]]:
+        """
+        Choose the most compact column for values of the given type.
+        """
+        if get_origin(type_) is Union:
+            args = [arg for arg in get_args(type_) if arg is not type(None)]
+            if len(args) == 1:
+                type_ = args[0]
+        if type_ is bool:
+            return array('b')
+        if type_ is int:
+            return array('q')
+        if type_ is float:
+            return array('d')
+        return []
+
+    @staticmethod
+    def missing(column: Union[array, list[Any]]) -> Any:
+        if not isinstance(column, array):
+            return None
+        if column.typecode == 'b':
+            return -1
+        if column.typecode == 'd':
+            return math.nan
+        return MISSING_INT
+
+
+class InternedBuilder(Builder):
+    """
+    Slotted dataclasses, sharing a single copy of every repeated string.
+    """
+    name = 'interned'
+
+    def convert(self, record: Record) -> Any:
+        values = [self.intern(value) for value in self.values(record)]
+        return self.record_class(*values)
+
+    @staticmethod
+    def intern(value: Any) -> Any:
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, tuple):
+            return tuple(sys.intern(item) if isinstance(item, str) else item for item in value)
+        return value
+
+
+# Every representation, by name.
+BUILDERS: dict[str, type[Builder]] = {
+    builder.name: builder for builder in (
+        DataclassBuilder,
+        SlotsBuilder,
+        NamedTupleBuilder,
+        TupleBuilder,
+        ColumnsBuilder,
+        InternedBuilder,
+    )
+}
+
+
+def compare(
+    folder: Path,
+    record_classes: Iterable[type[Record]],
+    representations: Iterable[str] = tuple(BUILDERS),
+    limit: Optional[int] = None,
+    progress: Optional[Callable[[MemoryResult], None]] = None,
+) -> list[MemoryResult]:
+    """
+    Measure every representation of every given data file's records.
+
+    Args:
+        folder:
+            Directory containing IMDB data files, real or synthetic.
+        record_classes:
+            Data files to read, eg. `readers.TitleBasics`.
+        representations:
+            Names of representations to compare, from `BUILDERS`.
+        limit:
+            Read at most this many records from each file.
+        progress:
+            Called with each result as it is found.
+
+    Returns:
+        Results, by data file then representation.
+    """
+    results = []
+    for record_class in record_classes:
+        for name in representations:
+            builder = BUILDERS[name](record_class)
+            result = measure(folder, builder, limit)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return results
+
+
+def measure(folder: Path, builder: Builder, limit: Optional[int] = None) -> MemoryResult:
+    """
+    Read a data file into memory using one representation.
+
+    Allocation tracing is started afresh, so tracemalloc must not already
+    be running.
+
+    Args:
+        folder:
+            Directory containing IMDB data files.
+        builder:
+            Representation to build.
+        limit:
+            Read at most this many records.
+
+    Returns:
+        Bytes kept, not counting anything allocated before reading began.
+    """
+    if tracemalloc.is_tracing():
+        raise RuntimeError("Memory is already being traced")
+
+    record_class = builder.record_class
+    counted = _Counter(islice(record_class.from_folder(folder), limit))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        before, _ = tracemalloc.get_traced_memory()
+        container = builder.build(counted)
+        seconds = time.perf_counter() - start
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = MemoryResult(
+        record_class=record_class.__name__,
+        representation=builder.name,
+        records=counted.count,
+        num_bytes=after - before,
+        peak_bytes=peak - before,
+        seconds=seconds,
+    )
+    del container
+    logger.debug(
+        "%s as %s: %s bytes per record",
+        result.record_class, result.representation, f"{result.bytes_per_record:,.1f}",
+    )
+    return result
+
+
+class _Counter:
+    """
+    Count the records passing through an iterator.
+    """
+    def __init__(self, records: Iterator[Record]):
+        self.records = records
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Record]:
+        for record in self.records:
+            self.count += 1
+            yield record
@@ -0,0 +1,275 @@
+"""
+Measure query latency and throughput against a built database file.
+
+A workload is a realistic mix of queries, chosen at random, but repeatably,
+from the data itself:
+
+    title
+        Fetch a single title by its tconst.
+    filmography
+        Fetch every principal role of a person, by their nconst.
+    search
+        Full-text search for a word from a title. Only included if the
+        search index was built.
+    top
+        Top-N ratings, by a random ranking and perhaps a genre.
+    episodes
+        Every episode of a TV series, in order.
+
+The workload is replayed by one or more threads, each using its own
+connection from a `ConnectionPool`. Cold runs open new connections and use
+them straight away, so that SQLite's page cache starts empty. The operating
+system's cache is not dropped, as that needs special privileges. Warm runs
+replay the whole workload once before timing it.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+import logging
+import math
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from ..database import Database
+from ..pool import ConnectionPool
+from ..tables import GENRES
+
+
+logger = logging.getLogger(__name__)
+
+
+# Query functions, by name. Each takes an open database and a parameter.
+QUERIES: dict[str, Callable[[Database, Any], Any]] = {
+    'title': lambda db, tconst: db.titles.get(tconst),
+    'filmography': lambda db, nconst: list(db.principals.iter_where(nconst=nconst)),
+    'search': lambda db, text: db.title_search.search(text),
+    'top': lambda db, params: db.ratings.top(50, **params),
+    'episodes': lambda db, parent: db.episodes.for_series(parent),
+}
+
+# How often each query is run, relative to the others.
+WEIGHTS: dict[str, float] = {
+    'title': 50,
+    'filmography': 15,
+    'search': 20,
+    'top': 5,
+    'episodes': 10,
+}
+
+# Cache states to measure.
+CACHES = ('cold', 'warm')
+
+
+@dataclass(slots=True)
+class LatencyResult:
+    """
+    Latency percentiles, and throughput, of one kind of query.
+    """
+    query: str                              # 'title', or 'all'
+    cache: str                              # 'cold' or 'warm'
+    threads: int
+    count: int
+    p50: float                              # Seconds
+    p95: float
+    p99: float
+    qps: float                              # Of this kind per second, all threads
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def make_workload(
+    db: Database,
+    count: int = 1_000,
+    seed: int = 0,
+    weights: Optional[dict[str, float]] = None,
+) -> list[tuple[str, Any]]:
+    """
+    Choose a random, but repeatable, mix of queries from the data.
+
+    Args:
+        db:
+            Database to take keys and words from.
+        count:
+            Number of queries.
+        seed:
+            Seed for the random number generator.
+        weights:
+            Relative frequency of each query, by name. Defaults to `WEIGHTS`.
+
+    Returns:
+        List of query names and their parameters.
+    """
+    weights = dict(WEIGHTS if weights is None else weights)
+    if 'search' in weights and not db.title_search.exists():
+        logger.warning("Search index not built, skipping search queries")
+        del weights['search']
+
+    rng = random.Random(seed)
+    choices: dict[str, list[Any]] = {
+        'title': _column(db, 'titles', 'tconst'),
+        'filmography': _column(db, 'principals', 'nconst'),
+        'episodes': _column(db, 'episodes', 'parent'),
+    }
+    if 'search' in weights:
+        words: set[str] = set()
+        for title in _column(db, 'titles', 'primary_title'):
+            words.update(word for word in title.split() if len(word) > 2)
+        choices['search'] = sorted(words)
+    if 'top' in weights:
+        choices['top'] = [
+            {'order_by': order_by, 'genre': genre}
+            for order_by in db.ratings.top_orders
+            for genre in (None, *GENRES)
+        ]
+
+    names = [name for name in weights if choices.get(name)]
+    if not names:
+        raise ValueError("No data to build queries from")
+    picks = rng.choices(names, [weights[name] for name in names], k=count)
+    return [(name, rng.choice(choices[name])) for name in picks]
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of values, which must already be sorted.
+    """
+    if not values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+def replay(
+    path: Path,
+    workload: Sequence[tuple[str, Any]],
+    threads: int = 1,
+    warm: bool = False,
+) -> list[LatencyResult]:
+    """
+    Replay a workload, timing every query.
+
+    Args:
+        path:
+            Path to built database file.
+        workload:
+            Queries to run, see `make_workload()`.
+        threads:
+            Number of threads, each with its own connection, to share the
+            queries between.
+        warm:
+            Run the whole workload once, untimed, on every connection.
+
+    Returns:
+        Results for every kind of query, then for them all.
+    """
+    pool = ConnectionPool(path, size=threads)
+    connections: list[Database] = []
+    try:
+        for _ in range(threads):
+            connections.append(pool.acquire())
+        if warm:
+            for db in connections:
+                for name, param in workload:
+                    QUERIES[name](db, param)
+
+        latencies: list[list[tuple[str, float]]] = [[] for _ in range(threads)]
+        errors: list[BaseException] = []
+
+        def work(index: int) -> None:
+            db = connections[index]
+            timings = latencies[index]
+            timer = time.perf_counter
+            try:
+                for name, param in workload[index::threads]:
+                    start = timer()
+                    QUERIES[name](db, param)
+                    timings.append((name, timer() - start))
+            except BaseException as error:
+                errors.append(error)
+
+        workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+    finally:
+        for db in connections:
+            pool.release(db)
+        pool.close()
+
+    cache = 'warm' if warm else 'cold'
+    by_query: dict[str, list[float]] = defaultdict(list)
+    for timings in latencies:
+        for name, seconds in timings:
+            by_query[name].append(seconds)
+    by_query['all'] = [seconds for values in list(by_query.values()) for seconds in values]
+
+    results = []
+    for name in [*QUERIES, 'all']:
+        if name not in by_query:
+            continue
+        values = sorted(by_query[name])
+        results.append(LatencyResult(
+            query=name,
+            cache=cache,
+            threads=threads,
+            count=len(values),
+            p50=percentile(values, 50),
+            p95=percentile(values, 95),
+            p99=percentile(values, 99),
+            qps=len(values) / elapsed if elapsed else 0.0,
+        ))
+    return results
+
+
+def run(
+    path: Path,
+    workload: Sequence[tuple[str, Any]],
+    thread_counts: Iterable[int] = (1,),
+    caches: Iterable[str] = CACHES,
+    progress: Optional[Callable[[LatencyResult], None]] = None,
+) -> list[LatencyResult]:
+    """
+    Replay a workload with each number of threads, cold then warm.
+
+    Args:
+        path:
+            Path to built database file.
+        workload:
+            Queries to run, see `make_workload()`.
+        thread_counts:
+            Numbers of threads to try, eg. (1, 2, 4).
+        caches:
+            Cache states to try, from `CACHES`.
+        progress:
+            Called with each result as it is found.
+
+    Returns:
+        Every result.
+    """
+    results = []
+    for threads in thread_counts:
+        for cache in caches:
+            for result in replay(path, workload, threads, warm=(cache == 'warm')):
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
+
+
+def _column(db: Database, table: str, column: str) -> list[Any]:
+    """
+    Distinct values of a column, in a repeatable order.
+    """
+    query = f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY 1;"
+    return [row[0] for row in db.connection.execute(query)]
@@ -0,0 +1,94 @@
+"""
+Bounded in-memory cache for frequently requested records.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """
+    Running totals of a cache's activity.
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    clears: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of lookups found in cache, from zero to one.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """
+    Least-recently-used cache holding at most `maxsize` items.
+    """
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize:
+                Maximum number of items to hold.
+        """
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be at least one, given {maxsize}")
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        """
+        Remove every item, eg. when the underlying data changes.
+        """
+        self._data.clear()
+        self.stats.clears += 1
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Remove item, if present, eg. when its underlying data changes.
+        """
+        self._data.pop(key, None)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Fetch item, marking it as the most recently used.
+
+        Args:
+            key:
+                Key of item to find.
+            default:
+                Value to return if key not found.
+
+        Returns:
+            Item, or the default value if not found.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.stats.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace item, evicting the least recently used if full.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
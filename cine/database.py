@@ -1,10 +1,34 @@
 
 import logging
+import os
 from pathlib import Path
 import sqlite3
-from typing import Optional
+import time
+from typing import Callable, Optional
 
-from .tables import AKAs, Episodes, Names, Principals, Ratings, Titles
+from .aggregates import Aggregates
+from .search import FuzzySearch, TitleSearch
+from .tables import (
+    AKAs,
+    DecadeRatings,
+    Directors,
+    Episodes,
+    GenreYearCounts,
+    Genres,
+    KnownFor,
+    Metadata,
+    NameProfessions,
+    Names,
+    PersonTitleCounts,
+    Principals,
+    Professions,
+    Ratings,
+    SeriesRollups,
+    TableBase,
+    TitleGenres,
+    Titles,
+    Writers,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -20,7 +44,14 @@ class Database:
     See:
         https://developer.imdb.com/non-commercial-datasets/
     """
-    def __init__(self, path: Optional[Path|str] = None):
+    def __init__(
+        self,
+        path: Optional[Path|str] = None,
+        *,
+        immutable: bool = False,
+        mmap_size: int = 1 << 30,
+        cache_size: int = 0,
+    ):
         """
         Initialise database.
 
@@ -28,31 +59,131 @@ class Database:
             path:
                 Path to SQLite 3 database file to use or create.
                 Use the default of `None` to create in-memory db.
+            immutable:
+                Serving mode, for a database file that will never change.
+                The file is opened read-only, without locking, and tables
+                are not created. Replace the file with a new one instead of
+                changing it, see `Importer.build()`. Changes still held in
+                a write-ahead log would be ignored, so the file must have
+                been checkpointed, eg. by closing every writer.
+            mmap_size:
+                Maximum number of bytes of the file to memory-map, in
+                serving mode. Lets processes share pages via the OS cache.
+            cache_size:
+                Number of records per table to cache in memory, keyed by
+                ID, see `TableBase.get()`. The default of zero disables
+                caching.
         """
         # Database file
         if path is None:
+            if immutable:
+                raise ValueError("Immutable database requires a path")
             path = ':memory:'
-        logger.debug("Connect to database:  '%s'", path)
-        self.connection = sqlite3.connect(path)
-        self.connection.row_factory = sqlite3.Row
-        self._run_pragmas()
+        self.path = path
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self._connect()
 
         # Database tables
         self.akas = AKAs(self)
+        self.decade_ratings = DecadeRatings(self)
+        self.directors = Directors(self)
         self.episodes = Episodes(self)
-        self.titles = Titles(self)
+        self.genre_year_counts = GenreYearCounts(self)
+        self.genres = Genres(self)
+        self.known_for = KnownFor(self)
+        self.metadata = Metadata(self)
+        self.name_professions = NameProfessions(self)
         self.names = Names(self)
+        self.person_title_counts = PersonTitleCounts(self)
         self.principals = Principals(self)
+        self.professions = Professions(self)
         self.ratings = Ratings(self)
+        self.series_rollups = SeriesRollups(self)
+        self.title_genres = TitleGenres(self)
+        self.titles = Titles(self)
+        self.writers = Writers(self)
+
+        # Summaries and full-text search, built after import
+        self.aggregates = Aggregates(self)
+        self.fuzzy_search = FuzzySearch(self)
+        self.title_search = TitleSearch(self)
+
+    def backup(
+        self,
+        path: Optional[Path|str] = None,
+        *,
+        pages: int = 1024,
+        sleep: float = 0.250,
+        progress: Optional[Callable[[int, int, int], None]] = None,
+        max_rate: Optional[int] = None,
+    ) -> Optional['Database']:
+        """
+        Copy database while it is in use, a few pages at a time.
+
+        Other connections may continue to query the database between each
+        step of the copy.
+
+        Args:
+            path:
+                Path of database file to create or overwrite. Use the
+                default of `None` to back-up to a new in-memory database.
+            pages:
+                Number of pages to copy in each step.
+            sleep:
+                Seconds to wait before retrying, if the database is locked.
+            progress:
+                Optional function called after every step with the number
+                of pages copied so far, the total number of pages, and the
+                number of bytes copied so far.
+            max_rate:
+                Optional limit to the copy speed, in bytes per second.
+
+        Returns:
+            The new in-memory database if no path given, otherwise none.
+        """
+        logger.info("Back-up database to: %s", path or ':memory:')
+        page_size = self.connection.execute('PRAGMA page_size;').fetchone()[0]
+        started = time.perf_counter()
+
+        def step(status: int, remaining: int, total: int) -> None:
+            done = total - remaining
+            if progress is not None:
+                progress(done, total, done * page_size)
+            if max_rate is not None:
+                ahead = (done * page_size / max_rate) - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+        if path is None:
+            db = Database()
+            self.connection.backup(
+                db.connection, pages=pages, progress=step, sleep=sleep)
+            for table in db.get_tables():
+                table.clear_cache()
+            return db
 
-    def backup(self, path: Path) -> None:
-        logger.info("Back-up database to: %s", path)
         destination = sqlite3.connect(path)
-        self.connection.backup(destination)
+        try:
+            self.connection.backup(
+                destination, pages=pages, progress=step, sleep=sleep)
+        finally:
+            destination.close()
+        return None
 
     def cursor(self) -> sqlite3.Cursor:
         return self.connection.cursor()
 
+    def get_tables(self) -> list[TableBase]:
+        """
+        Fetch all of our table objects.
+
+        Returns:
+            List of `TableBase` instances.
+        """
+        return [obj for obj in vars(self).values() if isinstance(obj, TableBase)]
+
     def get_table_names(self) -> list[str]:
         """
         Fetch a list of table names.
@@ -65,6 +196,63 @@ class Database:
         names = [row[0] for row in cursor.fetchall()]
         return sorted(names)
 
+    def is_replaced(self) -> bool:
+        """
+        Has our database file been replaced since we opened it?
+
+        For example, by `Importer.build()` swapping in a freshly built
+        database. Cheap enough to call before every request.
+
+        Returns:
+            True if the file at our path is no longer the one we opened.
+        """
+        if self._inode is None:
+            return False
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def reopen(self) -> None:
+        """
+        Close our connection, then connect to the file at our path again.
+
+        Data cached by our tables is cleared too.
+        """
+        logger.info("Reopen database: '%s'", self.path)
+        self.connection.close()
+        self._connect()
+        for table in self.get_tables():
+            table.clear_cache()
+
+    def _connect(self) -> None:
+        """
+        Connect to database file at our path.
+        """
+        logger.debug("Connect to database:  '%s'", self.path)
+        if self.immutable:
+            # Immutable mode never reads the write-ahead log.
+            wal = Path(f"{self.path}-wal")
+            if wal.exists() and wal.stat().st_size > 0:
+                raise ValueError(f"Immutable database has a write-ahead log: {wal}")
+
+            # May be handed between threads, see `ConnectionPool`.
+            uri = Path(self.path).resolve().as_uri() + '?mode=ro&immutable=1'
+            self.connection = sqlite3.connect(
+                uri, isolation_level=None, uri=True, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self._run_serving_pragmas()
+        else:
+            # Autocommit mode, transactions are managed explicitly.
+            self.connection = sqlite3.connect(self.path, isolation_level=None)
+            self.connection.row_factory = sqlite3.Row
+            self._run_pragmas()
+
+        # Remember which file we opened, to notice if it is replaced.
+        self._inode: Optional[int] = None
+        if self.path != ':memory:':
+            self._inode = os.stat(self.path).st_ino
+
     def _run_pragmas(self) -> None:
         """
         Various optimisations.
@@ -73,3 +261,12 @@ class Database:
         self.connection.execute('PRAGMA journal_mode = WAL;')
         self.connection.execute('PRAGMA synchronous = OFF;')
         self.connection.execute('PRAGMA temp_store = MEMORY;')
+
+    def _run_serving_pragmas(self) -> None:
+        """
+        Optimisations for read-only, immutable databases.
+        """
+        self.connection.execute('PRAGMA cache_size = -16384;')          # 16MiB
+        self.connection.execute(f'PRAGMA mmap_size = {int(self.mmap_size)};')
+        self.connection.execute('PRAGMA query_only = ON;')
+        self.connection.execute('PRAGMA temp_store = MEMORY;')
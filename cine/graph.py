@@ -0,0 +1,353 @@
+"""
+In-memory graph of people and the titles they worked on together.
+
+Built from the principal cast and crew records, the graph answers 'degrees
+of separation' questions far faster than SQL joins. Every person and title
+is given a dense integer index, and the edges between them are stored in
+compressed sparse row (CSR) form, using compact `array` buffers.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+import logging
+from pathlib import Path
+import struct
+import time
+from typing import Iterable, Optional
+
+from .readers import TitlePrincipals
+from .utils import id_from_int, id_to_int
+
+
+logger = logging.getLogger(__name__)
+
+
+def csr(num_nodes: int, sources: array, targets: array) -> tuple[array, array]:
+    """
+    Build compressed sparse row adjacency from a list of edges.
+
+    Args:
+        num_nodes:
+            Number of source nodes.
+        sources:
+            Source node index of every edge.
+        targets:
+            Target node index of every edge.
+
+    Returns:
+        Offsets and targets. The neighbours of node N are found in
+        ``targets[offsets[N]:offsets[N + 1]]``.
+    """
+    offsets = array('I', bytes(4 * (num_nodes + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for index in range(num_nodes):
+        offsets[index + 1] += offsets[index]
+
+    position = array('I', offsets[:-1])
+    neighbours = array('I', bytes(4 * len(targets)))
+    for source, target in zip(sources, targets):
+        neighbours[position[source]] = target
+        position[source] += 1
+    return offsets, neighbours
+
+
+class CoStarGraph:
+    """
+    Bipartite graph of people and titles, joined by principal credits.
+
+    Two people are neighbours, or co-stars, if they share a title.
+    """
+    # File header: magic bytes, item size, and the number of people,
+    # titles, and edges.
+    header = struct.Struct('<8sIQQQ')
+    magic = b'CINEGRPH'
+
+    def __init__(
+        self,
+        person_keys: array,
+        title_keys: array,
+        person_offsets: array,
+        person_titles: array,
+        title_offsets: array,
+        title_people: array,
+    ):
+        """
+        Use `from_records()` or `load()` rather than creating directly.
+
+        Args:
+            person_keys:
+                Sorted integer nconst of every person, by index.
+            title_keys:
+                Sorted integer tconst of every title, by index.
+            person_offsets, person_titles:
+                CSR adjacency from person index to title indexes.
+            title_offsets, title_people:
+                CSR adjacency from title index to person indexes.
+        """
+        self.person_keys = person_keys
+        self.title_keys = title_keys
+        self.person_offsets = person_offsets
+        self.person_titles = person_titles
+        self.title_offsets = title_offsets
+        self.title_people = title_people
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[TitlePrincipals],
+        categories: Optional[Iterable[str]] = None,
+    ) -> CoStarGraph:
+        """
+        Build graph from principal cast and crew records.
+
+        Args:
+            records:
+                For example, from ``TitlePrincipals.from_folder()``.
+            categories:
+                Only include these categories of credit, eg. 'actor' and
+                'actress'. Defaults to every category.
+
+        Returns:
+            New graph.
+        """
+        start = time.perf_counter()
+        allowed = None if categories is None else frozenset(categories)
+        people = array('I')
+        titles = array('I')
+        for record in records:
+            if allowed is not None and record.category not in allowed:
+                continue
+            people.append(id_to_int(record.nconst))
+            titles.append(id_to_int(record.tconst))
+
+        # Dense indexes, in key order
+        person_keys = array('I', sorted(set(people)))
+        title_keys = array('I', sorted(set(titles)))
+        for index, key in enumerate(people):
+            people[index] = bisect_left(person_keys, key)
+        for index, key in enumerate(titles):
+            titles[index] = bisect_left(title_keys, key)
+
+        person_offsets, person_titles = csr(len(person_keys), people, titles)
+        title_offsets, title_people = csr(len(title_keys), titles, people)
+        graph = cls(
+            person_keys, title_keys,
+            person_offsets, person_titles,
+            title_offsets, title_people,
+        )
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Built graph of {graph.num_people:,} people, {graph.num_titles:,} "
+            f"titles, and {graph.num_edges:,} credits in {elapsed:.3f} seconds"
+        )
+        return graph
+
+    @classmethod
+    def load(cls, path: Path) -> CoStarGraph:
+        """
+        Load graph from file created by `save()`.
+
+        Raises:
+            ValueError:
+                If file is not a graph, or was saved on a different platform.
+
+        Returns:
+            Graph.
+        """
+        with open(path, 'rb') as fp:
+            data = fp.read(cls.header.size)
+            try:
+                magic, itemsize, num_people, num_titles, num_edges = (
+                    cls.header.unpack(data))
+            except struct.error:
+                magic = itemsize = None
+            if magic != cls.magic or itemsize != array('I').itemsize:
+                raise ValueError(f"Not a compatible graph file: {path}")
+
+            buffers = []
+            for length in (
+                num_people, num_titles,
+                num_people + 1, num_edges,
+                num_titles + 1, num_edges,
+            ):
+                buffer = array('I')
+                buffer.fromfile(fp, length)
+                buffers.append(buffer)
+        return cls(*buffers)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.person_titles)
+
+    @property
+    def num_people(self) -> int:
+        return len(self.person_keys)
+
+    @property
+    def num_titles(self) -> int:
+        return len(self.title_keys)
+
+    def costars(self, nconst: str) -> list[str]:
+        """
+        Find everybody who shares a title with the given person.
+
+        Args:
+            nconst:
+                Person's identifier, eg. 'nm0000102'
+
+        Returns:
+            Sorted list of identifiers, not including the given person.
+        """
+        person = self._person_index(nconst)
+        if person is None:
+            return []
+        found = set(self._neighbours(person))
+        found.discard(person)
+        return [id_from_int('nm', self.person_keys[index]) for index in sorted(found)]
+
+    def save(self, path: Path) -> None:
+        """
+        Write graph to a binary file, to be read back by `load()`.
+        """
+        with open(path, 'wb') as fp:
+            fp.write(self.header.pack(
+                self.magic, array('I').itemsize,
+                self.num_people, self.num_titles, self.num_edges,
+            ))
+            for buffer in (
+                self.person_keys, self.title_keys,
+                self.person_offsets, self.person_titles,
+                self.title_offsets, self.title_people,
+            ):
+                buffer.tofile(fp)
+
+    def shortest_path(self, source: str, target: str) -> Optional[list[str]]:
+        """
+        Find the shortest chain of shared titles between two people.
+
+        Uses a bidirectional breadth-first search, always expanding the
+        smaller of the two frontiers.
+
+        Args:
+            source:
+                Identifier of first person, eg. 'nm0000102'
+            target:
+                Identifier of second person.
+
+        Returns:
+            Alternating person and title identifiers, starting with source
+            and ending with target. None if there is no connection.
+        """
+        start = self._person_index(source)
+        end = self._person_index(target)
+        if start is None or end is None:
+            return None
+        if start == end:
+            return [source]
+
+        # Parent links, person index to (previous person, shared title)
+        forward: dict[int, Optional[tuple[int, int]]] = {start: None}
+        backward: dict[int, Optional[tuple[int, int]]] = {end: None}
+        forward_frontier = [start]
+        backward_frontier = [end]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self._expand(
+                    forward_frontier, forward, backward)
+            else:
+                backward_frontier, meeting = self._expand(
+                    backward_frontier, backward, forward)
+            if meeting is not None:
+                return self._join(meeting, forward, backward)
+        return None
+
+    def titles(self, nconst: str) -> list[str]:
+        """
+        Find the titles of the given person.
+
+        Returns:
+            Sorted list of title identifiers.
+        """
+        person = self._person_index(nconst)
+        if person is None:
+            return []
+        offsets = self.person_offsets
+        indexes = self.person_titles[offsets[person]:offsets[person + 1]]
+        return [id_from_int('tt', self.title_keys[index]) for index in sorted(set(indexes))]
+
+    def _expand(
+        self,
+        frontier: list[int],
+        seen: dict[int, Optional[tuple[int, int]]],
+        other: dict[int, Optional[tuple[int, int]]],
+    ) -> tuple[list[int], Optional[int]]:
+        """
+        Visit every unseen neighbour of the frontier, one level deeper.
+
+        Returns:
+            The next frontier, and the index of a person seen from both
+            directions, if any.
+        """
+        person_offsets = self.person_offsets
+        person_titles = self.person_titles
+        title_offsets = self.title_offsets
+        title_people = self.title_people
+        following: list[int] = []
+        for person in frontier:
+            for title in person_titles[person_offsets[person]:person_offsets[person + 1]]:
+                for neighbour in title_people[title_offsets[title]:title_offsets[title + 1]]:
+                    if neighbour in seen:
+                        continue
+                    seen[neighbour] = (person, title)
+                    if neighbour in other:
+                        return following, neighbour
+                    following.append(neighbour)
+        return following, None
+
+    def _join(
+        self,
+        meeting: int,
+        forward: dict[int, Optional[tuple[int, int]]],
+        backward: dict[int, Optional[tuple[int, int]]],
+    ) -> list[str]:
+        """
+        Build path of identifiers from the two halves of a search.
+        """
+        path = [id_from_int('nm', self.person_keys[meeting])]
+        person = meeting
+        while (link := forward[person]) is not None:
+            person, title = link
+            path[:0] = [
+                id_from_int('nm', self.person_keys[person]),
+                id_from_int('tt', self.title_keys[title]),
+            ]
+
+        person = meeting
+        while (link := backward[person]) is not None:
+            person, title = link
+            path.extend([
+                id_from_int('tt', self.title_keys[title]),
+                id_from_int('nm', self.person_keys[person]),
+            ])
+        return path
+
+    def _neighbours(self, person: int) -> Iterable[int]:
+        offsets = self.person_offsets
+        for title in self.person_titles[offsets[person]:offsets[person + 1]]:
+            yield from self.title_people[
+                self.title_offsets[title]:self.title_offsets[title + 1]]
+
+    def _person_index(self, nconst: str) -> Optional[int]:
+        """
+        Find dense index of given person, using a binary search.
+        """
+        key = id_to_int(nconst)
+        index = bisect_left(self.person_keys, key)
+        if index < len(self.person_keys) and self.person_keys[index] == key:
+            return index
+        return None
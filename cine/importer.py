@@ -1,5 +1,74 @@
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AbstractContextManager, ExitStack, contextmanager, nullcontext
+from datetime import datetime, timezone
+import logging
+import os
 from pathlib import Path
+import tempfile
+import time
+from typing import Iterable, Iterator, Optional
+
+from . import readers
+from .database import Database
+from .metrics import ImportMetrics, ReadStats, StageMetrics
+from .profiling import Profiler
+from .readers import Record
+from .subset import AdultFilter, IdSet, Subset, TitleFilter
+from .tables import LookupMixin, TableBase
+from .utils import chunkify
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_shard(
+    folder: Path,
+    record_class: type[Record],
+    path: Path,
+    instrument: bool = False,
+    profiler: Optional[Profiler] = None,
+    tables: Optional[Iterable[str]] = None,
+    excluded: Optional[IdSet] = None,
+) -> tuple[dict[str, int], list[StageMetrics], dict[str, int]]:
+    """
+    Import a single data file into its own, new, database file.
+
+    Runs in a worker process, see `Importer.run_parallel()`. Indexes are not
+    created, as they are built once the shards are merged.
+
+    Args:
+        folder:
+            Directory containing IMDB data files.
+        record_class:
+            One of the keys of `Importer.sources`.
+        path:
+            Path to database file to create.
+        instrument:
+            Collect metrics for every stage of the import.
+        profiler:
+            Profile the stages of the import it was configured for.
+        tables:
+            Names of the tables to fill, if not all of them.
+        excluded:
+            Adult titles, found by `AdultFilter.prepare()`.
+
+    Returns:
+        Number of rows added, keyed by table name, the stage metrics
+        collected, if any, and the number of rows skipped as they belong
+        to adult titles, keyed by table name.
+    """
+    db = Database(path)
+    try:
+        metrics = ImportMetrics() if instrument else None
+        importer = Importer(folder, db, metrics, profiler, tables=tables)
+        importer.adult_filter = AdultFilter(excluded)
+        counts = importer.import_source(record_class, create_indexes=False)
+        stages = [] if metrics is None else metrics.stages
+        return counts, stages, importer.adult_filter.skipped
+    finally:
+        db.connection.close()
 
 
 class Importer:
@@ -7,13 +76,534 @@ class Importer:
     Manages the process of importing IMDB data from its TSV files into
     our SQLite database.
     """
-    def  __init__(self, folder: Path):
+    # Chunk size for insertion optimisation
+    records_per_transaction: int = 10_000
+
+    # Record classes to read, and the names of the tables each one fills.
+    sources: dict[type[Record], tuple[str, ...]] = {
+        readers.TitleBasics: ('titles', 'title_genres'),
+        readers.NameBasics: ('names', 'name_professions', 'known_for'),
+        readers.TitleAkas: ('akas',),
+        readers.TitleCrew: ('directors', 'writers'),
+        readers.TitleEpisodes: ('episodes',),
+        readers.TitlePrincipals: ('principals',),
+        readers.TitleRatings: ('ratings',),
+    }
+
+    def  __init__(
+        self,
+        folder: Path,
+        db: Database,
+        metrics: Optional[ImportMetrics] = None,
+        profiler: Optional[Profiler] = None,
+        tables: Optional[Iterable[str]] = None,
+        title_filter: Optional[TitleFilter] = None,
+        weighted_min_votes: Optional[int] = None,
+    ):
         """
         Initialiser.
 
         Args:
             folder:
                 Directory containing IMDB data files.
+            db:
+                Database to import data into.
+            metrics:
+                If given, time every stage of the import into it.
+            profiler:
+                If given, profile the stages it was configured for.
+            tables:
+                Names of the tables to fill, eg. ['titles', 'ratings'].
+                Defaults to every table found in `sources`.
+            title_filter:
+                If given, import only the titles it keeps, and the rows of
+                other tables that refer to them, see `Subset`. Otherwise,
+                every title is kept, except for adult titles, see
+                `AdultFilter`.
+            weighted_min_votes:
+                Votes needed before a title's own rating outweighs the mean
+                rating, see `Ratings.update_weighted()`. Defaults to
+                `Ratings.weighted_min_votes`.
 
+        Raises:
+            ValueError:
+                If a table name is not found in `sources`.
         """
         self.folder = folder
+        self.db = db
+        self.metrics = metrics
+        self.profiler = profiler
+        self.weighted_min_votes = weighted_min_votes
+
+        known = [name for names in self.sources.values() for name in names]
+        if tables is None:
+            self.tables = frozenset(known)
+        else:
+            self.tables = frozenset(tables)
+            for name in sorted(self.tables):
+                if name not in known:
+                    raise ValueError(f"Table {name!r} not found")
+        self.subset = None if title_filter is None else Subset(title_filter)
+        self.adult_filter = AdultFilter()
+
+    @classmethod
+    def build(
+        cls,
+        folder: Path,
+        path: Path,
+        parallel: bool = False,
+        workers: Optional[int] = None,
+        search: bool = False,
+        metrics: Optional[ImportMetrics] = None,
+        profiler: Optional[Profiler] = None,
+        tables: Optional[Iterable[str]] = None,
+        title_filter: Optional[TitleFilter] = None,
+        weighted_min_votes: Optional[int] = None,
+    ) -> dict[str, int]:
+        """
+        Build a new database, then atomically replace the file at path.
+
+        The database is built in a temporary folder next to the given path,
+        checked, summarised, analysed, and then compacted using
+        ``VACUUM INTO``. Only then is the compacted file moved over the
+        given path. Processes reading the old file are unaffected; they
+        can check for the new file using `Database.is_replaced()` and
+        switch using `Database.reopen()`.
+
+        Args:
+            folder:
+                Directory containing IMDB data files.
+            path:
+                Path to database file to create or replace.
+            parallel:
+                Use `run_parallel()` instead of `run()`.
+            workers:
+                Maximum number of worker processes, if parallel.
+            search:
+                Also build the full-text and fuzzy search indexes.
+            metrics:
+                If given, time every stage of the build into it.
+            profiler:
+                If given, profile the stages it was configured for.
+            tables:
+                Names of the tables to fill, if not all of them.
+            title_filter:
+                If given, build a subset of the data. Subsets are always
+                imported serially, as the tables depend on one another.
+            weighted_min_votes:
+                Votes needed before a title's own rating outweighs the mean
+                rating, if not `Ratings.weighted_min_votes`.
+
+        Raises:
+            RuntimeError:
+                If the built database fails its checks. The file at path
+                is left untouched.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        path = Path(path)
+        with tempfile.TemporaryDirectory(
+            dir=path.parent, prefix=f".{path.name}-",
+        ) as temp:
+            db = Database(Path(temp) / 'build.db')
+            compacted = Path(temp) / path.name
+            try:
+                importer = cls(
+                    folder, db, metrics, profiler, tables, title_filter, weighted_min_votes)
+                if parallel and title_filter is not None:
+                    logger.warning("Importing subset serially, not in parallel")
+                    parallel = False
+                if parallel:
+                    counts = importer.run_parallel(workers, Path(temp))
+                else:
+                    counts = importer.run()
+                importer.check(counts)
+                with importer.stage('aggregates'):
+                    db.aggregates.build()
+                if search:
+                    with importer.stage('search'):
+                        db.title_search.build()
+                        db.fuzzy_search.build()
+
+                logger.info("Analyse and compact database")
+                with importer.stage('analyze'):
+                    db.connection.execute('ANALYZE;')
+                with importer.stage('vacuum'):
+                    db.connection.execute('VACUUM INTO ?;', (str(compacted),))
+            finally:
+                db.connection.close()
+
+            logger.info("Replace database: '%s'", path)
+            os.replace(compacted, path)
+        return counts
+
+    def check(self, counts: dict[str, int]) -> None:
+        """
+        Check that every chosen table was filled, and holds the rows we added.
+
+        Tables may be left empty by a title filter, eg. episodes, if only
+        movies are kept.
+
+        Args:
+            counts:
+                Number of rows added, keyed by table name.
+
+        Raises:
+            RuntimeError:
+                If a table is empty, or its row count is not as expected.
+        """
+        for record_class in self.sources:
+            for table in self.get_tables(record_class):
+                expected = counts.get(table.table_name, 0)
+                actual = table.count(exact=True)
+                empty = actual == 0 and self.subset is None
+                if empty or actual != expected:
+                    message = (
+                        f"Table {table.table_name!r} has {actual:,} rows, "
+                        f"expected {expected:,}"
+                    )
+                    raise RuntimeError(message)
+
+    def run(self) -> dict[str, int]:
+        """
+        Import every data file into its tables.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        counts = {}
+        if self.subset is not None:
+            self.subset.prepare(self.folder)
+        for record_class in self.plan():
+            counts.update(self.import_source(record_class))
+        self.log_skipped()
+        self.db.ratings.update_weighted(self.weighted_min_votes)
+        self.mark_import()
+        return counts
+
+    def run_parallel(
+        self,
+        workers: Optional[int] = None,
+        temp_folder: Optional[Path] = None,
+    ) -> dict[str, int]:
+        """
+        Import every data file at once, each in its own worker process.
+
+        SQLite allows only a single writer per database, so each data file
+        is imported into a temporary shard database of its own. The shards
+        are then merged into our database, and the indexes built.
+
+        Args:
+            workers:
+                Maximum number of worker processes. Defaults to the number
+                of CPUs, but no more are used than there are data files.
+            temp_folder:
+                Where to create the shard databases. Defaults to the
+                system's temporary folder.
+
+        Raises:
+            ValueError:
+                If importing a subset, which must be done serially.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        if self.subset is not None:
+            raise ValueError("Title filters require a serial import, use run()")
+
+        start = time.perf_counter()
+        self.adult_filter.prepare(self.folder)
+        with tempfile.TemporaryDirectory(dir=temp_folder) as temp:
+            shards = {
+                record_class: Path(temp) / f"{record_class.__name__}.db"
+                for record_class in self.plan()
+            }
+            logger.info("Build %s shards in %r", len(shards), temp)
+            instrument = self.metrics is not None
+            workers = min(workers or os.cpu_count() or 1, len(shards))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        build_shard, self.folder, record_class, path,
+                        instrument, self.profiler, self.tables,
+                        self.adult_filter.excluded,
+                    )
+                    for record_class, path in shards.items()
+                ]
+                for future in futures:
+                    _, stages, skipped = future.result()
+                    if self.metrics is not None:
+                        self.metrics.stages.extend(stages)
+                    self.adult_filter.skipped.update(skipped)
+
+            counts = {}
+            for record_class, path in shards.items():
+                names = [table.table_name for table in self.get_tables(record_class)]
+                with self.stage('merge', path.name) as stage:
+                    merged = self.merge_shard(path, names)
+                    if stage is not None:
+                        stage.rows_out = sum(merged.values())
+                counts.update(merged)
+
+        for table in self.db.get_tables():
+            table.clear_cache()
+        self.log_skipped()
+        self.db.ratings.update_weighted(self.weighted_min_votes)
+        self.mark_import()
+
+        for record_class in self.plan():
+            for table in self.get_tables(record_class):
+                with self.stage('index', table.table_name):
+                    table.create_indexes()
+
+        total_time = time.perf_counter() - start
+        logger.info(f"Parallel import finished in {total_time:.3f} seconds")
+        return counts
+
+    def get_tables(self, record_class: type[Record]) -> list[TableBase]:
+        """
+        Chosen tables filled by the given data file, if any.
+        """
+        return [
+            getattr(self.db, name) for name in self.sources[record_class]
+            if name in self.tables
+        ]
+
+    def plan(self) -> list[type[Record]]:
+        """
+        Data files to read, in order.
+
+        Files are skipped if none of their tables were chosen, unless they
+        are needed to find which titles or people to keep. The titles are
+        always read first, if only to find the adult titles.
+
+        Returns:
+            Record classes, as found in `sources`.
+        """
+        order = list(self.sources) if self.subset is None else self.subset.order
+        people = self.subset is not None and bool(self.get_tables(readers.NameBasics))
+        plan = []
+        for record_class in order:
+            needed = (
+                record_class is readers.TitleBasics
+                or (people and record_class in Subset.credits)
+            )
+            if needed or self.get_tables(record_class):
+                plan.append(record_class)
+        return plan
+
+    def import_source(
+        self,
+        record_class: type[Record],
+        create_indexes: bool = True,
+    ) -> dict[str, int]:
+        """
+        Import a single data file into all of the tables it fills.
+
+        The file is read just once, with each record being split into rows
+        for every chosen table. Table indexes are built after the data is
+        loaded. If importing a subset, only the records it keeps are loaded.
+
+        Args:
+            record_class:
+                One of the keys of `sources`, eg. `readers.TitleBasics`.
+            create_indexes:
+                Set to false to skip building indexes.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        logger.info("Import %r", record_class.file_name)
+        tables = self.get_tables(record_class)
+        stats = None if self.metrics is None else ReadStats()
+        records: Iterable[Record]
+        if self.subset is not None:
+            records = record_class.from_folder(self.folder, stats=stats)
+            records = self.subset.filter(record_class, records)
+        elif record_class is readers.TitleBasics:
+            # Adult titles are dropped by the filter instead, to record them
+            records = readers.TitleBasics.from_folder(
+                self.folder, skip_adult=False, stats=stats)
+            records = self.adult_filter.filter(record_class, records, tables)
+        else:
+            records = record_class.from_folder(self.folder, stats=stats)
+            records = self.adult_filter.filter(record_class, records, tables)
+        with self.stage('load', record_class.file_name):
+            if tables:
+                counts = self.load(records, tables)
+            else:
+                # Read only to find the titles or people to keep
+                deque(records, maxlen=0)
+                counts = {}
+        if self.metrics is not None and stats is not None:
+            self.metrics.add_read(record_class.file_name, stats)
+        if create_indexes:
+            for table in tables:
+                with self.stage('index', table.table_name):
+                    table.create_indexes()
+        return counts
+
+    def mark_import(self) -> None:
+        """
+        Record the time of this import run in the metadata table.
+
+        Summaries built from the data, such as `Aggregates`, use it to
+        tell if they are stale.
+        """
+        marker = datetime.now(timezone.utc).isoformat()
+        self.db.metadata.set_value('import', marker)
+
+    def log_skipped(self) -> None:
+        """
+        Report how much of the data was dropped by the title filter, or
+        as it belonged to adult titles.
+        """
+        subset = self.subset
+        if subset is None:
+            excluded = self.adult_filter.excluded
+            logger.info(
+                f"Skipped {len(excluded):,} adult titles, "
+                f"using {excluded.num_bytes:,} bytes"
+            )
+            for name, skipped in self.adult_filter.skipped.items():
+                logger.info(f"{skipped:,} rows skipped from {name!r}")
+            return
+
+        logger.info(
+            f"Kept {len(subset.titles):,} titles and {len(subset.names):,} people, "
+            f"using {subset.titles.num_bytes + subset.names.num_bytes:,} bytes"
+        )
+        for name, skipped in subset.skipped.items():
+            logger.info(f"{skipped:,} rows skipped from {name!r}")
+
+    def stage(
+        self,
+        stage: str,
+        name: str = '',
+    ) -> AbstractContextManager[Optional[StageMetrics]]:
+        """
+        Time and profile the body of a with-block, as configured.
+
+        Args:
+            stage:
+                Name of stage, eg. 'index'
+            name:
+                Name of table or file, if any.
+
+        Returns:
+            Context manager, giving the stage's metrics, or none if metrics
+            are not being collected.
+        """
+        if self.metrics is None and self.profiler is None:
+            return nullcontext()
+        return self._stage(stage, name)
+
+    @contextmanager
+    def _stage(self, stage: str, name: str) -> Iterator[Optional[StageMetrics]]:
+        with ExitStack() as stack:
+            if self.profiler is not None:
+                stack.enter_context(self.profiler.stage(stage, name))
+            metrics = None
+            if self.metrics is not None:
+                metrics = stack.enter_context(self.metrics.timer(stage, name))
+            yield metrics
+
+    def merge_shard(self, path: Path, names: Iterable[str]) -> dict[str, int]:
+        """
+        Copy table data from a shard database into our database.
+
+        The shard's lookup tables are copied too, ignoring rows we have
+        already. Only one shard may add new rows to each lookup table, as
+        shards number their rows independently.
+
+        Args:
+            path:
+                Path to shard database file, created by `build_shard()`.
+            names:
+                Names of tables to copy.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        logger.info("Merge shard %r", path.name)
+        lookups = [
+            table.table_name for table in self.db.get_tables()
+            if isinstance(table, LookupMixin)
+        ]
+        connection = self.db.connection
+        connection.execute("ATTACH DATABASE ? AS shard;", (str(path),))
+        try:
+            counts = {}
+            with connection:
+                connection.execute('BEGIN;')
+                for name in lookups:
+                    connection.execute(
+                        f"INSERT OR IGNORE INTO main.{name} "
+                        f"SELECT * FROM shard.{name};")
+                for name in names:
+                    cursor = connection.execute(
+                        f"INSERT INTO main.{name} SELECT * FROM shard.{name};")
+                    counts[name] = cursor.rowcount
+        finally:
+            connection.execute("DETACH DATABASE shard;")
+
+        for table in self.db.get_tables():
+            if table.table_name in counts:
+                table.update_count()
+        return counts
+
+    def load(
+        self,
+        records: Iterable[Record],
+        tables: list[TableBase],
+    ) -> dict[str, int]:
+        """
+        Bulk-load records into one or more tables.
+
+        The row count of every table is stored afterwards, for `count()`.
+
+        Args:
+            records:
+                Iterable over data records.
+            tables:
+                Tables to convert each record into rows for.
+
+        Returns:
+            Number of rows added, keyed by table name.
+        """
+        timer = time.perf_counter
+        start = timer()
+        counts = {table.table_name: 0 for table in tables}
+        insert_times = {table.table_name: 0.0 for table in tables}
+        commit_time = 0.0
+        cursor = self.db.cursor()
+        for chunk in chunkify(records, self.records_per_transaction):
+            chunk = list(chunk)
+            cursor.execute('BEGIN;')
+            for table in tables:
+                insert_start = timer()
+                rows = [row for record in chunk for row in table.rows(record)]
+                cursor.executemany(table.insert_query, rows)
+                insert_times[table.table_name] += timer() - insert_start
+                # Rows ignored as duplicates are not counted
+                counts[table.table_name] += max(cursor.rowcount, 0)
+            commit_start = timer()
+            cursor.execute('COMMIT;')
+            commit_time += timer() - commit_start
+
+        for table in tables:
+            table.clear_cache()
+            table.update_count()
+
+        if self.metrics is not None:
+            for name, count in counts.items():
+                self.metrics.add('insert', name, insert_times[name], rows_out=count)
+            self.metrics.add(
+                'commit', ','.join(counts), commit_time, rows_out=sum(counts.values()))
+
+        total_time = timer() - start
+        for name, count in counts.items():
+            logger.info(f"{count:,} rows added to {name!r}")
+        logger.info(f"Finished in {total_time:.3f} seconds")
+        return counts
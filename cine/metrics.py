@@ -0,0 +1,157 @@
+"""
+Timings and throughput of every stage of an import, for regression tracking.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+from typing import Any, Iterator
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None                         # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss() -> int:
+    """
+    Largest resident set size of this process, or any of its finished
+    child processes, so far.
+
+    Returns:
+        Size in bytes, or zero if not known on this platform.
+    """
+    if resource is None:
+        return 0
+    usage = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Kilobytes everywhere but macOS
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+@dataclass(slots=True)
+class ReadStats:
+    """
+    Running totals for reading a single data file, see `utils.tsv_rows()`.
+    """
+    bytes_in: int = 0                       # Compressed file size
+    bytes_decompressed: int = 0             # Size of the plain text
+    rows: int = 0                           # Rows of fields split out
+    records: int = 0                        # Records converted
+    decompress: float = 0.0                 # Seconds in gzip
+    decode: float = 0.0                     # Seconds decoding UTF-8
+    split: float = 0.0                      # Seconds splitting lines and fields
+    convert: float = 0.0                    # Seconds building records
+
+
+@dataclass(slots=True)
+class StageMetrics:
+    """
+    Time spent, and data processed, by a single stage of the import.
+    """
+    stage: str                              # 'insert'
+    name: str                               # 'titles', or 'title.basics.tsv.gz'
+    seconds: float = 0.0
+    bytes_in: int = 0
+    rows_out: int = 0
+    peak_rss: int = 0                       # Bytes, at end of stage
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_out / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data['rows_per_second'] = round(self.rows_per_second, 1)
+        return data
+
+
+@dataclass
+class ImportMetrics:
+    """
+    Collects `StageMetrics` over a whole import, to be saved as JSON.
+
+    The stages are 'decompress', 'decode', 'split', and 'convert', for
+    every data file read; 'insert' and 'commit' for the tables loaded;
+    'load' for the whole of each file; and 'index' for every table's
+    indexes. Builds add other stages, eg. 'merge' and 'vacuum'.
+    """
+    stages: list[StageMetrics] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def add(
+        self,
+        stage: str,
+        name: str,
+        seconds: float,
+        bytes_in: int = 0,
+        rows_out: int = 0,
+    ) -> StageMetrics:
+        """
+        Record a finished stage.
+
+        Returns:
+            The new stage metrics.
+        """
+        metrics = StageMetrics(stage, name, seconds, bytes_in, rows_out, peak_rss())
+        self.stages.append(metrics)
+        return metrics
+
+    def add_read(self, name: str, stats: ReadStats) -> None:
+        """
+        Record the stages of reading a single data file.
+
+        Args:
+            name:
+                Name of data file, eg. 'title.basics.tsv.gz'
+            stats:
+                Totals collected while reading the file.
+        """
+        self.add('decompress', name, stats.decompress, stats.bytes_in)
+        self.add('decode', name, stats.decode, stats.bytes_decompressed, stats.rows)
+        self.add('split', name, stats.split, stats.bytes_decompressed, stats.rows)
+        self.add('convert', name, stats.convert, 0, stats.records)
+
+    @contextmanager
+    def timer(self, stage: str, name: str) -> Iterator[StageMetrics]:
+        """
+        Time the body of a with-block as a single stage.
+
+        The stage is yielded, so that its data counts may be filled in.
+        """
+        metrics = StageMetrics(stage, name)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.seconds = time.perf_counter() - start
+            metrics.peak_rss = peak_rss()
+            self.stages.append(metrics)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'elapsed': time.perf_counter() - self.started,
+            'peak_rss': max((stage.peak_rss for stage in self.stages), default=0),
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+    def write(self, path: Path) -> None:
+        """
+        Save metrics to the given path, as JSON.
+        """
+        with open(path, 'wt', encoding='utf-8') as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+            fp.write('\n')
+        logger.info("Wrote import metrics to '%s'", path)
@@ -0,0 +1,187 @@
+"""
+Share read-only database connections between threads.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import Iterator, Optional
+
+from .database import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PoolStats:
+    """
+    Running totals of a pool's activity.
+    """
+    checkouts: int = 0                      # Connections handed out
+    connections: int = 0                    # Connections opened
+    timeouts: int = 0                       # Checkouts given up on
+    waits: int = 0                          # Checkouts that had to wait
+    wait_max: float = 0.0                   # Longest wait, in seconds
+    wait_total: float = 0.0                 # Sum of all waits, in seconds
+
+    @property
+    def wait_average(self) -> float:
+        """
+        Average wait per checkout, in seconds.
+        """
+        return self.wait_total / self.checkouts if self.checkouts else 0.0
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of immutable `Database` connections to a single file.
+
+    Connections are opened on demand, up to the pool's size, and must be
+    checked out by a thread before use. For example:
+
+        pool = ConnectionPool('imdb.db', size=8)
+        with pool.connection() as db:
+            db.titles.count()
+
+    If the database file is replaced while the pool is in use, connections
+    are reopened as they are next checked out.
+    """
+    def __init__(
+        self,
+        path: Path|str,
+        size: int = 8,
+        timeout: Optional[float] = None,
+        mmap_size: int = 1 << 30,
+        cache_size: int = 0,
+    ):
+        """
+        Initialise pool. No connections are opened yet.
+
+        Args:
+            path:
+                Path to SQLite 3 database file.
+            size:
+                Maximum number of connections.
+            timeout:
+                Default number of seconds to wait for a free connection.
+                Use the default of `None` to wait forever.
+            mmap_size:
+                Passed through to every `Database`.
+            cache_size:
+                Passed through to every `Database`. Each connection has
+                its own cache.
+        """
+        if size < 1:
+            raise ValueError(f"Pool size must be at least one, given {size}")
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.stats = PoolStats()
+        self._idle: queue.LifoQueue[Database] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened: list[Database] = []
+
+    def acquire(self, timeout: Optional[float] = None) -> Database:
+        """
+        Check out a connection, waiting if they are all in use.
+
+        Args:
+            timeout:
+                Seconds to wait, overriding the pool's default.
+
+        Raises:
+            TimeoutError:
+                If no connection became free in time.
+
+        Returns:
+            Database connection, to be returned using `release()`.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        try:
+            db = self._idle.get_nowait()
+        except queue.Empty:
+            db = self._open() or self._wait(timeout)
+
+        if db.is_replaced():
+            db.reopen()
+
+        with self._lock:
+            self.stats.checkouts += 1
+        return db
+
+    def close(self) -> None:
+        """
+        Close every idle connection.
+        """
+        while True:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            db.connection.close()
+            with self._lock:
+                self._opened.remove(db)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Database]:
+        """
+        Check out a connection for the duration of a with-block.
+        """
+        db = self.acquire(timeout)
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def release(self, db: Database) -> None:
+        """
+        Return connection checked out using `acquire()`.
+        """
+        self._idle.put(db)
+
+    def _open(self) -> Optional[Database]:
+        """
+        Open a new connection, if pool is not yet full.
+        """
+        with self._lock:
+            if len(self._opened) >= self.size:
+                return None
+            db = Database(
+                self.path,
+                immutable=True,
+                mmap_size=self.mmap_size,
+                cache_size=self.cache_size,
+            )
+            self._opened.append(db)
+            self.stats.connections += 1
+        logger.debug("Opened connection %s of %s", len(self._opened), self.size)
+        return db
+
+    def _wait(self, timeout: Optional[float]) -> Database:
+        """
+        Wait for another thread to release a connection.
+        """
+        start = time.perf_counter()
+        try:
+            db = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.stats.timeouts += 1
+            message = f"No database connection free after {timeout} seconds"
+            raise TimeoutError(message) from None
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stats.waits += 1
+                self.stats.wait_total += elapsed
+                self.stats.wait_max = max(self.stats.wait_max, elapsed)
+        return db
@@ -0,0 +1,116 @@
+"""
+Optional cProfile and tracemalloc profiling of chosen import stages.
+"""
+
+from __future__ import annotations
+
+import cProfile
+from contextlib import contextmanager
+import logging
+from pathlib import Path
+import tracemalloc
+from typing import Iterable, Iterator
+
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """
+    Profile stages of work, as named by `Importer.stage()`.
+
+    For example, to profile building the indexes of every table:
+
+        profiler = Profiler(Path('profiles'), stages=['index'])
+        with profiler.stage('index', 'titles'):
+            db.titles.create_indexes()
+
+    Chosen stages are run under cProfile, with the statistics saved to a
+    '.prof' file named after the stage, eg. 'index-titles.prof'. If memory
+    tracing is on, every stage also gets a report of its largest
+    allocations, eg. 'index-titles.alloc.txt'. Other stages run as normal.
+    """
+    def __init__(
+        self,
+        folder: Path,
+        stages: Iterable[str] = (),
+        memory: bool = False,
+        top: int = 25,
+    ):
+        """
+        Args:
+            folder:
+                Where to write profiles and reports. Created if needed.
+            stages:
+                Names of the stages to run under cProfile, eg. 'index'
+            memory:
+                Trace memory allocations of every stage.
+            top:
+                Number of allocation sites in each memory report.
+        """
+        self.folder = Path(folder)
+        self.stages = frozenset(stages)
+        self.memory = memory
+        self.top = top
+
+    @contextmanager
+    def stage(self, stage: str, name: str = '') -> Iterator[None]:
+        """
+        Profile the body of a with-block, if its stage was chosen.
+
+        Args:
+            stage:
+                Name of stage, eg. 'index'
+            name:
+                Name of table or file, if any, eg. 'titles'
+        """
+        profile = stage in self.stages
+        if not profile and not self.memory:
+            yield
+            return
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        base = f"{stage}-{name}" if name else stage
+        started_tracing = False
+        before = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            before = tracemalloc.take_snapshot()
+
+        profiler = cProfile.Profile() if profile else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                path = self.folder / f"{base}.prof"
+                profiler.dump_stats(path)
+                logger.info("Wrote profile of %r to '%s'", base, path)
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                self._write_allocations(base, before, after)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def _write_allocations(
+        self,
+        base: str,
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+    ) -> None:
+        """
+        Save the allocation sites that grew the most during a stage.
+        """
+        path = self.folder / f"{base}.alloc.txt"
+        current, peak = tracemalloc.get_traced_memory()
+        differences = after.compare_to(before, 'lineno')
+        with open(path, 'wt', encoding='utf-8') as fp:
+            fp.write(f"Top {self.top} allocation sites for {base!r}\n")
+            fp.write(f"Traced memory: {current:,} bytes, peak {peak:,} bytes\n\n")
+            for difference in differences[:self.top]:
+                fp.write(f"{difference}\n")
+        logger.info("Wrote allocations of %r to '%s'", base, path)
@@ -14,8 +14,10 @@ See:
 
 from dataclasses import dataclass
 from pathlib import Path
+import time
 from typing import ClassVar, Iterator, Optional, Self
 
+from .metrics import ReadStats
 from .utils import (
     to_bool,
     to_bool_optional,
@@ -35,20 +37,39 @@ class Record:
         raise NotImplementedError('Sub-classes require from_strings() method')
 
     @classmethod
-    def from_folder(cls, folder: Path) -> Iterator[Self]:
+    def from_folder(
+        cls,
+        folder: Path,
+        *,
+        stats: Optional[ReadStats] = None,
+    ) -> Iterator[Self]:
         """
         Build a record dataclasses from a gzipped TSV file.
 
         Args:
             folder:
                 Folder containing downloaded IMDb *.tsv.gz files.
+            stats:
+                If given, time every stage of reading, including the
+                conversion of rows into records, into these totals.
 
         Returns:
             Yields a single record instance per row in correct file.
         """
         path = folder / cls.file_name
-        for row in tsv_rows(path, skip_header=True):
-            yield cls.from_strings(row)
+        rows = tsv_rows(path, skip_header=True, stats=stats)
+        if stats is None:
+            for row in rows:
+                yield cls.from_strings(row)
+            return
+
+        timer = time.perf_counter
+        for row in rows:
+            start = timer()
+            record = cls.from_strings(row)
+            stats.convert += timer() - start
+            stats.records += 1
+            yield record
 
 
 @dataclass(slots=True)
@@ -145,18 +166,26 @@ class TitleBasics(Record):
         )
 
     @classmethod
-    def from_folder(cls, folder: Path, skip_adult: bool = True) -> Iterator[Self]:
+    def from_folder(
+        cls,
+        folder: Path,
+        skip_adult: bool = True,
+        *,
+        stats: Optional[ReadStats] = None,
+    ) -> Iterator[Self]:
         """
         Skip pornographic titles by default.
 
         Args:
             skip_adult:
                 Set to false to read XXX titles.
+            stats:
+                Passed through to `Record.from_folder()`.
 
         Returns:
             Yields instances of itself.
         """
-        for obj in super(cls, cls).from_folder(folder):
+        for obj in super(cls, cls).from_folder(folder, stats=stats):
             if skip_adult and obj.is_adult:
                 continue
             yield obj
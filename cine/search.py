@@ -0,0 +1,502 @@
+"""
+Full-text and fuzzy search of titles and names, built after import.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import math
+import itertools
+import re
+import textwrap
+import time
+from typing import Iterator, Optional
+import unicodedata
+
+from . import database
+
+
+logger = logging.getLogger(__name__)
+
+
+# Largest possible SQLite rowid.
+LAST_ROWID = 2 ** 63 - 1
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """
+    A single title found by a search.
+    """
+    tconst: str                             # 'tt0133093'
+    primary_title: str                      # 'The Matrix'
+    title_type: str                         # 'movie'
+    start_year: Optional[int]               # 1999
+    num_votes: int                          # 2,100,000
+    score: float                            # Lower is better
+
+
+@dataclass(slots=True)
+class FuzzyMatch:
+    """
+    A single title or name found by a fuzzy search.
+    """
+    key: str                                # 'tt0111161' or 'nm0000216'
+    text: str                               # 'The Shawshank Redemption'
+    distance: int                           # 1, edits to match query
+
+
+def fold(text: str) -> str:
+    """
+    Normalise text for fuzzy comparisons.
+
+    Args:
+        text:
+            Any text, eg. 'Amélie'
+
+    Returns:
+        Lower-case text, without accents, eg. 'amelie'
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def substring_distance(needle: str, haystack: str, bound: Optional[int] = None) -> int:
+    """
+    Smallest edit distance between needle and any part of haystack.
+
+    A Levenshtein distance, where skipping characters at the start and end
+    of the haystack is free. So a correctly spelt word found anywhere in
+    the haystack gives zero.
+
+    Uses Myers' bit-parallel algorithm, so each character of the haystack
+    costs a handful of integer operations, rather than one per character
+    of the needle.
+
+    Args:
+        needle:
+            Text being searched for, eg. 'shawshenk'
+        haystack:
+            Text to search in, eg. 'the shawshank redemption'
+        bound:
+            Skip the calculation if the needle is too much longer than the
+            haystack for the distance to be within this bound, returning
+            some distance greater than it instead.
+
+    Returns:
+        Number of single character insertions, deletions, or substitutions.
+    """
+    length = len(needle)
+    if bound is not None and length - len(haystack) > bound:
+        return length - len(haystack)
+    if not length:
+        return 0
+
+    # Bit i of a character's mask is set if needle[i] is that character.
+    masks: dict[str, int] = {}
+    for i, char in enumerate(needle):
+        masks[char] = masks.get(char, 0) | (1 << i)
+
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive = full             # Vertical deltas of +1, then of -1
+    negative = 0
+    score = best = length
+    for char in haystack:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        up = negative | ~(horizontal | positive) & full
+        down = positive & horizontal
+        if up & last:
+            score += 1
+        elif down & last:
+            score -= 1
+            if score < best:
+                best = score
+        up = (up << 1) & full
+        down = (down << 1) & full
+        positive = down | ~(vertical | up) & full
+        negative = up & vertical
+    return best
+
+
+def trigrams(text: str) -> list[str]:
+    """
+    Split folded text into its overlapping, three character, sequences.
+
+    Args:
+        text:
+            Text, eg. 'Shaw'
+
+    Returns:
+        List of unique trigrams in order, eg. ['sha', 'haw']
+    """
+    text = ' '.join(fold(text).split())
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+def fts5_query(text: str, prefix: bool = True) -> str:
+    """
+    Convert user's search text into a safe FTS5 query.
+
+    Every word is quoted, so that FTS5 syntax characters in the text are
+    matched literally, and all words must be present.
+
+    Args:
+        text:
+            Search text, eg. 'the matr'
+        prefix:
+            Allow the last word to match as a prefix, for search-as-you-type.
+
+    Returns:
+        FTS5 query string, eg. '"the" "matr"*', or an empty string if the
+        text contains no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    terms = ['"{}"'.format(word.replace('"', '""')) for word in words]
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class TitleSearch:
+    """
+    FTS5 index over the primary titles and alternate titles of every title.
+
+    Searching is not case or accent sensitive. Results are ranked using a
+    combination of the text match quality (bm25) and the title's number of
+    votes, so that popular titles float to the top.
+
+    FTS5 calculates bm25 for every row that matches before it can pick the
+    best, so common words like 'the' would cost time in proportion to the
+    whole index. The index is built with the most voted titles first, and
+    only the first `max_ranked` matching rows are scored, which bounds the
+    cost of a search by popularity rather than by size.
+    """
+    # Number of best text matches to rank by popularity.
+    candidates: int = 100
+
+    # Most matching rows to score by text match, most voted first.
+    max_ranked: int = 2000
+
+    # How much popularity counts, compared to the quality of the text match.
+    votes_weight: float = 0.5
+
+    table_name = 'title_search'
+    table_query = """
+        CREATE VIRTUAL TABLE title_search USING fts5 (
+            title,
+            tconst UNINDEXED,
+            tokenize = "unicode61 remove_diacritics 2"
+        );
+    """
+
+    def __init__(self, db: database.Database):
+        """
+        Args:
+            db:
+                Reference to the `Database` instance to search.
+        """
+        self.db = db
+
+    def build(self) -> int:
+        """
+        Create search index from the titles and akas tables, from scratch.
+
+        Returns:
+            Number of titles indexed.
+        """
+        start = time.perf_counter()
+        connection = self.db.connection
+        connection.execute('BEGIN;')
+        connection.execute(f"DROP TABLE IF EXISTS {self.table_name};")
+        connection.execute(textwrap.dedent(self.table_query).strip())
+        # Row order is popularity order, for search() to cap common words
+        cursor = connection.execute(textwrap.dedent(f"""
+            INSERT INTO {self.table_name} (tconst, title)
+            SELECT found.tconst, found.title
+            FROM (
+                SELECT tconst, primary_title AS title FROM titles
+                UNION
+                SELECT title_id, title FROM akas
+            ) AS found
+            LEFT JOIN ratings ON ratings.tconst = found.tconst
+            ORDER BY coalesce(ratings.num_votes, 0) DESC;
+        """).strip())
+        count = cursor.rowcount
+        connection.execute(
+            f"INSERT INTO {self.table_name} ({self.table_name}) VALUES ('optimize');")
+        connection.execute('COMMIT;')
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Indexed {count:,} titles for search in {elapsed:.3f} seconds")
+        return count
+
+    def exists(self) -> bool:
+        """
+        Has the search index been built?
+        """
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;"
+        return self.db.connection.execute(query, (self.table_name,)).fetchone() is not None
+
+    def search(self, text: str, limit: int = 20) -> list[SearchResult]:
+        """
+        Find titles whose names contain every word in the given text.
+
+        When more than `max_ranked` rows match, only the most voted of them
+        are considered, so very common words find popular titles only.
+
+        Args:
+            text:
+                Search text, eg. 'matrix'. The last word may be incomplete.
+            limit:
+                Maximum number of results.
+
+        Returns:
+            List of results, best first.
+        """
+        match = fts5_query(text)
+        if not match:
+            return []
+
+        query = textwrap.dedent(f"""
+            WITH matches AS (
+                SELECT tconst, bm25({self.table_name}) AS bm25
+                FROM {self.table_name}
+                WHERE {self.table_name} MATCH :match
+                AND rowid <= coalesce((
+                    SELECT rowid FROM {self.table_name}
+                    WHERE {self.table_name} MATCH :match
+                    LIMIT 1 OFFSET :max_ranked - 1
+                ), {LAST_ROWID})
+                ORDER BY rank
+                LIMIT :candidates
+            )
+            SELECT
+                matches.tconst,
+                titles.primary_title,
+                titles.title_type,
+                titles.start_year,
+                coalesce(ratings.num_votes, 0) AS num_votes,
+                min(matches.bm25) AS bm25
+            FROM matches
+            JOIN titles ON titles.tconst = matches.tconst
+            LEFT JOIN ratings ON ratings.tconst = matches.tconst
+            GROUP BY matches.tconst;
+        """).strip()
+        params = {
+            'match': match,
+            'candidates': self.candidates,
+            'max_ranked': self.max_ranked,
+        }
+        results = []
+        for row in self.db.connection.execute(query, params):
+            # bm25() is negative, with lower being better
+            score = row['bm25'] - self.votes_weight * math.log1p(row['num_votes'])
+            results.append(SearchResult(
+                tconst=row['tconst'],
+                primary_title=row['primary_title'],
+                title_type=row['title_type'],
+                start_year=row['start_year'],
+                num_votes=row['num_votes'],
+                score=score,
+            ))
+        results.sort(key=lambda result: result.score)
+        return results[:limit]
+
+
+class FuzzySearch:
+    """
+    Typo-tolerant search of titles and names, using FTS5 trigram indexes.
+
+    Candidates are found by matching the rarest trigrams in the search
+    text, then ranked by their edit distance from it. For example,
+    'Shawshenk' finds 'The Shawshank Redemption', one edit away. Case and
+    accents are ignored, see `fold()`.
+
+    Candidates must contain every one of those trigrams, unless that finds
+    nothing close, when two of the rarest few will do, and failing that
+    any one. Requiring many trigrams keeps the rows FTS5 has to rank few,
+    however common each trigram is.
+    """
+    # Number of trigram matches to rank by edit distance.
+    candidates: int = 100
+
+    # Number of rarest trigrams to match on.
+    max_terms: int = 8
+
+    # Number of the rarest trigrams to fall back to matching only some of.
+    fallback_terms: int = 4
+
+    # Edit distance close enough to not look further, once all trigrams match.
+    close_distance: int = 1
+
+    # Index name, source query, and key column.
+    indexes = {
+        'fuzzy_titles': (
+            """
+            SELECT tconst, primary_title FROM titles
+            UNION
+            SELECT title_id, title FROM akas
+            WHERE title_id IN (SELECT tconst FROM titles);
+            """
+        ),
+        'fuzzy_names': "SELECT nconst, primary_name FROM names;",
+    }
+
+    def __init__(self, db: database.Database):
+        """
+        Args:
+            db:
+                Reference to the `Database` instance to search.
+        """
+        self.db = db
+
+    def build(self) -> dict[str, int]:
+        """
+        Create trigram indexes from the titles, akas and names tables.
+
+        Returns:
+            Number of rows indexed, keyed by index name.
+        """
+        start = time.perf_counter()
+        connection = self.db.connection
+        counts = {}
+        connection.execute('BEGIN;')
+        for name, select in self.indexes.items():
+            connection.execute(f"DROP TABLE IF EXISTS {name}_vocab;")
+            connection.execute(f"DROP TABLE IF EXISTS {name};")
+            connection.execute(
+                f"CREATE VIRTUAL TABLE {name} USING fts5 "
+                f"(key UNINDEXED, text UNINDEXED, folded, tokenize = 'trigram');")
+            connection.execute(
+                f"CREATE VIRTUAL TABLE {name}_vocab USING fts5vocab ({name}, 'row');")
+
+            # Index text folded as queries are, so 'amelie' finds 'Amélie'
+            select = textwrap.dedent(select).strip()
+            rows = (
+                (key, text, fold(text))
+                for key, text in connection.execute(select)
+            )
+            cursor = connection.executemany(
+                f"INSERT INTO {name} (key, text, folded) VALUES (?, ?, ?);", rows)
+            counts[name] = cursor.rowcount
+            connection.execute(f"INSERT INTO {name} ({name}) VALUES ('optimize');")
+        connection.execute('COMMIT;')
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Built trigram indexes in {elapsed:.3f} seconds")
+        return counts
+
+    def exists(self) -> bool:
+        """
+        Have the trigram indexes been built?
+        """
+        query = "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?);"
+        names = tuple(self.indexes)
+        return self.db.connection.execute(query, names).fetchone()[0] == len(names)
+
+    def names(self, text: str, limit: int = 20) -> list[FuzzyMatch]:
+        """
+        Find people whose names are closest to the given text.
+
+        Args:
+            text:
+                Search text, eg. 'Arnold Schwarzeneger'
+            limit:
+                Maximum number of results.
+
+        Returns:
+            List of matches, closest first.
+        """
+        return self._search('fuzzy_names', text, limit)
+
+    def titles(self, text: str, limit: int = 20) -> list[FuzzyMatch]:
+        """
+        Find titles whose primary or alternate titles are closest to text.
+
+        Args:
+            text:
+                Search text, eg. 'Shawshenk'
+            limit:
+                Maximum number of results.
+
+        Returns:
+            List of matches, closest first. Only the closest of a title's
+            names is included.
+        """
+        return self._search('fuzzy_titles', text, limit)
+
+    def _rarest(self, name: str, terms: list[str]) -> list[str]:
+        """
+        Choose the trigrams found in the fewest rows, ignoring unknowns.
+        """
+        placeholders = ','.join('?' * len(terms))
+        query = (
+            f"SELECT term FROM {name}_vocab WHERE term IN ({placeholders}) "
+            f"ORDER BY doc LIMIT ?;"
+        )
+        cursor = self.db.connection.execute(query, (*terms, self.max_terms))
+        return [row[0] for row in cursor]
+
+    def _matches(self, terms: list[str]) -> Iterator[tuple[str, bool]]:
+        """
+        Yield FTS5 queries for the trigrams, the strictest first.
+
+        Every trigram must match at first, then any two of the rarest few,
+        then any one of them.
+
+        Returns:
+            Yields queries, and whether a closer match should be looked
+            for with the next query if this one only finds distant ones.
+        """
+        quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        fallback = quoted[:self.fallback_terms]
+        yield ' AND '.join(quoted), True
+        if len(fallback) > 2:
+            pairs = itertools.combinations(fallback, 2)
+            yield ' OR '.join(f"({first} AND {second})" for first, second in pairs), False
+        if len(fallback) > 1:
+            yield ' OR '.join(fallback), False
+
+    def _search(self, name: str, text: str, limit: int) -> list[FuzzyMatch]:
+        terms = trigrams(text)
+        if terms:
+            terms = self._rarest(name, terms)
+        if not terms:
+            return []
+
+        query = (
+            f"SELECT key, text, folded FROM {name} WHERE {name} MATCH ? "
+            f"ORDER BY rank LIMIT ?;"
+        )
+        needle = ' '.join(fold(text).split())
+        best: dict[str, FuzzyMatch] = {}
+        bound: Optional[int] = None
+        for match, strict in self._matches(terms):
+            cursor = self.db.connection.execute(query, (match, self.candidates))
+            for key, found, folded in cursor:
+                # Skip candidates too short to beat the worst result kept
+                distance = substring_distance(needle, folded, bound)
+                if bound is not None and distance > bound:
+                    continue
+                if key not in best or distance < best[key].distance:
+                    best[key] = FuzzyMatch(key, found, distance)
+                    if len(best) >= limit:
+                        distances = sorted(other.distance for other in best.values())
+                        bound = distances[limit - 1]
+
+            if best:
+                closest = min(other.distance for other in best.values())
+                if not strict or closest <= self.close_distance:
+                    break
+
+        matches = sorted(
+            best.values(),
+            key=lambda match: (match.distance, len(match.text)),
+        )
+        return matches[:limit]
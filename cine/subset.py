@@ -0,0 +1,315 @@
+"""
+Build a database holding only a subset of titles, and the people in them.
+
+A `TitleFilter` chooses the titles to keep. As the data files are imported,
+a `Subset` records the kept titles, then the people credited on them, and
+drops every row of the other tables that refers to anything else.
+
+Without a filter, an `AdultFilter` still drops adult titles, and every row
+of the other tables that refers to them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar, Iterable, Iterator, Optional
+
+from . import readers
+from .readers import Record
+from .utils import tsv_rows
+
+if TYPE_CHECKING:
+    from .tables import TableBase
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdSet:
+    """
+    Compact set of IMDb identifiers, such as 'tt0133093' or 'nm0000206'.
+
+    Identifiers are stored as one bit per number, so that even a set of
+    every title ever listed by IMDb needs only a few megabytes.
+    """
+    def __init__(self, constants: Iterable[str] = ()):
+        self._bits = bytearray()
+        self._count = 0
+        for constant in constants:
+            self.add(constant)
+
+    def __contains__(self, constant: object) -> bool:
+        if not isinstance(constant, str):
+            return False
+        number = int(constant[2:])
+        index = number >> 3
+        if index >= len(self._bits):
+            return False
+        return bool(self._bits[index] & (1 << (number & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, constant: str) -> None:
+        """
+        Add identifier to set.
+        """
+        number = int(constant[2:])
+        index = number >> 3
+        if index >= len(self._bits):
+            size = max(index + 1, 2 * len(self._bits))
+            self._bits.extend(bytes(size - len(self._bits)))
+        bit = 1 << (number & 7)
+        if not self._bits[index] & bit:
+            self._bits[index] |= bit
+            self._count += 1
+
+    @property
+    def num_bytes(self) -> int:
+        """
+        Memory used by the set's bits.
+        """
+        return len(self._bits)
+
+
+class AdultFilter:
+    """
+    Drop adult titles, and every row of the other data files that refers to
+    them, eg. their alternate titles and cast.
+
+    Adult titles are recorded as the titles are imported, so they must be
+    imported first, or found beforehand using `prepare()`.
+    """
+    def __init__(self, excluded: Optional[IdSet] = None):
+        """
+        Args:
+            excluded:
+                Adult titles already found, if any.
+        """
+        self.excluded = IdSet() if excluded is None else excluded
+
+        # Rows not imported, keyed by table name.
+        self.skipped: dict[str, int] = {}
+
+    def filter(
+        self,
+        record_class: type[Record],
+        records: Iterable[Record],
+        tables: Iterable[TableBase],
+    ) -> Iterator[Record]:
+        """
+        Yield records, skipping any of adult titles.
+
+        Episodes of adult series are skipped too. Names keep their other
+        known-for titles.
+
+        Args:
+            record_class:
+                Class of the records, eg. `readers.TitleAkas`.
+            records:
+                Records, including those of adult titles.
+            tables:
+                Tables the records are to be imported into, used to count
+                the rows skipped.
+
+        Returns:
+            Yields records to import.
+        """
+        tables = list(tables)
+        for table in tables:
+            self.skipped.setdefault(table.table_name, 0)
+        excluded = self.excluded
+        key = 'title_id' if record_class is readers.TitleAkas else 'tconst'
+        for record in records:
+            if isinstance(record, readers.TitleBasics):
+                if record.is_adult:
+                    excluded.add(record.tconst)
+                    self._skip(record, tables)
+                    continue
+            elif isinstance(record, readers.NameBasics):
+                known_for = record.known_for_titles
+                if any(tconst in excluded for tconst in known_for):
+                    kept = replace(
+                        record,
+                        known_for_titles=tuple(t for t in known_for if t not in excluded),
+                    )
+                    self._skip(record, tables)
+                    self._skip(kept, tables, -1)
+                    record = kept
+            elif getattr(record, key) in excluded:
+                self._skip(record, tables)
+                continue
+            elif isinstance(record, readers.TitleEpisodes) and record.parent in excluded:
+                self._skip(record, tables)
+                continue
+            yield record
+
+    def prepare(self, folder: Path) -> None:
+        """
+        Find every adult title, without importing any titles.
+
+        Only the identifier and adult fields of the titles are looked at.
+
+        Args:
+            folder:
+                Directory containing IMDB data files.
+        """
+        path = folder / readers.TitleBasics.file_name
+        excluded = self.excluded
+        for fields in tsv_rows(path, skip_header=True):
+            if fields[4] == '1':
+                excluded.add(fields[0])
+        logger.info(f"Found {len(excluded):,} adult titles")
+
+    def _skip(self, record: Record, tables: list[TableBase], sign: int = 1) -> None:
+        """
+        Count the rows every table would have had from the record.
+        """
+        for table in tables:
+            self.skipped[table.table_name] += sign * table.num_rows(record)
+
+
+@dataclass(frozen=True)
+class TitleFilter:
+    """
+    Which titles to keep. Every condition given must be met.
+    """
+    title_types: Optional[frozenset[str]] = None    # {'movie', 'tvMovie'}
+    min_votes: int = 0
+    min_year: Optional[int] = None                  # Start year, inclusive
+    max_year: Optional[int] = None
+    regions: Optional[frozenset[str]] = None        # Has an aka in any, eg. {'NZ'}
+
+    def keep(self, record: readers.TitleBasics) -> bool:
+        """
+        Does the given title meet the conditions found in its basics?
+
+        Votes and regions are not found there, see `Subset.prepare()`.
+        """
+        if self.title_types is not None and record.title_type not in self.title_types:
+            return False
+        if self.min_year is not None or self.max_year is not None:
+            year = record.start_year
+            if year is None:
+                return False
+            if self.min_year is not None and year < self.min_year:
+                return False
+            if self.max_year is not None and year > self.max_year:
+                return False
+        return True
+
+
+@dataclass
+class Subset:
+    """
+    Titles and people kept so far, while importing with a `TitleFilter`.
+
+    Titles must be imported first, then the tables that credit people on
+    them, then the people themselves. See `Subset.order`.
+    """
+    title_filter: TitleFilter
+    titles: IdSet = field(default_factory=IdSet)
+    names: IdSet = field(default_factory=IdSet)
+    skipped: dict[str, int] = field(default_factory=dict)
+
+    # Order to import data files in.
+    order: ClassVar[tuple[type[Record], ...]] = (
+        readers.TitleBasics,
+        readers.TitleAkas,
+        readers.TitleCrew,
+        readers.TitleEpisodes,
+        readers.TitlePrincipals,
+        readers.TitleRatings,
+        readers.NameBasics,
+    )
+
+    # Data files that find the people to keep.
+    credits: ClassVar[tuple[type[Record], ...]] = (readers.TitleCrew, readers.TitlePrincipals)
+
+    # Titles meeting the vote and region conditions, see `prepare()`.
+    _voted: Optional[IdSet] = field(default=None, init=False, repr=False)
+    _in_regions: Optional[IdSet] = field(default=None, init=False, repr=False)
+
+    def filter(
+        self,
+        record_class: type[Record],
+        records: Iterable[Record],
+    ) -> Iterator[Record]:
+        """
+        Yield only the records of kept titles and people.
+
+        Titles and people are added to the subset as they are kept.
+
+        Args:
+            record_class:
+                Class of the records, eg. `readers.TitleBasics`.
+            records:
+                Records, in the order described in `Subset.order`.
+
+        Returns:
+            Yields records to import.
+        """
+        name = record_class.file_name
+        self.skipped.setdefault(name, 0)
+        titles = self.titles
+        names = self.names
+        for record in records:
+            if isinstance(record, readers.TitleBasics):
+                keep = self._keep_title(record)
+                if keep:
+                    titles.add(record.tconst)
+            elif isinstance(record, readers.NameBasics):
+                keep = record.nconst in names
+                if keep:
+                    known_for = tuple(t for t in record.known_for_titles if t in titles)
+                    if known_for != record.known_for_titles:
+                        record = replace(record, known_for_titles=known_for)
+            elif isinstance(record, readers.TitleAkas):
+                keep = record.title_id in titles
+            else:
+                keep = record.tconst in titles              # type: ignore[attr-defined]
+                if keep and isinstance(record, readers.TitleCrew):
+                    for nconst in record.directors + record.writers:
+                        names.add(nconst)
+                elif keep and isinstance(record, readers.TitlePrincipals):
+                    names.add(record.nconst)
+
+            if keep:
+                yield record
+            else:
+                self.skipped[name] += 1
+
+    def prepare(self, folder: Path) -> None:
+        """
+        Read the data files needed to apply the filter's vote and region
+        conditions, if any, before titles are imported.
+
+        Args:
+            folder:
+                Directory containing IMDB data files.
+        """
+        title_filter = self.title_filter
+        if title_filter.min_votes:
+            logger.info("Find titles with at least %s votes", f"{title_filter.min_votes:,}")
+            self._voted = IdSet(
+                rating.tconst for rating in readers.TitleRatings.from_folder(folder)
+                if rating.num_votes >= title_filter.min_votes
+            )
+        if title_filter.regions:
+            regions = title_filter.regions
+            logger.info("Find titles released in %s", ', '.join(sorted(regions)))
+            self._in_regions = IdSet(
+                aka.title_id for aka in readers.TitleAkas.from_folder(folder)
+                if aka.region in regions
+            )
+
+    def _keep_title(self, record: readers.TitleBasics) -> bool:
+        if not self.title_filter.keep(record):
+            return False
+        if self._voted is not None and record.tconst not in self._voted:
+            return False
+        if self._in_regions is not None and record.tconst not in self._in_regions:
+            return False
+        return True
@@ -0,0 +1,451 @@
+"""
+Generate synthetic IMDb data files, for repeatable benchmarks offline.
+
+The seven files have the same names, columns, and formatting as IMDb's own
+downloads. Their shapes approximate the real data: the relative number of
+rows in each file, the mix of title types, the rate of missing values, the
+length of list fields, and the skew of popular people and titles. Every
+file is sorted by its first column, and every identifier that refers to
+another file points at a row that exists there.
+
+At a scale of one there are 100,000 titles, about one percent of the
+real data. Output depends only on the scale and seed, so files generated
+on different machines are identical.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Callable, Iterable, Iterator, Mapping, TypeVar
+
+from .utils import id_from_int
+
+
+logger = logging.getLogger(__name__)
+
+
+# Number of titles at a scale of one.
+TITLES_PER_SCALE = 100_000
+
+# Relative frequency of each title type.
+TITLE_TYPES = {
+    'tvEpisode': 0.78,
+    'short': 0.09,
+    'movie': 0.065,
+    'video': 0.028,
+    'tvSeries': 0.024,
+    'tvMovie': 0.014,
+    'tvMiniSeries': 0.005,
+    'tvSpecial': 0.004,
+    'videoGame': 0.004,
+    'tvShort': 0.001,
+}
+
+# Share of titles of each type that have been rated.
+RATED = {
+    'movie': 0.45,
+    'tvSeries': 0.45,
+    'tvMiniSeries': 0.4,
+    'tvMovie': 0.35,
+    'videoGame': 0.3,
+    'short': 0.15,
+    'tvEpisode': 0.09,
+}
+
+GENRES = {
+    'Drama': 20, 'Comedy': 15, 'Documentary': 9, 'Talk-Show': 7, 'Short': 7,
+    'Reality-TV': 6, 'Family': 5, 'Romance': 5, 'News': 5, 'Animation': 4,
+    'Crime': 4, 'Action': 4, 'Music': 3, 'Adventure': 3, 'Game-Show': 3,
+    'Mystery': 2, 'Thriller': 2, 'Horror': 2, 'Fantasy': 2, 'History': 2,
+    'Sport': 2, 'Biography': 1, 'Sci-Fi': 1, 'Adult': 1, 'Musical': 1,
+    'War': 1, 'Western': 1, 'Film-Noir': 1,
+}
+
+PROFESSIONS = {
+    'actor': 30, 'actress': 20, 'miscellaneous': 10, 'producer': 8,
+    'writer': 7, 'director': 6, 'camera_department': 4, 'editor': 3,
+    'composer': 3, 'cinematographer': 2, 'sound_department': 2,
+    'art_department': 2, 'music_department': 2, 'self': 1,
+}
+
+CATEGORIES = {
+    'actor': 30, 'actress': 20, 'self': 15, 'director': 8, 'writer': 8,
+    'producer': 7, 'editor': 4, 'composer': 3, 'cinematographer': 3,
+    'production_designer': 1, 'archive_footage': 1,
+}
+
+JOBS = ('producer', 'executive producer', 'screenplay', 'novel', 'story',
+        'director of photography', 'co-producer', 'created by')
+
+REGIONS = {
+    'US': 12, 'GB': 6, 'DE': 6, 'FR': 6, 'ES': 5, 'IT': 5, 'JP': 5,
+    'IN': 4, 'BR': 4, 'CA': 4, 'MX': 3, 'RU': 3, 'XWW': 3, 'PT': 2,
+    'HU': 2, 'GR': 2, 'PL': 2, 'SE': 2, 'TR': 2, 'UA': 1,
+}
+
+LANGUAGES = {'en': 6, 'ja': 3, 'es': 3, 'fr': 3, 'hi': 2, 'ru': 2, 'de': 2, 'tr': 1}
+
+AKA_TYPES = {
+    'imdbDisplay': 10, 'alternative': 4, 'working': 2, 'dvd': 1,
+    'festival': 1, 'tv': 1, 'video': 1,
+}
+
+AKA_ATTRIBUTES = ('literal English title', 'alternative transliteration',
+                  'new title', 'complete title', 'short title')
+
+# Words to build titles from, including some outside of ASCII.
+WORDS = (
+    'the', 'of', 'night', 'love', 'last', 'man', 'city', 'dark', 'return',
+    'house', 'story', 'life', 'world', 'war', 'day', 'girl', 'king', 'dead',
+    'blood', 'dream', 'secret', 'summer', 'black', 'red', 'home', 'lost',
+    'star', 'river', 'road', 'time', 'shadow', 'heart', 'island', 'game',
+    'amélie', 'mátrix', 'straße', 'ночь', 'любовь', '東京', 'café', 'niño',
+)
+
+FIRST_NAMES = (
+    'John', 'Mary', 'James', 'Anna', 'Robert', 'Maria', 'Michael', 'Laura',
+    'David', 'Sofia', 'Kenji', 'Yuki', 'Raj', 'Priya', 'Pierre', 'Zoë',
+    'José', 'Olga', 'Ahmed', 'Chloé', 'Lars', 'Ingrid', 'Wei', 'Mei',
+)
+
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Brown', 'García', 'Müller', 'Rossi', 'Tanaka',
+    'Kumar', 'Dubois', 'Ivanov', 'Kowalski', 'Nielsen', 'Silva', 'Chen',
+    'Nakamura', 'Öztürk', 'Novák', 'Svensson', 'O\'Brien', 'Fernández',
+)
+
+NULL = r'\N'
+
+T = TypeVar('T')
+
+
+class Generator:
+    """
+    Writes one consistent set of synthetic data files.
+    """
+    def __init__(self, scale: float = 1.0, seed: int = 0):
+        """
+        Args:
+            scale:
+                Size of the data, relative to `TITLES_PER_SCALE` titles.
+            seed:
+                Seed for the random number generator.
+        """
+        if scale <= 0:
+            raise ValueError(f"Scale must be more than zero, given {scale}")
+        self.scale = scale
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.num_titles = max(1, round(TITLES_PER_SCALE * scale))
+        self.num_names = max(1, round(TITLES_PER_SCALE * scale * 1.3))
+
+        # Filled by `titles()`, used by the files that refer to titles
+        self.title_keys: list[int] = []
+        self.title_types: list[str] = []
+        self.title_names: list[str] = []
+        self.series: list[int] = []
+
+        # Filled by `names()`
+        self.name_keys: list[int] = []
+
+    def write(self, folder: Path) -> dict[str, int]:
+        """
+        Write every data file into the given folder.
+
+        Returns:
+            Number of data rows written, keyed by file name.
+        """
+        start = time.perf_counter()
+        folder.mkdir(parents=True, exist_ok=True)
+        files = (
+            ('title.basics.tsv.gz', self.titles()),
+            ('name.basics.tsv.gz', self.names()),
+            ('title.akas.tsv.gz', self.akas()),
+            ('title.crew.tsv.gz', self.crew()),
+            ('title.episode.tsv.gz', self.episodes()),
+            ('title.principals.tsv.gz', self.principals()),
+            ('title.ratings.tsv.gz', self.ratings()),
+        )
+        counts = {}
+        for file_name, rows in files:
+            counts[file_name] = write_tsv(folder / file_name, rows)
+
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        logger.info(
+            f"Wrote {total:,} synthetic rows at scale {self.scale} "
+            f"in {elapsed:.3f} seconds"
+        )
+        return counts
+
+    def titles(self) -> Iterator[list[str]]:
+        rand = self.random
+        types = self._sampler(TITLE_TYPES)
+        genres = self._sampler(GENRES)
+        yield [
+            'tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult',
+            'startYear', 'endYear', 'runtimeMinutes', 'genres',
+        ]
+        for key in self._keys(self.num_titles):
+            title_type = types()
+            is_series = title_type in ('tvSeries', 'tvMiniSeries')
+            if is_series:
+                self.series.append(key)
+            primary = self._title()
+            original = primary if rand.random() < 0.9 else self._title()
+            self.title_keys.append(key)
+            self.title_types.append(title_type)
+            self.title_names.append(primary)
+
+            start_year = None
+            if rand.random() > 0.12:
+                start_year = max(1874, 2025 - int(rand.expovariate(1 / 15)))
+            end_year = None
+            if start_year and is_series and rand.random() < 0.6:
+                end_year = min(2030, start_year + int(rand.expovariate(1 / 4)))
+            runtime = None
+            if rand.random() < 0.3:
+                runtime = self._runtime(title_type)
+            names = NULL
+            if rand.random() > 0.05:
+                names = ','.join(sorted(self._distinct(genres, rand.randint(1, 3))))
+
+            yield [
+                id_from_int('tt', key),
+                title_type,
+                primary,
+                original,
+                '1' if rand.random() < 0.015 else '0',
+                _optional(start_year),
+                _optional(end_year),
+                _optional(runtime),
+                names,
+            ]
+
+        # Episodes need at least one series to belong to
+        if not self.series:
+            self.series.append(self.title_keys[0])
+
+    def names(self) -> Iterator[list[str]]:
+        rand = self.random
+        professions = self._sampler(PROFESSIONS)
+        yield [
+            'nconst', 'primaryName', 'birthYear', 'deathYear',
+            'primaryProfession', 'knownForTitles',
+        ]
+        for key in self._keys(self.num_names):
+            self.name_keys.append(key)
+            birth_year = None
+            death_year = None
+            if rand.random() < 0.05:
+                birth_year = rand.randint(1850, 2010)
+                if rand.random() < 0.3:
+                    death_year = min(2025, birth_year + rand.randint(20, 95))
+
+            primary_profession = NULL
+            if rand.random() > 0.2:
+                found = self._distinct(professions, rand.randint(1, 3))
+                primary_profession = ','.join(found)
+
+            known_for = NULL
+            if rand.random() > 0.15:
+                count = rand.randint(1, 4)
+                titles = {self._popular(self.title_keys) for _ in range(count)}
+                known_for = ','.join(id_from_int('tt', title) for title in titles)
+
+            yield [
+                id_from_int('nm', key),
+                f"{rand.choice(FIRST_NAMES)} {rand.choice(LAST_NAMES)}",
+                _optional(birth_year),
+                _optional(death_year),
+                primary_profession,
+                known_for,
+            ]
+
+    def akas(self) -> Iterator[list[str]]:
+        rand = self.random
+        regions = self._sampler(REGIONS)
+        languages = self._sampler(LANGUAGES)
+        types = self._sampler(AKA_TYPES)
+        yield [
+            'titleId', 'ordering', 'title', 'region', 'language', 'types',
+            'attributes', 'isOriginalTitle',
+        ]
+        for key, name in zip(self.title_keys, self.title_names):
+            tconst = id_from_int('tt', key)
+            count = 1 + min(80, int(rand.expovariate(1 / 3.9)))
+            for ordering in range(1, count + 1):
+                if ordering == 1:
+                    yield [tconst, '1', name, NULL, NULL, 'original', NULL, '1']
+                    continue
+                title = name if rand.random() < 0.5 else self._title()
+                yield [
+                    tconst,
+                    str(ordering),
+                    title,
+                    regions() if rand.random() > 0.2 else NULL,
+                    languages() if rand.random() < 0.3 else NULL,
+                    types() if rand.random() < 0.45 else NULL,
+                    rand.choice(AKA_ATTRIBUTES) if rand.random() < 0.02 else NULL,
+                    '0',
+                ]
+
+    def crew(self) -> Iterator[list[str]]:
+        rand = self.random
+        yield ['tconst', 'directors', 'writers']
+        for key in self.title_keys:
+            directors = NULL
+            if rand.random() > 0.4:
+                directors = self._people(rand.randint(1, 2))
+            writers = NULL
+            if rand.random() > 0.5:
+                writers = self._people(rand.randint(1, 3))
+            yield [id_from_int('tt', key), directors, writers]
+
+    def episodes(self) -> Iterator[list[str]]:
+        rand = self.random
+        yield ['tconst', 'parentTconst', 'seasonNumber', 'episodeNumber']
+        for key, title_type in zip(self.title_keys, self.title_types):
+            if title_type != 'tvEpisode':
+                continue
+            parent = self._popular(self.series)
+            season = episode = NULL
+            if rand.random() > 0.2:
+                season = str(1 + int(rand.expovariate(1 / 2)))
+                episode = str(rand.randint(1, 24))
+            yield [id_from_int('tt', key), id_from_int('tt', parent), season, episode]
+
+    def principals(self) -> Iterator[list[str]]:
+        rand = self.random
+        categories = self._sampler(CATEGORIES)
+        yield ['tconst', 'ordering', 'nconst', 'category', 'job', 'characters']
+        for key in self.title_keys:
+            tconst = id_from_int('tt', key)
+            count = 1 + min(9, int(rand.expovariate(1 / 7)))
+            people = self._distinct(lambda: self._popular(self.name_keys), count)
+            for ordering, person in enumerate(people, 1):
+                category = categories()
+                characters = NULL
+                if category in ('actor', 'actress', 'self') and rand.random() < 0.8:
+                    character = f"{rand.choice(FIRST_NAMES)} {rand.choice(LAST_NAMES)}"
+                    characters = json.dumps([character], ensure_ascii=False)
+                job = rand.choice(JOBS) if rand.random() < 0.2 else NULL
+                yield [tconst, str(ordering), id_from_int('nm', person), category, job, characters]
+
+    def ratings(self) -> Iterator[list[str]]:
+        rand = self.random
+        yield ['tconst', 'averageRating', 'numVotes']
+        for key, title_type in zip(self.title_keys, self.title_types):
+            if rand.random() > RATED.get(title_type, 0.2):
+                continue
+            rating = min(10.0, max(1.0, rand.gauss(6.9, 1.3)))
+            votes = min(3_000_000, int(5 * rand.paretovariate(0.9)))
+            yield [id_from_int('tt', key), f"{rating:.1f}", str(votes)]
+
+    def _distinct(self, choose: Callable[[], T], count: int) -> list[T]:
+        """
+        Choose up to count different values, in the order first chosen.
+        """
+        found: dict[T, None] = {}
+        for _ in range(count * 3):
+            found[choose()] = None
+            if len(found) == count:
+                break
+        return list(found)
+
+    def _keys(self, count: int) -> Iterator[int]:
+        """
+        Increasing identifiers, with occasional gaps like the real data.
+        """
+        rand = self.random
+        key = 0
+        for _ in range(count):
+            key += 1
+            if rand.random() < 0.1:
+                key += rand.randint(1, 5)
+            yield key
+
+    def _people(self, count: int) -> str:
+        people = self._distinct(lambda: self._popular(self.name_keys), count)
+        return ','.join(id_from_int('nm', person) for person in people)
+
+    def _popular(self, keys: list[int]) -> int:
+        """
+        Choose a key, favouring those near the start, as the real data
+        favours long-established people and series.
+        """
+        return keys[int(len(keys) * self.random.random() ** 3)]
+
+    def _runtime(self, title_type: str) -> int:
+        rand = self.random
+        if title_type in ('movie', 'tvMovie', 'video'):
+            return max(40, int(rand.gauss(95, 20)))
+        if title_type in ('short', 'tvShort'):
+            return rand.randint(1, 40)
+        return rand.choice((11, 22, 24, 30, 44, 45, 60))
+
+    def _sampler(self, weights: Mapping[str, float]) -> Callable[[], str]:
+        """
+        Build function to choose a key, weighted by its value.
+        """
+        rand = self.random
+        population = list(weights)
+        cumulative = []
+        total = 0.0
+        for weight in weights.values():
+            total += weight
+            cumulative.append(total)
+        return lambda: rand.choices(population, cum_weights=cumulative)[0]
+
+    def _title(self) -> str:
+        rand = self.random
+        words = [rand.choice(WORDS) for _ in range(rand.randint(1, 5))]
+        return ' '.join(words).capitalize()
+
+
+def generate(folder: Path, scale: float = 1.0, seed: int = 0) -> dict[str, int]:
+    """
+    Write a complete set of synthetic IMDb data files.
+
+    Args:
+        folder:
+            Where to write the files. Created if needed.
+        scale:
+            Size of data, eg. 0.1, 1, or 10. See `TITLES_PER_SCALE`.
+        seed:
+            Seed for the random number generator.
+
+    Returns:
+        Number of data rows written, keyed by file name.
+    """
+    return Generator(scale, seed).write(folder)
+
+
+def write_tsv(path: Path, rows: Iterable[list[str]]) -> int:
+    """
+    Write gzipped TSV file, with header, in the format IMDb uses.
+
+    The gzip header has no timestamp, so that output is reproducible.
+
+    Returns:
+        Number of rows written, not counting the header.
+    """
+    count = -1
+    with open(path, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as binary:
+            with io.TextIOWrapper(binary, encoding='utf-8', newline='') as fp:
+                for row in rows:
+                    fp.write('\t'.join(row))
+                    fp.write('\n')
+                    count += 1
+    return max(count, 0)
+
+
+def _optional(value: object) -> str:
+    return NULL if value is None else str(value)
@@ -4,18 +4,76 @@ from __future__ import annotations
 import abc
 from dataclasses import asdict
 import logging
+import sqlite3
 import textwrap
 import time
-from typing import Any, Iterable
+from typing import Any, ClassVar, Iterable, Iterator, Optional
 
 from . import database
-from .readers import Record
-from .utils import chunkify
+from .cache import LRUCache
+from .readers import (
+    NameBasics,
+    Record,
+    TitleAkas,
+    TitleBasics,
+    TitleCrew,
+    TitleEpisodes,
+    TitlePrincipals,
+    TitleRatings,
+)
+from .utils import chunkify, to_tuple
 
 
 logger = logging.getLogger(__name__)
 
 
+# Genres used by IMDb, in the order of their bits in `titles.genres`.
+GENRES = (
+    'Action', 'Adult', 'Adventure', 'Animation', 'Biography', 'Comedy',
+    'Crime', 'Documentary', 'Drama', 'Family', 'Fantasy', 'Film-Noir',
+    'Game-Show', 'History', 'Horror', 'Music', 'Musical', 'Mystery', 'News',
+    'Reality-TV', 'Romance', 'Sci-Fi', 'Short', 'Sport', 'Talk-Show',
+    'Thriller', 'War', 'Western',
+)
+
+
+def genres_mask(genres: Iterable[str]) -> int:
+    """
+    Pack the given genre names into an integer bitmask.
+
+    Bit N is set for the genre found at `GENRES[N]`. Genre names that are
+    not found in `GENRES` are ignored.
+
+    Args:
+        genres:
+            Genre names, eg. ('Action', 'Sci-Fi')
+
+    Returns:
+        Integer bitmask, zero if no known genres given.
+    """
+    mask = 0
+    for name in genres:
+        try:
+            mask |= 1 << GENRES.index(name)
+        except ValueError:
+            pass
+    return mask
+
+
+def genres_from_mask(mask: int) -> tuple[str, ...]:
+    """
+    Unpack a bitmask created by `genres_mask()` back into genre names.
+
+    Args:
+        mask:
+            Integer bitmask.
+
+    Returns:
+        Tuple of genre names, in the order of `GENRES`.
+    """
+    return tuple(name for bit, name in enumerate(GENRES) if mask & (1 << bit))
+
+
 class TableBase(abc.ABC):
     """
     Common functionality for an individual database table.
@@ -26,9 +84,22 @@ class TableBase(abc.ABC):
     # SQL statement to insert a new row of data.
     insert_query: str
 
+    # Column used to find records by `get()` and `get_many()`, eg. 'tconst'.
+    key_name: ClassVar[Optional[str]] = None
+
+    # Dataclass returned by queries, if any.
+    record_class: ClassVar[Optional[type[Record]]] = None
+
+    # SQL statements to create indexes, run only once data is loaded.
+    index_queries: tuple[str, ...] = ()
+
     # Chunk size for insertion optimisation
     records_per_transaction: int = 10_000
 
+    # Keep row count in the metadata table, so that `count()` need not scan
+    # the table. Small tables written to outside of `insert()` opt out.
+    stored_count: ClassVar[bool] = True
+
     # String containing table name.
     table_name: str
 
@@ -42,7 +113,14 @@ class TableBase(abc.ABC):
                 Reference to the `Database` instance to which table belongs.
         """
         self.db = db
-        self.create_table()
+        if not db.immutable:
+            self.create_table()
+
+        # Optional cache of records fetched by key
+        self.cache: Optional[LRUCache] = None
+        if db.cache_size and self.key_name is not None:
+            self.cache = LRUCache(db.cache_size)
+        self.clear_cache()
 
     def __init_subclass__(child_class: type, **kwargs: Any) -> None:
         """
@@ -64,13 +142,49 @@ class TableBase(abc.ABC):
             message = f"{child_class.__name__} missing required attributes: {attrs}"
             raise NotImplementedError(message)
 
-    def count(self) -> int:
+    def clear_cache(self) -> None:
+        """
+        Forget any data held in memory, eg. after database file is replaced.
+        """
+        if self.cache is not None:
+            self.cache.clear()
+
+    def count(self, exact: bool = False) -> int:
+        """
+        Number of rows in table.
+
+        Uses the row count stored by the last import or insert, if any,
+        rather than scanning the whole table.
+
+        Args:
+            exact:
+                Set to true to always count the rows.
+
+        Returns:
+            Number of rows.
+        """
+        if not exact and self.stored_count:
+            stored = self.db.metadata.get_value(self._count_key)
+            if stored is not None:
+                return int(stored)
+
         query = f"SELECT COUNT(*) FROM {self.table_name};"
         cursor = self.db.connection.execute(query)
         count = cursor.fetchone()[0]
         assert isinstance(count, int)
         return count
 
+    def create_indexes(self) -> None:
+        """
+        Create table's indexes, if not already present.
+
+        Indexes are not created with the table, as it is much faster to
+        bulk-load the data first and build the indexes afterwards.
+        """
+        for query in self.index_queries:
+            query = textwrap.dedent(query).strip()
+            self.db.connection.execute(query)
+
     def create_table(self) -> None:
         """
         Create database table only if requuired.
@@ -78,37 +192,150 @@ class TableBase(abc.ABC):
         query = textwrap.dedent(self.table_query).strip()
         self.db.connection.execute(query)
 
-    def insert(self, record: Record) -> int:
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Fetch a single record by its key.
+
+        Uses the table's cache, if enabled.
+
+        Args:
+            key:
+                Value of the table's key column, eg. 'tt0133093'.
+
+        Returns:
+            Record dataclass, or none if not found.
+        """
+        records = self._get_records([key])[key]
+        return records[0] if records else None
+
+    def get_many(self, keys: Iterable[str]) -> list[Record]:
+        """
+        Fetch every record matching any of the given keys.
+
+        Keys are looked up in chunks, using as many query parameters as
+        SQLite allows, rather than one query per key. Uses the table's
+        cache, if enabled, querying only for keys not found there.
+
+        Args:
+            keys:
+                Values of the table's key column. Duplicates are ignored.
+
+        Returns:
+            List of records, in the order of the given keys. Keys not
+            found are skipped.
+        """
+        found = self._get_records(keys)
+        return [record for records in found.values() for record in records]
+
+    def insert(self, record: Record) -> Optional[int]:
         """
         Insert a single record.
 
         Returns:
-            The id of the row inserted.
+            The id of the last row inserted, or None if the table has no
+            row ids, or no rows were added. Link tables ignore duplicates,
+            and some records have no rows, eg. a title without genres.
         """
-        fields = asdict(record)
-        cursor = self.db.connection.execute(self.insert_query, fields)
-        pk = cursor.lastrowid
-        assert isinstance(pk, int)
-        return pk
+        cursor = self.db.cursor()
+        changes = self.db.connection.total_changes
+        rows = list(self.rows(record))
+        for row in rows:
+            cursor.execute(self.insert_query, row)
+        self._forget(rows)
+        num_added = self.db.connection.total_changes - changes
+        self._add_to_count(num_added)
+        if not num_added or self.without_rowid:
+            return None
+        return cursor.lastrowid
 
-    def insert_many(self, records: Iterable[Record]) -> None:
+    def insert_many(self, records: Iterable[Record]) -> int:
+        """
+        Insert records in large transactions.
+
+        Returns:
+            Number of rows added, not counting rows ignored as duplicates.
+        """
         start = time.perf_counter()
         num_added = 0
         cursor = self.db.cursor()
-        for chunk in chunkify(records, self.records_per_transaction):
+        rows = (row for record in records for row in self.rows(record))
+        for chunk in chunkify(rows, self.records_per_transaction):
             chunk_start = time.perf_counter()
+            chunk = list(chunk)
+            changes = self.db.connection.total_changes
             cursor.execute('BEGIN;')
-            cursor.executemany(self.insert_query, records)
+            cursor.executemany(self.insert_query, chunk)
             cursor.execute('COMMIT;')
-            num_added += len(chunk)
+            self._forget(chunk)
+            chunk_added = self.db.connection.total_changes - changes
+            self._add_to_count(chunk_added)
+            num_added += chunk_added
             elapsed = time.perf_counter() - chunk_start
             logger.debug(
-                f"Added {len(chunk):,} records to database in "
+                f"Added {chunk_added:,} records to database in "
                 f"{elapsed:.3f} seconds ({num_added:,} total)"
             )
 
         total_time = time.perf_counter() - start
         logger.info(f"{num_added:,} records in {total_time:.3f} seconds")
+        return num_added
+
+    def iter_where(self, **conditions: Any) -> Iterator[Record]:
+        """
+        Stream records whose columns equal the given values.
+
+        For example, ``db.titles.iter_where(title_type='movie')``.
+
+        Args:
+            conditions:
+                Column names and values. Use `None` to match NULL.
+
+        Raises:
+            ValueError:
+                If a column name is not found in the table.
+
+        Returns:
+            Yields records, fetching rows from the database as required.
+        """
+        self._require_record_class()
+        columns = self._get_columns()
+        clauses = []
+        for name, value in conditions.items():
+            if name not in columns:
+                message = f"Column {name!r} not found in table {self.table_name!r}"
+                raise ValueError(message)
+            operator = 'IS NULL' if value is None else f'= :{name}'
+            clauses.append(f"{self.table_name}.{name} {operator}")
+
+        query = self.select_query
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        cursor = self.db.connection.execute(query + ';', conditions)
+        for row in cursor:
+            yield self.to_record(row)
+
+    def num_rows(self, record: Record) -> int:
+        """
+        Count the rows the table would store for a record, without storing
+        them, or anything else, eg. new genres.
+        """
+        return sum(1 for _ in self.rows(record))
+
+    def rows(self, record: Record) -> Iterator[dict[str, Any]]:
+        """
+        Convert record into query parameters for the table's insert query.
+
+        Most tables store one row per record, but link tables may yield
+        any number of rows, including none at all.
+
+        Args:
+            record:
+                Data record from one of the `readers` classes.
+
+        Returns:
+            Yields dictionary of query parameters per row.
+        """
+        yield asdict(record)
 
     def select(self, pk: int) -> dict[str, Any]:
         query = f"SELECT * FROM {self.table_name} WHERE rowid=?;"
@@ -116,11 +343,196 @@ class TableBase(abc.ABC):
         row = cursor.fetchone()
         return dict(row)
 
+    @property
+    def select_query(self) -> str:
+        """
+        SQL statement, without conditions, to select data for `to_record()`.
+        """
+        return f"SELECT * FROM {self.table_name}"
+
+    def to_record(self, row: sqlite3.Row) -> Record:
+        """
+        Convert row from `select_query` back into a record dataclass.
+
+        Args:
+            row:
+                Row with column names matching the fields of record class.
+
+        Returns:
+            Record dataclass.
+        """
+        record_class = self._require_record_class()
+        return record_class(**row)
+
+    @property
+    def without_rowid(self) -> bool:
+        """
+        Was the table created 'WITHOUT ROWID', so has no row ids?
+        """
+        return 'WITHOUT ROWID' in self.table_query
+
+    def update_count(self) -> int:
+        """
+        Count the table's rows, and store the result for `count()`.
+
+        Called after bulk-loading, or any other writes that bypass
+        `insert()` and `insert_many()`.
+
+        Returns:
+            Number of rows.
+        """
+        count = self.count(exact=True)
+        if self.stored_count:
+            self.db.metadata.set_value(self._count_key, str(count))
+        return count
+
+    def _add_to_count(self, num_added: int) -> None:
+        """
+        Add newly inserted rows to the stored row count, if there is one.
+        """
+        if not self.stored_count or not num_added:
+            return
+        stored = self.db.metadata.get_value(self._count_key)
+        if stored is not None:
+            self.db.metadata.set_value(self._count_key, str(int(stored) + num_added))
+
+    def _forget(self, rows: Iterable[dict[str, Any]]) -> None:
+        """
+        Drop cached records, or cached misses, of the keys of added rows.
+        """
+        if self.cache is None or self.key_name is None:
+            return
+        for row in rows:
+            self.cache.discard(row[self.key_name])
+
+    @property
+    def _count_key(self) -> str:
+        return f"count.{self.table_name}"
+
+    def _get_records(self, keys: Iterable[str]) -> dict[str, tuple[Record, ...]]:
+        """
+        Fetch records for given keys, from the cache or the database.
+
+        Returns:
+            Tuple of records for every key, empty if key not found.
+        """
+        key_name = self._require_key()
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, tuple[Record, ...]] = {}
+        missing = []
+        for key in keys:
+            records = None if self.cache is None else self.cache.get(key)
+            if records is None:
+                missing.append(key)
+            else:
+                found[key] = records
+
+        connection = self.db.connection
+        size = connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        for chunk in chunkify(missing, size):
+            chunk = list(chunk)
+            placeholders = ','.join('?' * len(chunk))
+            query = (
+                f"{self.select_query} "
+                f"WHERE {self.table_name}.{key_name} IN ({placeholders});"
+            )
+            fetched: dict[str, list[Record]] = {key: [] for key in chunk}
+            for row in connection.execute(query, chunk):
+                fetched[row[key_name]].append(self.to_record(row))
+            for key, records in fetched.items():
+                found[key] = tuple(records)
+                if self.cache is not None:
+                    self.cache.put(key, found[key])
+        return {key: found[key] for key in keys}
+
+    def _get_columns(self) -> list[str]:
+        """
+        Fetch names of table's columns.
+        """
+        cursor = self.db.connection.execute(
+            f"SELECT * FROM {self.table_name} LIMIT 0;")
+        return [column[0] for column in cursor.description]
+
+    def _require_key(self) -> str:
+        self._require_record_class()
+        if self.key_name is None:
+            message = f"{type(self).__name__} has no key column"
+            raise NotImplementedError(message)
+        return self.key_name
+
+    def _require_record_class(self) -> type[Record]:
+        if self.record_class is None:
+            message = f"{type(self).__name__} has no record class"
+            raise NotImplementedError(message)
+        return self.record_class
+
+
+class LookupMixin:
+    """
+    Shared functionality for small tables mapping names to integer ids.
+
+    Ids are cached in memory, and new names are added to the table the
+    first time they are seen.
+    """
+    db: database.Database
+    table_name: str
+
+    # Names to add when table is created, to give them stable ids.
+    initial_names: tuple[str, ...] = ()
+
+    # Few rows, but written to directly by `get_id()`.
+    stored_count = False
+
+    def clear_cache(self) -> None:
+        super().clear_cache()                   # type: ignore[misc]
+        self._ids: dict[str, int] = {}
+
+    def create_table(self) -> None:
+        super().create_table()                  # type: ignore[misc]
+        query = f"INSERT OR IGNORE INTO {self.table_name} (id, name) VALUES (?, ?);"
+        self.db.connection.executemany(
+            query, enumerate(self.initial_names, 1))
+
+    def get_id(self, name: str) -> int:
+        """
+        Fetch the id for the given name, adding it to the table if required.
+
+        Args:
+            name:
+                Name to find, eg. 'Sci-Fi'
+
+        Returns:
+            Integer id.
+        """
+        try:
+            return self._ids[name]
+        except KeyError:
+            pass
+
+        connection = self.db.connection
+        query = f"SELECT id FROM {self.table_name} WHERE name = ?;"
+        row = connection.execute(query, (name,)).fetchone()
+        if row is None:
+            query = f"INSERT INTO {self.table_name} (name) VALUES (?);"
+            pk = connection.execute(query, (name,)).lastrowid
+        else:
+            pk = row[0]
+        assert isinstance(pk, int)
+        self._ids[name] = pk
+        return pk
+
 
 class AKAs(TableBase):
     """
+    Alternate titles from 'title.akas.tsv', many for each title.
 
+    The ``types`` and ``attributes`` fields are not stored.
     """
+    index_queries = (
+        "CREATE INDEX IF NOT EXISTS akas_title_id ON akas (title_id);",
+    )
+    key_name = 'title_id'
+    record_class = TitleAkas
     insert_query = (
         "INSERT INTO akas VALUES (:title_id, :ordering, :title, :region, "
         ":language, :is_original_title);"
@@ -139,6 +551,81 @@ class AKAs(TableBase):
         );
     """
 
+    def to_record(self, row: sqlite3.Row) -> TitleAkas:
+        is_original_title = row['is_original_title']
+        return TitleAkas(
+            title_id=row['title_id'],
+            ordering=row['ordering'],
+            title=row['title'],
+            region=row['region'],
+            language=row['language'],
+            types=(),
+            attributes=None,
+            is_original_title=(
+                None if is_original_title is None else bool(is_original_title)),
+        )
+
+
+class DecadeRatings(TableBase):
+    """
+    Summary of ratings per decade and title type, see `Aggregates`.
+
+    Titles with no start year are not included. Every title is counted in
+    ``num_titles``, but only those rated in ``num_rated``, and so in the
+    average rating.
+    """
+    insert_query = (
+        "INSERT INTO decade_ratings VALUES (:decade, :title_type, "
+        ":num_titles, :num_rated, :average_rating, :num_votes);"
+    )
+    table_name = 'decade_ratings'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS decade_ratings (
+            decade              INTEGER,
+            title_type          TEXT,
+            num_titles          INTEGER,
+            num_rated           INTEGER,
+            average_rating      REAL,
+            num_votes           INTEGER,
+            PRIMARY KEY (decade, title_type)
+        ) WITHOUT ROWID;
+    """
+
+
+class Directors(TableBase):
+    """
+    Edge table between titles and their directors.
+
+    Filled from the ``directors`` field of 'title.crew.tsv'. The primary key
+    finds the directors of a title, the index a director's filmography.
+    """
+    index_queries = (
+        """
+        CREATE INDEX IF NOT EXISTS directors_nconst
+        ON directors (nconst, tconst);
+        """,
+    )
+    insert_query = (
+        "INSERT OR IGNORE INTO directors VALUES (:tconst, :nconst, :ordering);"
+    )
+    table_name = 'directors'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS directors (
+            tconst              TEXT,
+            nconst              TEXT,
+            ordering            INTEGER,
+            PRIMARY KEY (tconst, nconst)
+        ) WITHOUT ROWID;
+    """
+
+    def rows(self, record: TitleCrew) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        for ordering, nconst in enumerate(record.directors, 1):
+            yield {
+                'tconst': record.tconst,
+                'nconst': nconst,
+                'ordering': ordering,
+            }
+
 
 class Episodes(TableBase):
     """
@@ -148,6 +635,15 @@ class Episodes(TableBase):
     ``tconst``, and another for the whole show itself in ``parent``.
 
     """
+    index_queries = (
+        "CREATE INDEX IF NOT EXISTS episodes_tconst ON episodes (tconst);",
+        """
+        CREATE INDEX IF NOT EXISTS episodes_parent
+        ON episodes (parent, season, episode, tconst);
+        """,
+    )
+    key_name = 'tconst'
+    record_class = TitleEpisodes
     insert_query = (
         "INSERT INTO episodes VALUES (:tconst, :parent, :season, :episode);"
     )
@@ -161,16 +657,207 @@ class Episodes(TableBase):
         );
     """
 
+    def to_record(self, row: sqlite3.Row) -> TitleEpisodes:
+        return TitleEpisodes(
+            tconst=row['tconst'],
+            parent=row['parent'],
+            season=row['season'],
+            episode=row['episode'],
+        )
+
+    def for_series(
+        self,
+        parent: str,
+        season: Optional[int] = None,
+    ) -> list[TitleEpisodes]:
+        """
+        Fetch the episodes of a TV series, in order.
+
+        The ``episodes_parent`` index covers every column, so this is a
+        single range scan of the index, however long the series.
+
+        Args:
+            parent:
+                Identifier of the series, eg. 'tt0112178'
+            season:
+                Only fetch episodes from this season.
+
+        Returns:
+            Episodes ordered by season then episode number. Episodes with
+            no season or episode number come first.
+        """
+        query = f"{self.select_query} WHERE parent = :parent"
+        if season is not None:
+            query += " AND season = :season"
+        query += " ORDER BY season, episode;"
+        params = {'parent': parent, 'season': season}
+        return [self.to_record(row) for row in self.db.connection.execute(query, params)]
+
+
+class GenreYearCounts(TableBase):
+    """
+    Summary of the number of titles per genre, year, and title type.
+
+    See `Aggregates`. Titles with no start year are not included.
+    """
+    insert_query = (
+        "INSERT INTO genre_year_counts VALUES (:genre_id, :start_year, "
+        ":title_type, :num_titles);"
+    )
+    table_name = 'genre_year_counts'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS genre_year_counts (
+            genre_id            INTEGER,
+            start_year          INTEGER,
+            title_type          TEXT,
+            num_titles          INTEGER,
+            PRIMARY KEY (genre_id, start_year, title_type)
+        ) WITHOUT ROWID;
+    """
+
+
+class Genres(LookupMixin, TableBase):
+    """
+    Lookup table of genre names, eg. 'Sci-Fi'.
+
+    The ids of the genres in `GENRES` are fixed, one more than the bit
+    used for that genre in the `titles.genres` bitmask.
+    """
+    initial_names = GENRES
+    insert_query = "INSERT INTO genres VALUES (:id, :name);"
+    table_name = 'genres'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS genres (
+            id                  INTEGER PRIMARY KEY,
+            name                TEXT UNIQUE
+        );
+    """
+
+
+class KnownFor(TableBase):
+    """
+    Link table between people and the titles they are best known for.
+
+    Filled from the ``known_for_titles`` field of 'name.basics.tsv'.
+    """
+    index_queries = (
+        """
+        CREATE INDEX IF NOT EXISTS known_for_tconst
+        ON known_for (tconst, nconst);
+        """,
+    )
+    insert_query = (
+        "INSERT OR IGNORE INTO known_for VALUES (:nconst, :tconst, :ordering);"
+    )
+    table_name = 'known_for'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS known_for (
+            nconst              TEXT,
+            tconst              TEXT,
+            ordering            INTEGER,
+            PRIMARY KEY (nconst, tconst)
+        ) WITHOUT ROWID;
+    """
+
+    def rows(self, record: NameBasics) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        for ordering, tconst in enumerate(record.known_for_titles, 1):
+            yield {
+                'nconst': record.nconst,
+                'tconst': tconst,
+                'ordering': ordering,
+            }
+
+
+class Metadata(TableBase):
+    """
+    Key-value store of facts about the database itself.
+
+    For example, the time of the last import.
+    """
+    insert_query = "INSERT OR REPLACE INTO metadata VALUES (:key, :value);"
+    stored_count = False
+    table_name = 'metadata'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS metadata (
+            key                 TEXT PRIMARY KEY,
+            value               TEXT
+        ) WITHOUT ROWID;
+    """
+
+    def get_value(self, key: str) -> Optional[str]:
+        """
+        Fetch value for the given key.
+
+        Returns:
+            String value, or none if not found.
+        """
+        query = "SELECT value FROM metadata WHERE key = ?;"
+        row = self.db.connection.execute(query, (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_value(self, key: str, value: str) -> None:
+        """
+        Store value under the given key, replacing any previous value.
+        """
+        self.db.connection.execute(self.insert_query, {'key': key, 'value': value})
+
+
+class NameProfessions(TableBase):
+    """
+    Link table between people and their primary professions.
+
+    Filled from the ``primary_profession`` field of 'name.basics.tsv'.
+    """
+    index_queries = (
+        """
+        CREATE INDEX IF NOT EXISTS name_professions_profession
+        ON name_professions (profession_id, nconst);
+        """,
+    )
+    insert_query = (
+        "INSERT OR IGNORE INTO name_professions VALUES "
+        "(:nconst, :profession_id, :ordering);"
+    )
+    table_name = 'name_professions'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS name_professions (
+            nconst              TEXT,
+            profession_id       INTEGER,
+            ordering            INTEGER,
+            PRIMARY KEY (nconst, profession_id)
+        ) WITHOUT ROWID;
+    """
+
+    def num_rows(self, record: NameBasics) -> int:    # type: ignore[override]
+        return len(record.primary_profession)
+
+    def rows(self, record: NameBasics) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        professions = self.db.professions
+        for ordering, name in enumerate(record.primary_profession, 1):
+            yield {
+                'nconst': record.nconst,
+                'profession_id': professions.get_id(name),
+                'ordering': ordering,
+            }
+
 
 class Names(TableBase):
     """
     Database table containing people's basic data found in 'name.basics.tsv'.
 
+    Professions and known-for titles are stored in the `NameProfessions`
+    and `KnownFor` link tables.
+
     TODO:
         - Convert nconst into an integer, eg 'nm00000435' => 435
         - Declare nconst is primary key, then table 'WITHOUT ROWID'
 
     """
+    index_queries = (
+        "CREATE INDEX IF NOT EXISTS names_nconst ON names (nconst);",
+    )
+    key_name = 'nconst'
+    record_class = NameBasics
     insert_query = (
         "INSERT INTO names VALUES (:nconst, :primary_name, :birth_year, :death_year);"
     )
@@ -181,16 +868,69 @@ class Names(TableBase):
             primary_name        TEXT,
             birth_year          INTEGER,
             death_year          INTEGER
-            -- primary_profession?
-            -- known_for_titles?
         );
         """
 
+    @property
+    def select_query(self) -> str:
+        return textwrap.dedent("""
+            SELECT
+                names.*,
+                (
+                    SELECT group_concat(name) FROM (
+                        SELECT professions.name FROM name_professions
+                        JOIN professions
+                            ON professions.id = name_professions.profession_id
+                        WHERE name_professions.nconst = names.nconst
+                        ORDER BY name_professions.ordering
+                    )
+                ) AS primary_profession,
+                (
+                    SELECT group_concat(tconst) FROM (
+                        SELECT tconst FROM known_for
+                        WHERE known_for.nconst = names.nconst
+                        ORDER BY known_for.ordering
+                    )
+                ) AS known_for_titles
+            FROM names""").strip()
+
+    def to_record(self, row: sqlite3.Row) -> NameBasics:
+        return NameBasics(
+            nconst=row['nconst'],
+            primary_name=row['primary_name'],
+            birth_year=row['birth_year'],
+            death_year=row['death_year'],
+            primary_profession=to_tuple(row['primary_profession']),
+            known_for_titles=to_tuple(row['known_for_titles']),
+        )
+
+
+class PersonTitleCounts(TableBase):
+    """
+    Summary of the number of titles per person, see `Aggregates`.
+    """
+    insert_query = (
+        "INSERT INTO person_title_counts VALUES (:nconst, :num_titles);"
+    )
+    table_name = 'person_title_counts'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS person_title_counts (
+            nconst              TEXT PRIMARY KEY,
+            num_titles          INTEGER
+        ) WITHOUT ROWID;
+    """
+
 
 class Principals(TableBase):
     """
     Contains the principal cast/crew for titles.
     """
+    index_queries = (
+        "CREATE INDEX IF NOT EXISTS principals_tconst ON principals (tconst);",
+        "CREATE INDEX IF NOT EXISTS principals_nconst ON principals (nconst);",
+    )
+    key_name = 'tconst'
+    record_class = TitlePrincipals
     insert_query = (
         "INSERT INTO principals VALUES ("
         ":tconst, :ordering, :nconst, :category, :job, :characters);"
@@ -208,31 +948,330 @@ class Principals(TableBase):
     """
 
 
+class Professions(LookupMixin, TableBase):
+    """
+    Lookup table of profession names, eg. 'actor' or 'music_department'.
+    """
+    insert_query = "INSERT INTO professions VALUES (:id, :name);"
+    table_name = 'professions'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS professions (
+            id                  INTEGER PRIMARY KEY,
+            name                TEXT UNIQUE
+        );
+    """
+
+
 class Ratings(TableBase):
     """
     Contains the IMDb rating and votes information for titles.
 
+    Each title also has a Bayesian ``weighted_rating``, as used by IMDb's
+    Top 250. It pulls the ratings of titles with few votes towards the mean
+    rating of all titles, so that they can be ranked fairly against titles
+    with many votes:
+
+        weighted = (votes * rating + min_votes * mean) / (votes + min_votes)
+
     TODO:
         - Change 'average_rating' to an integer (ie. in tenths)
 
     """
+    index_queries = (
+        "CREATE INDEX IF NOT EXISTS ratings_tconst ON ratings (tconst);",
+        """
+        CREATE INDEX IF NOT EXISTS ratings_rating
+        ON ratings (average_rating, num_votes, tconst);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ratings_votes
+        ON ratings (num_votes, average_rating, tconst);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ratings_weighted
+        ON ratings (weighted_rating, num_votes, average_rating, tconst);
+        """,
+    )
+    key_name = 'tconst'
+    record_class = TitleRatings
     insert_query = (
-        "INSERT INTO ratings VALUES (:tconst, :average_rating, :num_votes);"
+        "INSERT INTO ratings VALUES (:tconst, :average_rating, :num_votes, "
+        ":weighted_rating);"
     )
     table_name = 'ratings'
     table_query = """
         CREATE TABLE IF NOT EXISTS ratings (
             tconst              TEXT,
             average_rating      REAL,
-            num_votes           INTEGER
+            num_votes           INTEGER,
+            weighted_rating     REAL
         );
     """
 
+    # Columns `top()` may order by, and the column used to break ties.
+    top_orders = {
+        'average_rating': 'num_votes',
+        'num_votes': 'average_rating',
+        'weighted_rating': 'num_votes',
+    }
+
+    # Votes needed before a title's own rating outweighs the mean rating.
+    weighted_min_votes: int = 25_000
+
+    # Reweigh ratings that change, using the values `update_weighted()` stored.
+    trigger_query = """
+        CREATE TRIGGER IF NOT EXISTS ratings_reweigh
+        AFTER UPDATE OF average_rating, num_votes ON ratings
+        BEGIN
+            UPDATE ratings SET weighted_rating = (
+                SELECT (NEW.num_votes * NEW.average_rating
+                        + CAST(votes.value AS INTEGER) * CAST(mean.value AS REAL))
+                    / (NEW.num_votes + CAST(votes.value AS INTEGER))
+                FROM metadata AS mean, metadata AS votes
+                WHERE mean.key = 'ratings.mean' AND votes.key = 'ratings.min_votes'
+            )
+            WHERE rowid = NEW.rowid;
+        END;
+    """
+
+    def clear_cache(self) -> None:
+        super().clear_cache()
+        self._weighting: Optional[tuple[float, int]] = None
+        self._weighting_loaded = False
+
+    def create_table(self) -> None:
+        super().create_table()
+        self.db.connection.execute(textwrap.dedent(self.trigger_query).strip())
+
+    def rows(self, record: TitleRatings) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        """
+        Add the weighted rating, using the mean stored by `update_weighted()`.
+
+        The weighted rating is left empty if it has never been run, as
+        when bulk-loading. Ratings updated later are reweighed by a trigger,
+        using the same stored mean.
+        """
+        row = asdict(record)
+        row['weighted_rating'] = None
+        weighting = self._get_weighting()
+        if weighting is not None:
+            mean, min_votes = weighting
+            row['weighted_rating'] = (
+                (record.num_votes * record.average_rating + min_votes * mean)
+                / (record.num_votes + min_votes)
+            )
+        yield row
+
+    @property
+    def select_query(self) -> str:
+        return (
+            "SELECT ratings.tconst, ratings.average_rating, ratings.num_votes "
+            "FROM ratings"
+        )
+
+    def to_record(self, row: sqlite3.Row) -> TitleRatings:
+        return TitleRatings(
+            tconst=row['tconst'],
+            average_rating=row['average_rating'],
+            num_votes=row['num_votes'],
+        )
+
+    def top(
+        self,
+        limit: int = 250,
+        order_by: str = 'average_rating',
+        *,
+        genre: Optional[str] = None,
+        min_votes: int = 0,
+        parent: Optional[str] = None,
+        title_type: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> list[TitleRatings]:
+        """
+        Fetch the highest ranked titles, eg. the top 250 movies.
+
+        Ratings are read in order from a covering index, stopping as soon
+        as enough have been found, so the whole table is never sorted. With
+        filters on the titles, SQLite may instead choose to sort just the
+        matching titles.
+
+        Args:
+            limit:
+                Maximum number of results.
+            order_by:
+                Column to rank by, one of the keys of `top_orders`.
+            genre:
+                Only include titles of this genre, eg. 'Sci-Fi'
+            min_votes:
+                Only include titles with at least this many votes.
+            parent:
+                Only include episodes of this TV series, eg. 'tt0112178'
+            title_type:
+                Only include titles of this type, eg. 'movie'
+            year:
+                Only include titles first released in this year.
+
+        Raises:
+            ValueError:
+                If order or genre are not known.
+
+        Returns:
+            Ratings records, best first.
+        """
+        if order_by not in self.top_orders:
+            raise ValueError(f"Cannot order ratings by {order_by!r}")
+        tie_break = self.top_orders[order_by]
+
+        clauses = ['ratings.num_votes >= :min_votes']
+        params: dict[str, Any] = {'limit': limit, 'min_votes': min_votes}
+        join = ''
+        if genre is not None or title_type is not None or year is not None:
+            join = 'JOIN titles ON titles.tconst = ratings.tconst '
+        if genre is not None:
+            if genre not in GENRES:
+                raise ValueError(f"Genre {genre!r} not found")
+            clauses.append('titles.genres & :genres')
+            params['genres'] = genres_mask((genre,))
+        if title_type is not None:
+            clauses.append('titles.title_type = :title_type')
+            params['title_type'] = title_type
+        if year is not None:
+            clauses.append('titles.start_year = :year')
+            params['year'] = year
+        if parent is not None:
+            clauses.append(
+                'ratings.tconst IN (SELECT tconst FROM episodes WHERE parent = :parent)')
+            params['parent'] = parent
+
+        query = (
+            f"{self.select_query} {join}"
+            f"WHERE {' AND '.join(clauses)} "
+            f"ORDER BY ratings.{order_by} DESC, ratings.{tie_break} DESC "
+            f"LIMIT :limit;"
+        )
+        return [self.to_record(row) for row in self.db.connection.execute(query, params)]
+
+    def update_weighted(self, min_votes: Optional[int] = None) -> float:
+        """
+        Recalculate the weighted rating of every title, in a single pass.
+
+        The mean rating and minimum votes are stored in the metadata table,
+        and used to weight ratings inserted or updated later. Run again to
+        account for any change in the mean, eg. after a large update. The
+        summary tables are not updated, see `Aggregates.build()`.
+
+        Args:
+            min_votes:
+                Defaults to `weighted_min_votes`.
+
+        Returns:
+            The mean rating of all titles.
+        """
+        start = time.perf_counter()
+        if min_votes is None:
+            min_votes = self.weighted_min_votes
+        connection = self.db.connection
+        mean = connection.execute("SELECT avg(average_rating) FROM ratings;").fetchone()[0]
+        if mean is None:
+            mean = 0.0
+
+        connection.execute('BEGIN;')
+        connection.execute(
+            "UPDATE ratings SET weighted_rating = "
+            "(num_votes * average_rating + :min_votes * :mean) "
+            "/ (num_votes + :min_votes);",
+            {'mean': mean, 'min_votes': min_votes},
+        )
+        self.db.metadata.set_value('ratings.mean', repr(mean))
+        self.db.metadata.set_value('ratings.min_votes', str(min_votes))
+        connection.execute('COMMIT;')
+        self.clear_cache()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Weighted ratings around mean of {mean:.3f} in {elapsed:.3f} seconds")
+        return float(mean)
+
+    def _get_weighting(self) -> Optional[tuple[float, int]]:
+        """
+        Fetch mean rating and minimum votes stored by `update_weighted()`.
+        """
+        if not self._weighting_loaded:
+            mean = self.db.metadata.get_value('ratings.mean')
+            min_votes = self.db.metadata.get_value('ratings.min_votes')
+            if mean is not None and min_votes is not None:
+                self._weighting = (float(mean), int(min_votes))
+            self._weighting_loaded = True
+        return self._weighting
+
+
+class SeriesRollups(TableBase):
+    """
+    Summary of the episodes of every TV series, see `Aggregates`.
+
+    The average rating is weighted by each episode's number of votes.
+    """
+    insert_query = (
+        "INSERT INTO series_rollups VALUES (:parent, :num_episodes, "
+        ":num_seasons, :first_year, :last_year, :average_rating, :num_votes);"
+    )
+    table_name = 'series_rollups'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS series_rollups (
+            parent              TEXT PRIMARY KEY,
+            num_episodes        INTEGER,
+            num_seasons         INTEGER,
+            first_year          INTEGER,
+            last_year           INTEGER,
+            average_rating      REAL,
+            num_votes           INTEGER
+        ) WITHOUT ROWID;
+    """
+
+
+class TitleGenres(TableBase):
+    """
+    Link table between titles and their genres.
+
+    Filled from the ``genres`` field of 'title.basics.tsv'. Index on genre
+    first, to find all the titles of a genre without scanning.
+    """
+    index_queries = (
+        """
+        CREATE INDEX IF NOT EXISTS title_genres_genre
+        ON title_genres (genre_id, tconst);
+        """,
+    )
+    insert_query = (
+        "INSERT OR IGNORE INTO title_genres VALUES (:tconst, :genre_id);"
+    )
+    table_name = 'title_genres'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS title_genres (
+            tconst              TEXT,
+            genre_id            INTEGER,
+            PRIMARY KEY (tconst, genre_id)
+        ) WITHOUT ROWID;
+    """
+
+    def num_rows(self, record: TitleBasics) -> int:    # type: ignore[override]
+        return len(record.genres)
+
+    def rows(self, record: TitleBasics) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        genres = self.db.genres
+        for name in record.genres:
+            yield {
+                'tconst': record.tconst,
+                'genre_id': genres.get_id(name),
+            }
+
 
 class Titles(TableBase):
     """
     Table holding the titles movies and shows from 'titles.basics.tsv'.
 
+    The title's genres are packed into the ``genres`` column as a bitmask,
+    see `genres_mask()`, and also stored in the `TitleGenres` link table.
+
     TODO:
         - Convert 'tconst' to an integer, eg. 'tt0000992' => 992
         - Make 'title_type' an integer key in fixed enums
@@ -241,9 +1280,19 @@ class Titles(TableBase):
         - Declare tconst as primary key, then table 'WITHOUT ROWID'
 
     """
+    index_queries = (
+        "CREATE INDEX IF NOT EXISTS titles_tconst ON titles (tconst);",
+        """
+        CREATE INDEX IF NOT EXISTS titles_type_year
+        ON titles (title_type, start_year);
+        """,
+    )
+    key_name = 'tconst'
+    record_class = TitleBasics
     insert_query = (
         "INSERT INTO titles values (:tconst, :title_type, :primary_title, "
-        ":original_title, :is_adult, :start_year, :end_year, :runtime_minutes);"
+        ":original_title, :is_adult, :start_year, :end_year, :runtime_minutes, "
+        ":genres);"
     )
     table_name = 'titles'
     table_query = """
@@ -255,7 +1304,60 @@ class Titles(TableBase):
             is_adult            BOOL,
             start_year          INTEGER,
             end_year            INTEGER,
-            runtime_minutes     INTEGER
-            -- genres?
+            runtime_minutes     INTEGER,
+            genres              INTEGER
         );
         """
+
+    def rows(self, record: TitleBasics) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        row = asdict(record)
+        row['genres'] = genres_mask(record.genres)
+        yield row
+
+    def to_record(self, row: sqlite3.Row) -> TitleBasics:
+        return TitleBasics(
+            tconst=row['tconst'],
+            title_type=row['title_type'],
+            primary_title=row['primary_title'],
+            original_title=row['original_title'],
+            is_adult=bool(row['is_adult']),
+            start_year=row['start_year'],
+            end_year=row['end_year'],
+            runtime_minutes=row['runtime_minutes'],
+            genres=genres_from_mask(row['genres'] or 0),
+        )
+
+
+class Writers(TableBase):
+    """
+    Edge table between titles and their writers.
+
+    Filled from the ``writers`` field of 'title.crew.tsv'. The primary key
+    finds the writers of a title, the index a writer's filmography.
+    """
+    index_queries = (
+        """
+        CREATE INDEX IF NOT EXISTS writers_nconst
+        ON writers (nconst, tconst);
+        """,
+    )
+    insert_query = (
+        "INSERT OR IGNORE INTO writers VALUES (:tconst, :nconst, :ordering);"
+    )
+    table_name = 'writers'
+    table_query = """
+        CREATE TABLE IF NOT EXISTS writers (
+            tconst              TEXT,
+            nconst              TEXT,
+            ordering            INTEGER,
+            PRIMARY KEY (tconst, nconst)
+        ) WITHOUT ROWID;
+    """
+
+    def rows(self, record: TitleCrew) -> Iterator[dict[str, Any]]:    # type: ignore[override]
+        for ordering, nconst in enumerate(record.writers, 1):
+            yield {
+                'tconst': record.tconst,
+                'nconst': nconst,
+                'ordering': ordering,
+            }
@@ -1,4 +1,7 @@
 
+import gzip
+from pathlib import Path
+
 from cine import readers
 
 
@@ -83,6 +86,8 @@ title_episodes = readers.TitleEpisodes(
     episode=5,
 )
 
+title_episodes_strings = ['tt0078459', 'tt0159876', '6', '5']
+
 title_principals = readers.TitlePrincipals(
     tconst='tt0000109',
     ordering=4,
@@ -107,3 +112,57 @@ title_ratings = readers.TitleRatings(
 )
 
 title_ratings_strings = ['tt0000001', '4.5', '466']
+
+
+# Header row and data rows for each data file, see `create_data_files()`.
+data_files = {
+    'name.basics.tsv.gz': [
+        ['nconst', 'primaryName', 'birthYear', 'deathYear',
+         'primaryProfession', 'knownForTitles'],
+        name_basics_strings,
+        name_basics_strings2,
+    ],
+    'title.akas.tsv.gz': [
+        ['titleId', 'ordering', 'title', 'region', 'language', 'types',
+         'attributes', 'isOriginalTitle'],
+        title_akas_strings,
+        ['tt0133093', '2', 'Mátrix', 'HU', '\\N', 'imdbDisplay', '\\N', '0'],
+    ],
+    'title.basics.tsv.gz': [
+        ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult',
+         'startYear', 'endYear', 'runtimeMinutes', 'genres'],
+        title_basics_strings,
+        ['tt0133093', 'movie', 'The Matrix', 'The Matrix', '0', '1999',
+         '\\N', '136', 'Action,Sci-Fi'],
+        ['tt0000001', 'short', 'Carmencita', 'Carmencita', '0', '1894',
+         '\\N', '1', 'Documentary,Short'],
+    ],
+    'title.crew.tsv.gz': [
+        ['tconst', 'directors', 'writers'],
+        title_crew_strings,
+    ],
+    'title.episode.tsv.gz': [
+        ['tconst', 'parentTconst', 'seasonNumber', 'episodeNumber'],
+        title_episodes_strings,
+    ],
+    'title.principals.tsv.gz': [
+        ['tconst', 'ordering', 'nconst', 'category', 'job', 'characters'],
+        title_principals_strings,
+        title_principals_strings2,
+    ],
+    'title.ratings.tsv.gz': [
+        ['tconst', 'averageRating', 'numVotes'],
+        title_ratings_strings,
+        ['tt0133093', '8.7', '2100000'],
+    ],
+}
+
+
+def create_data_files(folder: Path) -> None:
+    """
+    Write the rows in `data_files` into gzipped TSV files in given folder.
+    """
+    for name, rows in data_files.items():
+        with gzip.open(folder / name, 'wt', encoding='utf-8') as fp:
+            for row in rows:
+                fp.write('\t'.join(row) + '\n')
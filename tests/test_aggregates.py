@@ -0,0 +1,106 @@
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine.database import Database
+from cine.aggregates import SeriesSummary
+from cine.readers import TitleEpisodes
+from cine.importer import Importer
+
+from .data import create_data_files
+
+
+class AggregatesTest(TestCase):
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+        create_data_files(self.folder)
+        self.db = Database()
+        Importer(self.folder, self.db).run()
+        self.counts = self.db.aggregates.build()
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def fetch(self, query: str) -> list[tuple]:
+        return [tuple(row) for row in self.db.connection.execute(query)]
+
+    def test_counts(self) -> None:
+        expected = {
+            'decade_ratings': 3,
+            'genre_year_counts': 7,
+            'person_title_counts': 2,
+            'series_rollups': 1,
+        }
+        self.assertEqual(self.counts, expected)
+
+    def test_genre_year_counts(self) -> None:
+        query = (
+            "SELECT genres.name, start_year, title_type, num_titles "
+            "FROM genre_year_counts "
+            "JOIN genres ON genres.id = genre_year_counts.genre_id "
+            "ORDER BY start_year, genres.name;"
+        )
+        expected = [
+            ('Documentary', 1894, 'short', 1),
+            ('Short', 1894, 'short', 1),
+            ('Crime', 1909, 'short', 1),
+            ('Drama', 1909, 'short', 1),
+            ('Short', 1909, 'short', 1),
+            ('Action', 1999, 'movie', 1),
+            ('Sci-Fi', 1999, 'movie', 1),
+        ]
+        self.assertEqual(self.fetch(query), expected)
+
+    def test_decade_ratings(self) -> None:
+        query = "SELECT * FROM decade_ratings ORDER BY decade;"
+        expected = [
+            (1890, 'short', 1, 1, 4.5, 466),
+            (1900, 'short', 1, 0, None, 0),
+            (1990, 'movie', 1, 1, 8.7, 2_100_000),
+        ]
+        self.assertEqual(self.fetch(query), expected)
+
+    def test_person_title_counts(self) -> None:
+        query = "SELECT * FROM person_title_counts ORDER BY nconst;"
+        expected = [('nm0005658', 1), ('nm0106151', 1)]
+        self.assertEqual(self.fetch(query), expected)
+
+    def test_series(self) -> None:
+        self.db.episodes.insert_many([
+            TitleEpisodes('tt0133093', 'tt0159876', 1, 1),
+            TitleEpisodes('tt0000001', 'tt0159876', 2, 1),
+        ])
+        self.db.aggregates.build()
+        summary = self.db.aggregates.series('tt0159876')
+        assert summary is not None
+        self.assertEqual(summary.num_episodes, 3)
+        self.assertEqual(summary.num_seasons, 3)
+        self.assertEqual(summary.first_year, 1894)
+        self.assertEqual(summary.last_year, 1999)
+        self.assertEqual(summary.num_votes, 2_100_466)
+        expected = (8.7 * 2_100_000 + 4.5 * 466) / 2_100_466
+        self.assertAlmostEqual(summary.average_rating, expected)
+
+    def test_series_unrated(self) -> None:
+        expected = SeriesSummary('tt0159876', 1, 1, None, None, None, 0)
+        self.assertEqual(self.db.aggregates.series('tt0159876'), expected)
+        self.assertIsNone(self.db.aggregates.series('tt0078459'))
+
+    def test_rebuild_replaces(self) -> None:
+        self.assertEqual(self.db.aggregates.build(), self.counts)
+        self.assertEqual(self.db.decade_ratings.count(), 3)
+
+    def test_is_fresh(self) -> None:
+        aggregates = self.db.aggregates
+        self.assertTrue(aggregates.is_fresh())
+
+        # Stale after another import
+        self.db.metadata.set_value('import', 'later')
+        self.assertFalse(aggregates.is_fresh())
+        aggregates.build()
+        self.assertTrue(aggregates.is_fresh())
+
+    def test_never_imported(self) -> None:
+        self.assertFalse(Database().aggregates.is_fresh())
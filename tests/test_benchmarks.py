@@ -0,0 +1,251 @@
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine import readers
+from cine.benchmarks.cases import STAGES, Dataset, build_cases
+from cine.benchmarks.core import (
+    Case,
+    History,
+    Measurement,
+    Result,
+    Run,
+    find_regressions,
+    machine_info,
+    run_cases,
+)
+from cine.benchmarks.memory import BUILDERS, MISSING_INT, ColumnsBuilder, compare
+from cine.benchmarks.queries import QUERIES, make_workload, percentile, replay, run
+from cine.database import Database
+from cine.importer import Importer
+from cine.synthetic import generate
+
+
+def make_run(records_per_second: float, bytes_per_record: float) -> Run:
+    result = Result('read.TitleBasics', 1000, 1.0, records_per_second, bytes_per_record)
+    return Run('synthetic', {'node': 'test'}, {result.name: result})
+
+
+class BuildCasesTest(TestCase):
+    dataset: Dataset
+    temp: TemporaryDirectory
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.temp = TemporaryDirectory()
+        folder = Path(cls.temp.name)
+        generate(folder, scale=0.002, seed=1)
+        cls.dataset = Dataset(folder)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp.cleanup()
+        super().tearDownClass()
+
+    def test_every_stage(self) -> None:
+        cases = build_cases(self.dataset)
+        stages = {case.name.split('.')[0] for case in cases}
+        self.assertEqual(stages, set(STAGES))
+        names = [case.name for case in cases]
+        self.assertIn('read.TitleBasics', names)
+        self.assertIn('insert.titles+title_genres', names)
+        self.assertIn('index.principals', names)
+        self.assertIn('query.ratings.top', names)
+        self.assertIn('query.fuzzy_search.titles', names)
+
+    def test_run(self) -> None:
+        cases = build_cases(self.dataset)
+        results = run_cases(cases, repeat=1)
+        self.assertEqual(list(results), [case.name for case in cases])
+        for result in results.values():
+            self.assertGreater(result.records, 0, result.name)
+            self.assertGreater(result.records_per_second, 0, result.name)
+
+        # Sizes of data read and written are known
+        self.assertGreater(results['read.TitleRatings'].bytes_per_record, 0)
+        self.assertGreater(results['convert.TitleRatings'].bytes_per_record, 0)
+        self.assertGreater(results['insert.principals'].bytes_per_record, 0)
+        self.assertGreater(results['index.principals'].bytes_per_record, 0)
+
+    def test_stages(self) -> None:
+        cases = build_cases(self.dataset, stages=('query',))
+        self.assertTrue(cases)
+        self.assertTrue(all(case.name.startswith('query.') for case in cases))
+
+
+class FindRegressionsTest(TestCase):
+    def test_faster(self) -> None:
+        regressions = find_regressions(make_run(1000, 50), make_run(2000, 40), 10)
+        self.assertEqual(regressions, [])
+
+    def test_within_threshold(self) -> None:
+        regressions = find_regressions(make_run(1000, 50), make_run(950, 52), 10)
+        self.assertEqual(regressions, [])
+
+    def test_slower(self) -> None:
+        regressions = find_regressions(make_run(1000, 50), make_run(800, 50), 10)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('20.0% slower', regressions[0])
+
+    def test_larger(self) -> None:
+        regressions = find_regressions(make_run(1000, 50), make_run(1000, 60), 10)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('20.0% larger', regressions[0])
+
+    def test_new_case(self) -> None:
+        current = make_run(1000, 50)
+        result = Result('query.titles.get', 10, 1.0, 10, 0)
+        current.results[result.name] = result
+        self.assertEqual(find_regressions(make_run(1000, 50), current, 10), [])
+
+
+class HistoryTest(TestCase):
+    def test_round_trip(self) -> None:
+        with TemporaryDirectory() as temp:
+            path = Path(temp) / 'history.json'
+            history = History(path)
+            self.assertEqual(history.runs, [])
+            saved = make_run(1000, 50)
+            history.append(saved)
+            history.save()
+
+            loaded = History(path)
+            self.assertEqual(len(loaded.runs), 1)
+            self.assertEqual(loaded.runs[0].to_dict(), saved.to_dict())
+
+    def test_previous(self) -> None:
+        history = History(Path('does-not-exist.json'))
+        first = make_run(1000, 50)
+        other = Run('real', {'node': 'test'})
+        elsewhere = Run('synthetic', {'node': 'other'})
+        for each in (first, other, elsewhere):
+            history.append(each)
+
+        latest = make_run(900, 50)
+        self.assertIs(history.previous(latest), first)
+        history.append(latest)
+        self.assertIs(history.previous(latest), first)
+        self.assertIsNone(history.previous(Run('unknown', {'node': 'test'})))
+
+
+class RunCasesTest(TestCase):
+    def test_best_of_repeats(self) -> None:
+        times = iter([3.0, 1.0, 2.0])
+        case = Case('fake', lambda: Measurement(100, next(times), 400))
+        results = run_cases([case], repeat=3)
+        result = results['fake']
+        self.assertEqual(result.seconds, 1.0)
+        self.assertEqual(result.records_per_second, 100.0)
+        self.assertEqual(result.bytes_per_record, 4.0)
+
+    def test_machine_info(self) -> None:
+        info = machine_info()
+        self.assertIn('cpu_count', info)
+        self.assertIn('node', info)
+        self.assertIn('sqlite', info)
+
+
+class MemoryTest(TestCase):
+    folder: Path
+    temp: TemporaryDirectory
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.temp = TemporaryDirectory()
+        cls.folder = Path(cls.temp.name)
+        generate(cls.folder, scale=0.002, seed=1)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp.cleanup()
+        super().tearDownClass()
+
+    def test_compare(self) -> None:
+        results = compare(self.folder, [readers.TitleRatings, readers.TitleBasics])
+        self.assertEqual(len(results), 2 * len(BUILDERS))
+        by_name = {(r.record_class, r.representation): r for r in results}
+        for result in results:
+            self.assertGreater(result.records, 0)
+            self.assertGreater(result.bytes_per_record, 0)
+            self.assertGreaterEqual(result.peak_bytes, result.num_bytes)
+
+        # Packed columns beat an object per record
+        columns = by_name['TitleRatings', 'columns']
+        tuples = by_name['TitleRatings', 'tuple']
+        self.assertLess(columns.bytes_per_record, tuples.bytes_per_record)
+
+    def test_limit(self) -> None:
+        results = compare(self.folder, [readers.TitleAkas], ['slots'], limit=10)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].records, 10)
+
+    def test_columns(self) -> None:
+        builder = ColumnsBuilder(readers.TitleEpisodes)
+        records = [
+            readers.TitleEpisodes('tt0000002', 'tt0000001', 1, 2),
+            readers.TitleEpisodes('tt0000003', 'tt0000001', None, None),
+        ]
+        columns = builder.build(records)
+        self.assertEqual(columns['tconst'], ['tt0000002', 'tt0000003'])
+        self.assertEqual(columns['season'].typecode, 'q')
+        self.assertEqual(list(columns['season']), [1, MISSING_INT])
+
+
+class QueriesTest(TestCase):
+    path: Path
+    temp: TemporaryDirectory
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.temp = TemporaryDirectory()
+        folder = Path(cls.temp.name)
+        generate(folder, scale=0.002, seed=1)
+        cls.path = folder / 'imdb.db'
+        Importer.build(folder, cls.path, search=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp.cleanup()
+        super().tearDownClass()
+
+    def workload(self, count: int = 200) -> list[tuple[str, object]]:
+        db = Database(self.path, immutable=True)
+        try:
+            return make_workload(db, count, seed=3)
+        finally:
+            db.connection.close()
+
+    def test_make_workload(self) -> None:
+        workload = self.workload()
+        self.assertEqual(len(workload), 200)
+        self.assertEqual({name for name, _ in workload}, set(QUERIES))
+        self.assertEqual(workload, self.workload())
+
+    def test_replay(self) -> None:
+        results = replay(self.path, self.workload(), threads=2, warm=True)
+        self.assertEqual([r.query for r in results], [*QUERIES, 'all'])
+        total = results[-1]
+        self.assertEqual(total.count, 200)
+        self.assertEqual(total.cache, 'warm')
+        self.assertEqual(total.threads, 2)
+        self.assertGreater(total.qps, 0)
+        for result in results:
+            self.assertLessEqual(result.p50, result.p95)
+            self.assertLessEqual(result.p95, result.p99)
+
+    def test_run(self) -> None:
+        results = run(self.path, self.workload(20), thread_counts=(1, 2))
+        totals = [(r.threads, r.cache) for r in results if r.query == 'all']
+        self.assertEqual(totals, [(1, 'cold'), (1, 'warm'), (2, 'cold'), (2, 'warm')])
+
+    def test_percentile(self) -> None:
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([7.0], 99), 7.0)
+        self.assertEqual(percentile([], 50), 0.0)
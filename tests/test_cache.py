@@ -0,0 +1,50 @@
+
+from unittest import TestCase
+
+from cine.cache import LRUCache
+
+
+class LRUCacheTest(TestCase):
+    def test_get_and_put(self) -> None:
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', 'default'), 'default')
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 2)
+        self.assertEqual(cache.stats.hit_rate, 1 / 3)
+
+    def test_eviction(self) -> None:
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        # Least recently used evicted
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_clear(self) -> None:
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats.clears, 1)
+
+    def test_discard(self) -> None:
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.discard('a')
+        cache.discard('b')
+        self.assertNotIn('a', cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_maxsize_invalid(self) -> None:
+        message = r"^Cache size must be at least one, given 0$"
+        with self.assertRaisesRegex(ValueError, message):
+            LRUCache(0)
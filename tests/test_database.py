@@ -1,11 +1,32 @@
 
+from dataclasses import replace
+from pathlib import Path
 import sqlite3
+from tempfile import TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
 
 from cine.database import Database
-from cine.tables import AKAs, Episodes, Names, Principals, Ratings, Titles
+from cine.importer import Importer
+from cine.readers import TitleEpisodes, TitleRatings
+from cine.tables import (
+    AKAs,
+    Directors,
+    Episodes,
+    Genres,
+    KnownFor,
+    NameProfessions,
+    Names,
+    Principals,
+    Professions,
+    Ratings,
+    TitleGenres,
+    Titles,
+    Writers,
+)
 
 from . import data as samples
+from .data import create_data_files
 
 
 class DBTestCase(TestCase):
@@ -27,11 +48,54 @@ class DatabaseTest(DBTestCase):
 
         # Tables
         self.assertIsInstance(self.db.akas, AKAs)
+        self.assertIsInstance(self.db.directors, Directors)
         self.assertIsInstance(self.db.episodes, Episodes)
+        self.assertIsInstance(self.db.genres, Genres)
+        self.assertIsInstance(self.db.known_for, KnownFor)
+        self.assertIsInstance(self.db.name_professions, NameProfessions)
         self.assertIsInstance(self.db.names, Names)
         self.assertIsInstance(self.db.principals, Principals)
+        self.assertIsInstance(self.db.professions, Professions)
         self.assertIsInstance(self.db.ratings, Ratings)
+        self.assertIsInstance(self.db.title_genres, TitleGenres)
         self.assertIsInstance(self.db.titles, Titles)
+        self.assertIsInstance(self.db.writers, Writers)
+
+    def test_backup(self) -> None:
+        db = Database()
+        db.names.insert(samples.name_basics)
+        calls = []
+        with TemporaryDirectory() as folder:
+            path = Path(folder) / 'backup.db'
+            result = db.backup(path, pages=1, progress=lambda *args: calls.append(args))
+            self.assertIsNone(result)
+            copy = Database(path)
+            self.assertEqual(copy.names.count(), 1)
+            copy.connection.close()
+
+        # One call per page
+        page_size = db.connection.execute('PRAGMA page_size;').fetchone()[0]
+        total = calls[-1][1]
+        self.assertEqual(len(calls), total)
+        self.assertEqual(calls[0], (1, total, page_size))
+        self.assertEqual(calls[-1], (total, total, total * page_size))
+
+    def test_backup_in_memory(self) -> None:
+        db = Database()
+        db.names.insert(samples.name_basics)
+        copy = db.backup()
+        assert copy is not None
+        self.assertEqual(copy.names.count(), 1)
+        self.assertEqual(copy.genres.get_id('Sci-Fi'), 22)
+
+    def test_backup_max_rate(self) -> None:
+        db = Database()
+        page_size = db.connection.execute('PRAGMA page_size;').fetchone()[0]
+        with patch('cine.database.time.sleep') as sleep:
+            db.backup(pages=1, max_rate=page_size)
+        # About one second per page
+        self.assertGreater(sleep.call_count, 1)
+        self.assertAlmostEqual(sleep.call_args_list[0].args[0], 1.0, places=1)
 
     def test_cursor(self) -> None:
         self.assertIsInstance(self.db.cursor(), sqlite3.Cursor)
@@ -39,11 +103,65 @@ class DatabaseTest(DBTestCase):
     def test_get_table_names(self) -> None:
         names = self.db.get_table_names()
         expected = [
-            'akas', 'episodes', 'names', 'principals', 'ratings', 'titles',
+            'akas', 'decade_ratings', 'directors', 'episodes',
+            'genre_year_counts', 'genres', 'known_for', 'metadata',
+            'name_professions', 'names', 'person_title_counts', 'principals',
+            'professions', 'ratings', 'series_rollups', 'title_genres',
+            'titles', 'writers',
         ]
         self.assertEqual(names, expected)
 
 
+class DatabaseImmutableTest(TestCase):
+    """
+    Read-only serving mode.
+    """
+    def test_immutable(self) -> None:
+        with TemporaryDirectory() as folder:
+            folder = Path(folder)
+            create_data_files(folder)
+            path = folder / 'imdb.db'
+            Importer.build(folder, path)
+
+            db = Database(path, immutable=True, mmap_size=1 << 20)
+            self.assertEqual(db.titles.count(), 3)
+            self.assertEqual(db.genres.get_id('Sci-Fi'), 22)
+            mmap_size = db.connection.execute('PRAGMA mmap_size;').fetchone()[0]
+            self.assertEqual(mmap_size, 1 << 20)
+            with self.assertRaises(sqlite3.OperationalError):
+                db.names.insert(samples.name_basics)
+            db.connection.close()
+
+    def test_immutable_skips_ddl(self) -> None:
+        with TemporaryDirectory() as folder:
+            path = Path(folder) / 'empty.db'
+            sqlite3.connect(path).close()
+            db = Database(path, immutable=True)
+            self.assertEqual(db.get_table_names(), [])
+            db.connection.close()
+
+    def test_immutable_refuses_wal(self) -> None:
+        with TemporaryDirectory() as folder:
+            path = Path(folder) / 'imdb.db'
+            writer = Database(path)
+            writer.connection.execute('PRAGMA wal_autocheckpoint = 0;')
+            writer.names.insert(samples.name_basics)
+            message = r"^Immutable database has a write-ahead log: .*imdb\.db-wal$"
+            with self.assertRaisesRegex(ValueError, message):
+                Database(path, immutable=True)
+
+            # Log is checkpointed and removed when the writer closes
+            writer.connection.close()
+            db = Database(path, immutable=True)
+            self.assertEqual(db.names.count(exact=True), 1)
+            db.connection.close()
+
+    def test_immutable_requires_path(self) -> None:
+        message = r"^Immutable database requires a path$"
+        with self.assertRaisesRegex(ValueError, message):
+            Database(immutable=True)
+
+
 # Tables ###################################################
 
 class AKAsTest(DBTestCase):
@@ -69,6 +187,15 @@ class AKAsTest(DBTestCase):
         self.assertEqual(data, expected)
 
 
+class DirectorsTest(DBTestCase):
+    def test_directors_rows(self) -> None:
+        rows = list(self.db.directors.rows(samples.title_crew))
+        expected = [
+            {'tconst': 'tt0001004', 'nconst': 'nm0674600', 'ordering': 1},
+        ]
+        self.assertEqual(rows, expected)
+
+
 class EpisodesTest(DBTestCase):
     def test_episodes_insert_and_select(self) -> None:
         # Insert
@@ -89,6 +216,82 @@ class EpisodesTest(DBTestCase):
         }
         self.assertEqual(data, expected)
 
+    def test_for_series(self) -> None:
+        episodes = self.db.episodes
+        episodes.insert_many([
+            TitleEpisodes('tt0000003', 'tt0000010', 2, 1),
+            TitleEpisodes('tt0000002', 'tt0000010', 1, 2),
+            TitleEpisodes('tt0000001', 'tt0000010', 1, 1),
+            TitleEpisodes('tt0000004', 'tt0000009', 1, 1),
+        ])
+        episodes.create_indexes()
+        found = episodes.for_series('tt0000010')
+        self.assertEqual(
+            [record.tconst for record in found],
+            ['tt0000001', 'tt0000002', 'tt0000003'],
+        )
+        found = episodes.for_series('tt0000010', season=2)
+        self.assertEqual(found, [TitleEpisodes('tt0000003', 'tt0000010', 2, 1)])
+
+        query = "SELECT * FROM episodes WHERE parent = ? ORDER BY season, episode;"
+        plan = self.db.connection.execute(
+            'EXPLAIN QUERY PLAN ' + query, ('tt0000010',)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        self.assertIn('USING COVERING INDEX episodes_parent', details)
+        self.assertNotIn('TEMP B-TREE', details)
+
+
+class GenresTest(DBTestCase):
+    def test_fixed_ids(self) -> None:
+        genres = self.db.genres
+        self.assertEqual(genres.count(), 28)
+        self.assertEqual(genres.get_id('Action'), 1)
+        self.assertEqual(genres.get_id('Sci-Fi'), 22)
+
+    def test_new_genre(self) -> None:
+        genres = self.db.genres
+        pk = genres.get_id('Cyberpunk')
+        self.assertGreater(pk, 28)
+        self.assertEqual(genres.get_id('Cyberpunk'), pk)
+        self.assertEqual(genres.select(pk), {'id': pk, 'name': 'Cyberpunk'})
+
+
+class KnownForTest(DBTestCase):
+    def test_known_for_rows(self) -> None:
+        rows = list(self.db.known_for.rows(samples.name_basics))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            rows[0], {'nconst': 'nm0000999', 'tconst': 'tt0076538', 'ordering': 1})
+        self.assertEqual(
+            rows[3], {'nconst': 'nm0000999', 'tconst': 'tt0050933', 'ordering': 4})
+
+
+class MetadataTest(DBTestCase):
+    def test_get_and_set_value(self) -> None:
+        metadata = self.db.metadata
+        self.assertIsNone(metadata.get_value('banana'))
+        metadata.set_value('banana', 'yellow')
+        metadata.set_value('banana', 'brown')
+        self.assertEqual(metadata.get_value('banana'), 'brown')
+        self.assertEqual(metadata.count(), 1)
+
+
+class NameProfessionsTest(DBTestCase):
+    def test_name_professions_rows(self) -> None:
+        rows = list(self.db.name_professions.rows(samples.name_basics))
+        professions = self.db.professions
+        expected = [
+            {
+                'nconst': 'nm0000999',
+                'profession_id': professions.get_id(name),
+                'ordering': ordering,
+            }
+            for ordering, name in enumerate(
+                ('actor', 'soundtrack', 'miscellaneous'), 1)
+        ]
+        self.assertEqual(rows, expected)
+        self.assertEqual(professions.count(), 3)
+
 
 class NamesTest(DBTestCase):
     """
@@ -153,9 +356,63 @@ class RatingsTest(DBTestCase):
             'tconst': 'tt0000001',
             'average_rating': 4.5,
             'num_votes': 466,
+            'weighted_rating': None,
         }
         self.assertEqual(data, expected)
 
+    def test_weighted_rating(self) -> None:
+        db = Database()
+        ratings = db.ratings
+        ratings.insert(TitleRatings('tt0000001', 9.0, 100))
+        ratings.insert(TitleRatings('tt0000002', 5.0, 300))
+        mean = ratings.update_weighted(min_votes=100)
+        self.assertEqual(mean, 7.0)
+
+        query = "SELECT weighted_rating FROM ratings ORDER BY tconst;"
+        weighted = [row[0] for row in db.connection.execute(query)]
+        self.assertEqual(weighted, [8.0, 5.5])
+
+        # Later inserts are weighted using the stored mean
+        ratings.insert(TitleRatings('tt0000003', 10.0, 300))
+        data = ratings.select(3)
+        self.assertEqual(data['weighted_rating'], 9.25)
+
+        # Updated ratings are reweighed, by trigger, with the stored mean
+        db.connection.execute(
+            "UPDATE ratings SET average_rating = 8.0, num_votes = 900 "
+            "WHERE tconst = 'tt0000002';")
+        self.assertEqual(ratings.select(2)['weighted_rating'], 7.9)
+
+    def test_weighted_rating_not_updated(self) -> None:
+        # Left empty until update_weighted() has stored a mean
+        db = Database()
+        db.ratings.insert(TitleRatings('tt0000001', 9.0, 100))
+        db.connection.execute("UPDATE ratings SET num_votes = 200;")
+        self.assertIsNone(db.ratings.select(1)['weighted_rating'])
+
+
+class TitleGenresTest(DBTestCase):
+    def test_title_genres_insert(self) -> None:
+        title_genres = self.db.title_genres
+        self.assertIsNone(title_genres.insert(samples.title_basics))
+        query = "SELECT * FROM title_genres ORDER BY genre_id;"
+        rows = [dict(row) for row in self.db.connection.execute(query)]
+        expected = [
+            {'tconst': 'tt0000831', 'genre_id': 7},
+            {'tconst': 'tt0000831', 'genre_id': 9},
+            {'tconst': 'tt0000831', 'genre_id': 23},
+        ]
+        self.assertEqual(rows, expected)
+
+
+    def test_title_genres_insert_nothing(self) -> None:
+        # Duplicates ignored, and titles without genres have no rows
+        title_genres = self.db.title_genres
+        title_genres.insert(samples.title_basics)
+        self.assertIsNone(title_genres.insert(samples.title_basics))
+        self.assertIsNone(title_genres.insert(replace(samples.title_basics, genres=())))
+        self.assertEqual(title_genres.count(), 3)
+
 
 class TitlesTest(DBTestCase):
     """
@@ -181,5 +438,16 @@ class TitlesTest(DBTestCase):
             'start_year': 1909,
             'end_year': None,
             'runtime_minutes': 9,
+            'genres': 1 << 6 | 1 << 8 | 1 << 22,
         }
         self.assertEqual(data, expected)
+
+
+class WritersTest(DBTestCase):
+    def test_writers_rows(self) -> None:
+        rows = list(self.db.writers.rows(samples.title_crew))
+        expected = [
+            {'tconst': 'tt0001004', 'nconst': 'nm0275421', 'ordering': 1},
+            {'tconst': 'tt0001004', 'nconst': 'nm0304098', 'ordering': 2},
+        ]
+        self.assertEqual(rows, expected)
@@ -0,0 +1,99 @@
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine.graph import CoStarGraph
+from cine.readers import TitlePrincipals
+
+
+def credit(tconst: str, nconst: str, category: str = 'actor') -> TitlePrincipals:
+    return TitlePrincipals(tconst, 1, nconst, category, None, None)
+
+
+# Chain of people: 1 and 2 in title 10, 2 and 3 in 20, 3 and 4 in 30.
+# Person 5 directed title 10, and person 9 is on their own in title 90.
+CREDITS = [
+    credit('tt0000010', 'nm0000001'),
+    credit('tt0000010', 'nm0000002'),
+    credit('tt0000010', 'nm0000005', 'director'),
+    credit('tt0000020', 'nm0000003'),
+    credit('tt0000020', 'nm0000002'),
+    credit('tt0000030', 'nm0000003'),
+    credit('tt0000030', 'nm0000004'),
+    credit('tt0000090', 'nm0000009'),
+]
+
+
+class CoStarGraphTest(TestCase):
+    def setUp(self) -> None:
+        self.graph = CoStarGraph.from_records(CREDITS)
+
+    def test_sizes(self) -> None:
+        self.assertEqual(self.graph.num_people, 6)
+        self.assertEqual(self.graph.num_titles, 4)
+        self.assertEqual(self.graph.num_edges, 8)
+
+    def test_costars(self) -> None:
+        self.assertEqual(
+            self.graph.costars('nm0000002'),
+            ['nm0000001', 'nm0000003', 'nm0000005'],
+        )
+        self.assertEqual(self.graph.costars('nm0000009'), [])
+        self.assertEqual(self.graph.costars('nm0000404'), [])
+
+    def test_categories(self) -> None:
+        graph = CoStarGraph.from_records(CREDITS, categories=['actor'])
+        self.assertEqual(graph.num_people, 5)
+        self.assertEqual(graph.costars('nm0000002'), ['nm0000001', 'nm0000003'])
+
+    def test_titles(self) -> None:
+        self.assertEqual(
+            self.graph.titles('nm0000002'), ['tt0000010', 'tt0000020'])
+
+    def test_shortest_path(self) -> None:
+        path = self.graph.shortest_path('nm0000001', 'nm0000004')
+        expected = [
+            'nm0000001', 'tt0000010',
+            'nm0000002', 'tt0000020',
+            'nm0000003', 'tt0000030',
+            'nm0000004',
+        ]
+        self.assertEqual(path, expected)
+
+        # And back again
+        reverse = self.graph.shortest_path('nm0000004', 'nm0000001')
+        self.assertEqual(reverse, expected[::-1])
+
+    def test_shortest_path_neighbours(self) -> None:
+        path = self.graph.shortest_path('nm0000005', 'nm0000002')
+        self.assertEqual(path, ['nm0000005', 'tt0000010', 'nm0000002'])
+
+    def test_shortest_path_same(self) -> None:
+        self.assertEqual(
+            self.graph.shortest_path('nm0000001', 'nm0000001'), ['nm0000001'])
+
+    def test_shortest_path_none(self) -> None:
+        self.assertIsNone(self.graph.shortest_path('nm0000001', 'nm0000009'))
+        self.assertIsNone(self.graph.shortest_path('nm0000001', 'nm0000404'))
+
+    def test_save_and_load(self) -> None:
+        with TemporaryDirectory() as folder:
+            path = Path(folder) / 'graph.bin'
+            self.graph.save(path)
+            graph = CoStarGraph.load(path)
+        self.assertEqual(graph.num_edges, 8)
+        self.assertEqual(graph.person_offsets, self.graph.person_offsets)
+        self.assertEqual(graph.title_people, self.graph.title_people)
+        self.assertEqual(
+            graph.shortest_path('nm0000001', 'nm0000004'),
+            self.graph.shortest_path('nm0000001', 'nm0000004'),
+        )
+
+    def test_load_invalid(self) -> None:
+        with TemporaryDirectory() as folder:
+            path = Path(folder) / 'graph.bin'
+            path.write_bytes(b'banana')
+            message = r"^Not a compatible graph file: "
+            with self.assertRaisesRegex(ValueError, message):
+                CoStarGraph.load(path)
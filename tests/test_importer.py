@@ -0,0 +1,161 @@
+
+import gzip
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine.database import Database
+from cine.importer import Importer
+
+from .data import create_data_files
+
+
+class ImporterTest(TestCase):
+    db: Database
+    counts: dict[str, int]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with TemporaryDirectory() as folder:
+            create_data_files(Path(folder))
+            cls.db = Database()
+            importer = Importer(Path(folder), cls.db)
+            cls.counts = importer.run()
+
+    def test_counts(self) -> None:
+        expected = {
+            'akas': 2,
+            'directors': 1,
+            'episodes': 1,
+            'known_for': 8,
+            'name_professions': 6,
+            'names': 2,
+            'principals': 2,
+            'ratings': 2,
+            'title_genres': 7,
+            'titles': 3,
+            'writers': 2,
+        }
+        self.assertEqual(self.counts, expected)
+        for name, count in expected.items():
+            self.assertEqual(getattr(self.db, name).count(), count)
+
+    def test_filmography_uses_index(self) -> None:
+        query = "SELECT tconst FROM directors WHERE nconst = ?;"
+        rows = self.db.connection.execute(query, ('nm0674600',)).fetchall()
+        self.assertEqual([row[0] for row in rows], ['tt0001004'])
+        plan = self.db.connection.execute(
+            'EXPLAIN QUERY PLAN ' + query, ('nm0674600',)).fetchone()
+        self.assertIn('USING COVERING INDEX directors_nconst', plan['detail'])
+
+    def test_genre_query_uses_index(self) -> None:
+        query = """
+            SELECT titles.primary_title FROM title_genres
+            JOIN titles ON titles.tconst = title_genres.tconst
+            JOIN ratings ON ratings.tconst = titles.tconst
+            WHERE title_genres.genre_id = ?
+                AND titles.title_type = 'movie'
+                AND titles.start_year = 1999
+                AND ratings.average_rating > 7;
+        """
+        genre_id = self.db.genres.get_id('Sci-Fi')
+        rows = self.db.connection.execute(query, (genre_id,)).fetchall()
+        self.assertEqual([row[0] for row in rows], ['The Matrix'])
+
+        plan = self.db.connection.execute(
+            'EXPLAIN QUERY PLAN ' + query, (genre_id,)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        self.assertNotIn('SCAN', details)
+
+    def test_indexes_created(self) -> None:
+        query = "SELECT name FROM sqlite_master WHERE type = 'index';"
+        names = {row[0] for row in self.db.connection.execute(query)}
+        self.assertIn('title_genres_genre', names)
+        self.assertIn('name_professions_profession', names)
+        self.assertIn('known_for_tconst', names)
+
+
+class ImporterParallelTest(TestCase):
+    def test_run_parallel(self) -> None:
+        with TemporaryDirectory() as folder:
+            create_data_files(Path(folder))
+            serial = Database()
+            expected = Importer(Path(folder), serial).run()
+            db = Database()
+            counts = Importer(Path(folder), db).run_parallel(workers=2)
+
+        self.assertEqual(counts, expected)
+        for name in expected:
+            query = f"SELECT * FROM {name} ORDER BY 1, 2;"
+            self.assertEqual(
+                [tuple(row) for row in db.connection.execute(query)],
+                [tuple(row) for row in serial.connection.execute(query)],
+            )
+        self.assertEqual(db.professions.count(), serial.professions.count())
+        self.assertEqual(db.genres.count(), serial.genres.count())
+        self.assertEqual(db.get_table_names(), serial.get_table_names())
+
+
+class ImporterBuildTest(TestCase):
+    def test_build_and_replace(self) -> None:
+        with TemporaryDirectory() as folder:
+            folder = Path(folder)
+            create_data_files(folder)
+            path = folder / 'imdb.db'
+            counts = Importer.build(folder, path)
+            self.assertEqual(counts['titles'], 3)
+            self.assertEqual(list(folder.glob('.imdb.db-*')), [])
+
+            # Live database is replaced
+            db = Database(path)
+            self.assertEqual(db.titles.count(), 3)
+            self.assertFalse(db.is_replaced())
+            Importer.build(folder, path, parallel=True, workers=2)
+            self.assertTrue(db.is_replaced())
+            db.reopen()
+            self.assertFalse(db.is_replaced())
+            self.assertEqual(db.titles.count(), 3)
+            db.connection.close()
+
+    def test_weighted_min_votes(self) -> None:
+        with TemporaryDirectory() as folder:
+            folder = Path(folder)
+            create_data_files(folder)
+            path = folder / 'imdb.db'
+            Importer.build(folder, path, weighted_min_votes=1_000)
+            db = Database(path, immutable=True)
+            self.assertEqual(db.metadata.get_value('ratings.min_votes'), '1000')
+            db.connection.close()
+
+    def test_duplicate_credits(self) -> None:
+        with TemporaryDirectory() as folder:
+            folder = Path(folder)
+            create_data_files(folder)
+            with gzip.open(folder / 'title.crew.tsv.gz', 'wt', encoding='utf-8') as fp:
+                fp.write('tconst\tdirectors\twriters\n')
+                fp.write('tt0001004\tnm0674600\tnm0275421,nm0275421,nm0304098\n')
+
+            # Duplicate rows are ignored, and not counted as added
+            counts = Importer.build(folder, folder / 'imdb.db')
+            self.assertEqual(counts['writers'], 2)
+            counts = Importer.build(folder, folder / 'imdb.db', parallel=True, workers=2)
+            self.assertEqual(counts['writers'], 2)
+
+    def test_check_fails(self) -> None:
+        class BadImporter(Importer):
+            def run(self) -> dict[str, int]:
+                counts = super().run()
+                counts['titles'] += 1
+                return counts
+
+        with TemporaryDirectory() as folder:
+            folder = Path(folder)
+            create_data_files(folder)
+            path = folder / 'imdb.db'
+            path.write_text('original')
+            message = r"^Table 'titles' has 3 rows, expected 4$"
+            with self.assertRaisesRegex(RuntimeError, message):
+                BadImporter.build(folder, path)
+            self.assertEqual(path.read_text(), 'original')
+            self.assertEqual(list(folder.glob('.imdb.db-*')), [])
@@ -0,0 +1,84 @@
+
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine.database import Database
+from cine.importer import Importer
+from cine.metrics import ImportMetrics, ReadStats, StageMetrics, peak_rss
+from cine.readers import TitleBasics
+from cine.utils import tsv_rows
+
+from .data import create_data_files
+
+
+class PeakRssTest(TestCase):
+    def test_peak_rss(self) -> None:
+        self.assertGreater(peak_rss(), 1_000_000)
+
+
+class StageMetricsTest(TestCase):
+    def test_rows_per_second(self) -> None:
+        self.assertEqual(StageMetrics('insert', 'titles', 2.0, 0, 100).rows_per_second, 50)
+        self.assertEqual(StageMetrics('insert', 'titles').rows_per_second, 0)
+
+
+class ImportMetricsTest(TestCase):
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+        create_data_files(self.folder)
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def test_timed_rows_match(self) -> None:
+        path = self.folder / TitleBasics.file_name
+        stats = ReadStats()
+        rows = list(tsv_rows(path, skip_header=True, stats=stats))
+        self.assertEqual(rows, list(tsv_rows(path, skip_header=True)))
+        self.assertEqual(stats.rows, 3)
+        self.assertEqual(stats.bytes_in, path.stat().st_size)
+        self.assertGreater(stats.bytes_decompressed, stats.bytes_in)
+
+    def test_timed_records_match(self) -> None:
+        stats = ReadStats()
+        records = list(TitleBasics.from_folder(self.folder, stats=stats))
+        self.assertEqual(records, list(TitleBasics.from_folder(self.folder)))
+        self.assertEqual(stats.records, 3)
+        self.assertGreater(stats.convert, 0)
+
+    def test_import(self) -> None:
+        metrics = ImportMetrics()
+        Importer(self.folder, Database(), metrics).run()
+        found = {(stage.stage, stage.name): stage for stage in metrics.stages}
+        for name in ('decompress', 'decode', 'split', 'convert'):
+            self.assertIn((name, 'title.basics.tsv.gz'), found)
+        self.assertEqual(found[('insert', 'title_genres')].rows_out, 7)
+        self.assertEqual(found[('commit', 'titles,title_genres')].rows_out, 10)
+        self.assertIn(('index', 'titles'), found)
+
+    def test_build_parallel(self) -> None:
+        metrics = ImportMetrics()
+        path = self.folder / 'imdb.db'
+        Importer.build(self.folder, path, parallel=True, workers=2, metrics=metrics)
+        stages = {stage.stage for stage in metrics.stages}
+        expected = {
+            'aggregates', 'analyze', 'commit', 'convert', 'decode', 'decompress',
+            'index', 'insert', 'load', 'merge', 'split', 'vacuum',
+        }
+        self.assertEqual(stages, expected)
+
+        output = self.folder / 'metrics.json'
+        metrics.write(output)
+        data = json.loads(output.read_text())
+        self.assertEqual(len(data['stages']), len(metrics.stages))
+        self.assertIn('rows_per_second', data['stages'][0])
+
+    def test_timer(self) -> None:
+        metrics = ImportMetrics()
+        with metrics.timer('vacuum', '') as stage:
+            stage.rows_out = 5
+        self.assertEqual(metrics.stages, [stage])
+        self.assertGreater(stage.seconds, 0)
@@ -0,0 +1,84 @@
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase
+
+from cine.database import Database
+from cine.importer import Importer
+from cine.pool import ConnectionPool
+
+from .data import create_data_files
+
+
+class ConnectionPoolTest(TestCase):
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+        create_data_files(self.folder)
+        self.path = self.folder / 'imdb.db'
+        Importer.build(self.folder, self.path)
+        self.pool = ConnectionPool(self.path, size=2, timeout=0.01)
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.temp.cleanup()
+
+    def test_connection(self) -> None:
+        with self.pool.connection() as db:
+            self.assertIsInstance(db, Database)
+            self.assertTrue(db.immutable)
+            self.assertEqual(db.titles.count(), 3)
+
+        # Connection reused
+        with self.pool.connection() as db2:
+            self.assertIs(db2, db)
+        self.assertEqual(self.pool.stats.checkouts, 2)
+        self.assertEqual(self.pool.stats.connections, 1)
+
+    def test_size_limit(self) -> None:
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.assertIsNot(first, second)
+        message = r"^No database connection free after 0.01 seconds$"
+        with self.assertRaisesRegex(TimeoutError, message):
+            self.pool.acquire()
+        self.assertEqual(self.pool.stats.timeouts, 1)
+        self.assertEqual(self.pool.stats.waits, 1)
+        self.assertGreater(self.pool.stats.wait_max, 0.0)
+
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+        self.pool.release(first)
+        self.pool.release(second)
+
+    def test_size_invalid(self) -> None:
+        message = r"^Pool size must be at least one, given 0$"
+        with self.assertRaisesRegex(ValueError, message):
+            ConnectionPool(self.path, size=0)
+
+    def test_threads(self) -> None:
+        counts = []
+
+        def query() -> None:
+            for _ in range(20):
+                with self.pool.connection(timeout=5) as db:
+                    counts.append(db.names.count())
+
+        threads = [Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counts, [2] * 80)
+        self.assertLessEqual(self.pool.stats.connections, 2)
+        self.assertEqual(self.pool.stats.checkouts, 80)
+
+    def test_reopen_when_replaced(self) -> None:
+        with self.pool.connection() as db:
+            inode = db._inode
+        Importer.build(self.folder, self.path)
+        with self.pool.connection() as db:
+            self.assertNotEqual(db._inode, inode)
+            self.assertEqual(db.titles.count(), 3)
@@ -0,0 +1,57 @@
+
+from pathlib import Path
+import pstats
+from tempfile import TemporaryDirectory
+import tracemalloc
+from unittest import TestCase
+
+from cine.database import Database
+from cine.importer import Importer
+from cine.profiling import Profiler
+
+from .data import create_data_files
+
+
+class ProfilerTest(TestCase):
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def test_not_chosen(self) -> None:
+        profiler = Profiler(self.folder / 'profiles', stages=['index'])
+        with profiler.stage('load', 'titles'):
+            pass
+        self.assertFalse((self.folder / 'profiles').exists())
+
+    def test_profile(self) -> None:
+        profiler = Profiler(self.folder, stages=['index'])
+        with profiler.stage('index', 'titles'):
+            sorted(range(1000), key=str)
+        path = self.folder / 'index-titles.prof'
+        self.assertTrue(path.exists())
+        self.assertGreater(pstats.Stats(str(path)).total_calls, 0)
+
+    def test_memory(self) -> None:
+        profiler = Profiler(self.folder, memory=True, top=5)
+        with profiler.stage('vacuum'):
+            data = [str(number) for number in range(10_000)]
+        report = (self.folder / 'vacuum.alloc.txt').read_text()
+        self.assertIn("Top 5 allocation sites for 'vacuum'", report)
+        self.assertIn('test_profiling.py', report)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(len(data), 10_000)
+
+    def test_import(self) -> None:
+        data = self.folder / 'data'
+        data.mkdir()
+        create_data_files(data)
+        profiles = self.folder / 'profiles'
+        profiler = Profiler(profiles, stages=['load', 'index'])
+        Importer(data, Database(), profiler=profiler).run()
+        names = {path.name for path in profiles.iterdir()}
+        self.assertIn('load-title.basics.tsv.gz.prof', names)
+        self.assertIn('index-titles.prof', names)
+        self.assertEqual(len(names), 7 + 11)
@@ -0,0 +1,178 @@
+
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine.database import Database
+from cine.importer import Importer
+from cine.search import (
+    FuzzyMatch,
+    SearchResult,
+    TitleSearch,
+    fold,
+    fts5_query,
+    substring_distance,
+    trigrams,
+)
+
+from .data import create_data_files, title_basics
+
+
+class FoldTest(TestCase):
+    def test_fold(self) -> None:
+        self.assertEqual(fold('Amélie'), 'amelie')
+        self.assertEqual(fold('STRASSE'), 'strasse')
+
+
+class SubstringDistanceTest(TestCase):
+    def test_exact(self) -> None:
+        self.assertEqual(substring_distance('shaw', 'the shawshank'), 0)
+
+    def test_typo(self) -> None:
+        self.assertEqual(
+            substring_distance('shawshenk', 'the shawshank redemption'), 1)
+        self.assertEqual(
+            substring_distance('arnold schwarzeneger', 'arnold schwarzenegger'), 1)
+
+    def test_empty(self) -> None:
+        self.assertEqual(substring_distance('', 'abc'), 0)
+        self.assertEqual(substring_distance('abc', ''), 3)
+
+    def test_edits(self) -> None:
+        self.assertEqual(substring_distance('kitten', 'sitting'), 2)
+        self.assertEqual(substring_distance('ab', 'ba'), 1)
+        self.assertEqual(substring_distance('abc', 'xxaxcxx'), 1)
+        self.assertEqual(substring_distance('a' * 70, 'a' * 68), 2)
+
+    def test_bound(self) -> None:
+        # Too much shorter to be within bound
+        self.assertGreater(substring_distance('shawshank', 'shaw', bound=2), 2)
+        self.assertEqual(substring_distance('shawshank', 'shawshenk', bound=2), 1)
+
+
+class TrigramsTest(TestCase):
+    def test_trigrams(self) -> None:
+        self.assertEqual(trigrams('Shaw'), ['sha', 'haw'])
+        self.assertEqual(trigrams(' A  bc '), ['a b', ' bc'])
+        self.assertEqual(trigrams('ab'), [])
+
+
+class Fts5QueryTest(TestCase):
+    def test_words(self) -> None:
+        self.assertEqual(fts5_query('the matr'), '"the" "matr"*')
+        self.assertEqual(fts5_query('the matrix', prefix=False), '"the" "matrix"')
+
+    def test_syntax_ignored(self) -> None:
+        self.assertEqual(fts5_query('matrix" OR (NEAR'), '"matrix" "OR" "NEAR"*')
+
+    def test_empty(self) -> None:
+        self.assertEqual(fts5_query(''), '')
+        self.assertEqual(fts5_query('  -*" '), '')
+
+
+class TitleSearchTest(TestCase):
+    db: Database
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with TemporaryDirectory() as folder:
+            create_data_files(Path(folder))
+            cls.db = Database()
+            Importer(Path(folder), cls.db).run()
+        cls.count = cls.db.title_search.build()
+
+    def test_build(self) -> None:
+        self.assertTrue(self.db.title_search.exists())
+        # Three primary titles, plus two akas
+        self.assertEqual(self.count, 5)
+
+    def test_not_built(self) -> None:
+        self.assertFalse(Database().title_search.exists())
+
+    def test_search(self) -> None:
+        results = self.db.title_search.search('matrix')
+        self.assertEqual(len(results), 1)
+        result = results[0]
+        self.assertIsInstance(result, SearchResult)
+        self.assertEqual(result.tconst, 'tt0133093')
+        self.assertEqual(result.primary_title, 'The Matrix')
+        self.assertEqual(result.num_votes, 2_100_000)
+        self.assertLess(result.score, 0)
+
+    def test_search_aka_without_title(self) -> None:
+        # Alternate title found, but not its title
+        self.assertEqual(self.db.title_search.search('drunk'), [])
+
+    def test_search_diacritics(self) -> None:
+        results = self.db.title_search.search('MATRIX')
+        self.assertEqual([result.tconst for result in results], ['tt0133093'])
+        results = self.db.title_search.search('mátr')
+        self.assertEqual([result.tconst for result in results], ['tt0133093'])
+
+    def test_search_ranked_by_votes(self) -> None:
+        # 'The' appears in both titles, but the Matrix is most popular
+        results = self.db.title_search.search('the')
+        self.assertEqual(
+            [result.tconst for result in results], ['tt0133093', 'tt0000831'])
+
+    def test_search_max_ranked(self) -> None:
+        # Only the most voted match is scored
+        search = TitleSearch(self.db)
+        search.max_ranked = 1
+        results = search.search('the')
+        self.assertEqual([result.tconst for result in results], ['tt0133093'])
+
+    def test_search_nothing(self) -> None:
+        self.assertEqual(self.db.title_search.search('banana'), [])
+        self.assertEqual(self.db.title_search.search('"'), [])
+
+
+class FuzzySearchTest(TestCase):
+    db: Database
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with TemporaryDirectory() as folder:
+            create_data_files(Path(folder))
+            cls.db = Database()
+            Importer(Path(folder), cls.db).run()
+        cls.db.titles.insert(replace(
+            title_basics, tconst='tt0211915', primary_title='Amélie', original_title='Amélie'))
+        cls.counts = cls.db.fuzzy_search.build()
+
+    def test_build(self) -> None:
+        self.assertTrue(self.db.fuzzy_search.exists())
+        self.assertEqual(self.counts, {'fuzzy_titles': 5, 'fuzzy_names': 2})
+
+    def test_not_built(self) -> None:
+        self.assertFalse(Database().fuzzy_search.exists())
+
+    def test_titles(self) -> None:
+        matches = self.db.fuzzy_search.titles('the matrx')
+        self.assertEqual(matches[0], FuzzyMatch('tt0133093', 'The Matrix', 1))
+
+    def test_titles_closest_name(self) -> None:
+        # Matches both primary and alternate titles, only one kept
+        matches = self.db.fuzzy_search.titles('matrx')
+        self.assertEqual(matches[0].key, 'tt0133093')
+        self.assertEqual(matches[0].distance, 1)
+        self.assertEqual(len([m for m in matches if m.key == 'tt0133093']), 1)
+
+    def test_titles_accented(self) -> None:
+        # Every trigram of 'amel' is accented in the title
+        for text in ('amel', 'Amél'):
+            matches = self.db.fuzzy_search.titles(text)
+            self.assertEqual(matches[0], FuzzyMatch('tt0211915', 'Amélie', 0))
+
+    def test_names(self) -> None:
+        matches = self.db.fuzzy_search.names('Red Butons')
+        self.assertEqual(matches[0], FuzzyMatch('nm0000999', 'Red Buttons', 1))
+        matches = self.db.fuzzy_search.names('jake bussey')
+        self.assertEqual(matches[0], FuzzyMatch('nm0000998', 'Jake Busey', 1))
+
+    def test_nothing(self) -> None:
+        self.assertEqual(self.db.fuzzy_search.names('zz'), [])
+        self.assertEqual(self.db.fuzzy_search.names('qqqqq'), [])
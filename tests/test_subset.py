@@ -0,0 +1,266 @@
+
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine import readers
+from cine.database import Database
+from cine.importer import Importer
+from cine.subset import AdultFilter, IdSet, TitleFilter
+from cine.synthetic import generate
+
+from . import data
+
+
+class AdultFilterTest(TestCase):
+    folder: Path
+    temp: TemporaryDirectory
+    adult: set[str]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.temp = TemporaryDirectory()
+        cls.folder = Path(cls.temp.name)
+        generate(cls.folder, scale=0.005, seed=7)
+        cls.adult = {
+            record.tconst
+            for record in readers.TitleBasics.from_folder(cls.folder, skip_adult=False)
+            if record.is_adult
+        }
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp.cleanup()
+        super().tearDownClass()
+
+    def check_import(self, db: Database, skipped: dict[str, int]) -> None:
+        adult = self.adult
+        self.assertTrue(adult)
+        num_akas = sum(
+            1 for aka in readers.TitleAkas.from_folder(self.folder)
+            if aka.title_id in adult
+        )
+        num_principals = sum(
+            1 for principal in readers.TitlePrincipals.from_folder(self.folder)
+            if principal.tconst in adult
+        )
+        num_episodes = sum(
+            1 for episode in readers.TitleEpisodes.from_folder(self.folder)
+            if episode.tconst in adult or episode.parent in adult
+        )
+        num_ratings = sum(
+            1 for rating in readers.TitleRatings.from_folder(self.folder)
+            if rating.tconst in adult
+        )
+        self.assertEqual(skipped['titles'], len(adult))
+        self.assertEqual(skipped['akas'], num_akas)
+        self.assertEqual(skipped['principals'], num_principals)
+        self.assertEqual(skipped['ratings'], num_ratings)
+        self.assertEqual(skipped['episodes'], num_episodes)
+        self.assertGreater(skipped['known_for'], 0)
+        self.assertEqual(skipped['names'], 0)
+
+        # No rows left referring to adult titles
+        for table, column in (
+            ('akas', 'title_id'),
+            ('directors', 'tconst'),
+            ('episodes', 'tconst'),
+            ('episodes', 'parent'),
+            ('known_for', 'tconst'),
+            ('principals', 'tconst'),
+            ('ratings', 'tconst'),
+            ('titles', 'tconst'),
+            ('writers', 'tconst'),
+        ):
+            query = f"SELECT DISTINCT {column} FROM {table};"
+            found = {row[0] for row in db.connection.execute(query)}
+            self.assertFalse(found & adult, table)
+
+    def test_run(self) -> None:
+        db = Database()
+        importer = Importer(self.folder, db)
+        importer.run()
+        self.assertEqual(len(importer.adult_filter.excluded), len(self.adult))
+        self.check_import(db, importer.adult_filter.skipped)
+
+    def test_run_parallel(self) -> None:
+        db = Database()
+        importer = Importer(self.folder, db)
+        importer.run_parallel(workers=2)
+        self.check_import(db, importer.adult_filter.skipped)
+
+    def test_skip_leaves_lookups(self) -> None:
+        # Skipped rows are counted without adding their genres or professions
+        db = Database()
+        adult_filter = AdultFilter()
+        title = replace(data.title_basics, is_adult=True, genres=('Cyberpunk',))
+        tables = [db.titles, db.title_genres]
+        self.assertEqual(list(adult_filter.filter(readers.TitleBasics, [title], tables)), [])
+        self.assertEqual(adult_filter.skipped, {'titles': 1, 'title_genres': 1})
+
+        name = replace(
+            data.name_basics,
+            primary_profession=('juggler',),
+            known_for_titles=(title.tconst,),
+        )
+        tables = [db.name_professions, db.known_for]
+        filtered = list(adult_filter.filter(readers.NameBasics, [name], tables))
+        self.assertEqual(filtered, [replace(name, known_for_titles=())])
+        self.assertEqual(adult_filter.skipped['known_for'], 1)
+        self.assertEqual(adult_filter.skipped['name_professions'], 0)
+
+        self.assertEqual(db.genres.count(), 28)
+        self.assertEqual(db.professions.count(exact=True), 0)
+
+    def test_prepare(self) -> None:
+        adult_filter = AdultFilter()
+        adult_filter.prepare(self.folder)
+        self.assertEqual(len(adult_filter.excluded), len(self.adult))
+        for tconst in self.adult:
+            self.assertIn(tconst, adult_filter.excluded)
+
+
+class IdSetTest(TestCase):
+    def test_add(self) -> None:
+        ids = IdSet()
+        self.assertEqual(len(ids), 0)
+        self.assertNotIn('tt0133093', ids)
+        ids.add('tt0133093')
+        ids.add('tt0133093')
+        ids.add('tt0000001')
+        self.assertEqual(len(ids), 2)
+        self.assertIn('tt0133093', ids)
+        self.assertIn('tt0000001', ids)
+        self.assertNotIn('tt0133094', ids)
+        self.assertNotIn('tt9999999', ids)
+        self.assertNotIn(None, ids)
+
+    def test_compact(self) -> None:
+        ids = IdSet(f"nm{number:07}" for number in range(0, 1_000_000, 3))
+        self.assertEqual(len(ids), 333_334)
+        self.assertLess(ids.num_bytes, 250_000)
+        self.assertIn('nm0999999', ids)
+        self.assertNotIn('nm0999998', ids)
+
+
+class TitleFilterTest(TestCase):
+    def test_empty(self) -> None:
+        self.assertTrue(TitleFilter().keep(data.title_basics))
+
+    def test_title_types(self) -> None:
+        self.assertTrue(TitleFilter(title_types=frozenset({'short'})).keep(data.title_basics))
+        self.assertFalse(TitleFilter(title_types=frozenset({'movie'})).keep(data.title_basics))
+
+    def test_years(self) -> None:
+        record = data.title_basics
+        self.assertTrue(TitleFilter(min_year=1909, max_year=1909).keep(record))
+        self.assertFalse(TitleFilter(min_year=1910).keep(record))
+        self.assertFalse(TitleFilter(max_year=1908).keep(record))
+
+
+class SubsetImportTest(TestCase):
+    folder: Path
+    temp: TemporaryDirectory
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.temp = TemporaryDirectory()
+        cls.folder = Path(cls.temp.name)
+        generate(cls.folder, scale=0.005, seed=7)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp.cleanup()
+        super().tearDownClass()
+
+    def column(self, db: Database, query: str) -> set[str]:
+        return {row[0] for row in db.connection.execute(query)}
+
+    def test_title_filter(self) -> None:
+        db = Database()
+        title_filter = TitleFilter(title_types=frozenset({'movie'}), min_votes=10)
+        importer = Importer(self.folder, db, title_filter=title_filter)
+        counts = importer.run()
+        importer.check(counts)
+
+        # Only voted movies kept
+        self.assertGreater(counts['titles'], 0)
+        self.assertEqual(self.column(db, "SELECT title_type FROM titles;"), {'movie'})
+        votes = db.connection.execute("SELECT min(num_votes) FROM ratings;").fetchone()[0]
+        self.assertGreaterEqual(votes, 10)
+        self.assertEqual(counts['episodes'], 0)
+
+        # Every row refers to a kept title
+        titles = self.column(db, "SELECT tconst FROM titles;")
+        for query in (
+            "SELECT title_id FROM akas;",
+            "SELECT tconst FROM directors;",
+            "SELECT tconst FROM known_for;",
+            "SELECT tconst FROM principals;",
+            "SELECT tconst FROM ratings;",
+        ):
+            self.assertLessEqual(self.column(db, query), titles, query)
+
+        # People are exactly those credited on kept titles
+        credited = self.column(
+            db,
+            "SELECT nconst FROM principals UNION SELECT nconst FROM directors "
+            "UNION SELECT nconst FROM writers;",
+        )
+        names = self.column(db, "SELECT nconst FROM names;")
+        self.assertLessEqual(names, credited)
+        self.assertGreater(len(names), 0)
+
+        # Skipped rows counted
+        assert importer.subset is not None
+        skipped = importer.subset.skipped
+        self.assertEqual(len(skipped), 7)
+        self.assertGreater(skipped['title.basics.tsv.gz'], 0)
+        self.assertEqual(len(importer.subset.titles), counts['titles'])
+
+    def test_regions(self) -> None:
+        db = Database()
+        title_filter = TitleFilter(regions=frozenset({'GB'}))
+        Importer(self.folder, db, title_filter=title_filter).run()
+        in_region = self.column(
+            db, "SELECT DISTINCT title_id FROM akas WHERE region = 'GB';")
+        self.assertTrue(in_region)
+        self.assertEqual(self.column(db, "SELECT tconst FROM titles;"), in_region)
+
+    def test_tables(self) -> None:
+        db = Database()
+        importer = Importer(self.folder, db, tables=['titles', 'ratings'])
+        self.assertEqual(importer.plan(), [readers.TitleBasics, readers.TitleRatings])
+        counts = importer.run()
+        importer.check(counts)
+        self.assertEqual(set(counts), {'titles', 'ratings'})
+        self.assertEqual(db.principals.count(exact=True), 0)
+
+    def test_tables_with_filter(self) -> None:
+        db = Database()
+        title_filter = TitleFilter(min_year=1950)
+        importer = Importer(self.folder, db, tables=['names'], title_filter=title_filter)
+        expected = [
+            readers.TitleBasics,
+            readers.TitleCrew,
+            readers.TitlePrincipals,
+            readers.NameBasics,
+        ]
+        self.assertEqual(importer.plan(), expected)
+        counts = importer.run()
+        self.assertEqual(set(counts), {'names'})
+        self.assertEqual(db.titles.count(exact=True), 0)
+        assert importer.subset is not None
+        self.assertEqual(counts['names'], len(importer.subset.names))
+
+    def test_unknown_table(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Table 'nope' not found"):
+            Importer(self.folder, Database(), tables=['titles', 'nope'])
+
+    def test_parallel_refused(self) -> None:
+        importer = Importer(self.folder, Database(), title_filter=TitleFilter(min_votes=5))
+        with self.assertRaisesRegex(ValueError, 'serial'):
+            importer.run_parallel()
@@ -0,0 +1,94 @@
+
+from dataclasses import fields
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cine import readers
+from cine.database import Database
+from cine.importer import Importer
+from cine.synthetic import Generator, generate
+
+
+class GenerateTest(TestCase):
+    folder: Path
+    temp: TemporaryDirectory
+    counts: dict[str, int]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.temp = TemporaryDirectory()
+        cls.folder = Path(cls.temp.name)
+        cls.counts = generate(cls.folder, scale=0.005, seed=42)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp.cleanup()
+        super().tearDownClass()
+
+    def test_counts(self) -> None:
+        counts = self.counts
+        self.assertEqual(len(counts), 7)
+        self.assertEqual(counts['title.basics.tsv.gz'], 500)
+        self.assertEqual(counts['title.crew.tsv.gz'], 500)
+        self.assertEqual(counts['name.basics.tsv.gz'], 650)
+        self.assertGreater(counts['title.akas.tsv.gz'], 1000)
+        self.assertGreater(counts['title.principals.tsv.gz'], 2000)
+        self.assertGreater(counts['title.episode.tsv.gz'], 300)
+        self.assertLess(counts['title.ratings.tsv.gz'], 250)
+
+    def test_deterministic(self) -> None:
+        with TemporaryDirectory() as other:
+            generate(Path(other), scale=0.005, seed=42)
+            for name in self.counts:
+                self.assertEqual(
+                    (self.folder / name).read_bytes(),
+                    (Path(other) / name).read_bytes(),
+                )
+
+    def test_foreign_keys(self) -> None:
+        titles = {
+            record.tconst
+            for record in readers.TitleBasics.from_folder(self.folder, skip_adult=False)
+        }
+        names = {record.nconst for record in readers.NameBasics.from_folder(self.folder)}
+        series = {
+            record.tconst
+            for record in readers.TitleBasics.from_folder(self.folder, skip_adult=False)
+            if record.title_type in ('tvSeries', 'tvMiniSeries')
+        }
+
+        for name in readers.NameBasics.from_folder(self.folder):
+            self.assertLessEqual(set(name.known_for_titles), titles)
+        for crew in readers.TitleCrew.from_folder(self.folder):
+            self.assertIn(crew.tconst, titles)
+            self.assertLessEqual(set(crew.directors) | set(crew.writers), names)
+        for episode in readers.TitleEpisodes.from_folder(self.folder):
+            self.assertIn(episode.tconst, titles)
+            self.assertIn(episode.parent, series)
+        for principal in readers.TitlePrincipals.from_folder(self.folder):
+            self.assertIn(principal.tconst, titles)
+            self.assertIn(principal.nconst, names)
+        for aka in readers.TitleAkas.from_folder(self.folder):
+            self.assertIn(aka.title_id, titles)
+        for rating in readers.TitleRatings.from_folder(self.folder):
+            self.assertIn(rating.tconst, titles)
+
+    def test_sorted(self) -> None:
+        for record_class in Importer.sources:
+            key = fields(record_class)[0].name                      # type: ignore[arg-type]
+            keys = [
+                getattr(record, key)
+                for record in record_class.from_folder(self.folder)
+            ]
+            self.assertEqual(keys, sorted(keys))
+
+    def test_import(self) -> None:
+        db = Database()
+        importer = Importer(self.folder, db)
+        importer.check(importer.run())
+
+    def test_bad_scale(self) -> None:
+        with self.assertRaisesRegex(ValueError, r"^Scale must be more than zero, given 0$"):
+            Generator(0)
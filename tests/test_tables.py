@@ -1,7 +1,30 @@
 
+from dataclasses import replace
+from pathlib import Path
+import sqlite3
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 
-from cine.tables import TableBase
+from cine import readers
+from cine.database import Database
+from cine.importer import Importer
+from cine.tables import TableBase, genres_from_mask, genres_mask
+
+from . import data as samples
+from .data import create_data_files
+
+
+class GenresMaskTest(TestCase):
+    def test_genres_mask(self) -> None:
+        self.assertEqual(genres_mask(()), 0)
+        self.assertEqual(genres_mask(('Action',)), 1)
+        self.assertEqual(genres_mask(('Action', 'Sci-Fi')), 1 | 1 << 21)
+        self.assertEqual(genres_mask(('Action', 'Nonsense')), 1)
+
+    def test_genres_from_mask(self) -> None:
+        self.assertEqual(genres_from_mask(0), ())
+        genres = ('Crime', 'Drama', 'Short')
+        self.assertEqual(genres_from_mask(genres_mask(genres)), genres)
 
 
 class TableBaseTest(TestCase):
@@ -16,3 +39,227 @@ class TableBaseTest(TestCase):
         with self.assertRaisesRegex(NotImplementedError, message):
             class BadChild(TableBase):
                 pass
+
+
+class QueryTest(TestCase):
+    """
+    Fetch records back out of the tables.
+    """
+    db: Database
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with TemporaryDirectory() as folder:
+            create_data_files(Path(folder))
+            cls.db = Database()
+            Importer(Path(folder), cls.db).run()
+
+    def test_get(self) -> None:
+        self.assertEqual(self.db.names.get('nm0000999'), samples.name_basics)
+        self.assertEqual(self.db.titles.get('tt0000831'), samples.title_basics)
+        self.assertEqual(
+            self.db.ratings.get('tt0000001'), samples.title_ratings)
+        self.assertEqual(
+            self.db.episodes.get('tt0078459'), samples.title_episodes)
+
+        # Types are not stored
+        self.assertEqual(
+            self.db.akas.get('tt0000084'), replace(samples.title_akas, types=()))
+
+    def test_get_not_found(self) -> None:
+        self.assertIsNone(self.db.titles.get('tt9999999'))
+
+    def test_get_many(self) -> None:
+        keys = ['tt0133093', 'tt0000001', 'tt9999999', 'tt0000831', 'tt0000001']
+        connection = self.db.connection
+        limit = connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        try:
+            # Force multiple chunks
+            connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 2)
+            titles = self.db.titles.get_many(keys)
+        finally:
+            connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+        self.assertEqual(
+            sorted(title.tconst for title in titles),       # type: ignore[attr-defined]
+            ['tt0000001', 'tt0000831', 'tt0133093'],
+        )
+        for title in titles:
+            self.assertIsInstance(title, readers.TitleBasics)
+
+    def test_get_many_multiple_rows(self) -> None:
+        principals = self.db.principals.get_many(['tt0000109', 'tt0000546'])
+        self.assertEqual(len(principals), 2)
+        self.assertIn(samples.title_principals, principals)
+
+    def test_iter_where(self) -> None:
+        titles = list(self.db.titles.iter_where(title_type='movie'))
+        self.assertEqual(len(titles), 1)
+        self.assertEqual(titles[0].primary_title, 'The Matrix')   # type: ignore[attr-defined]
+        self.assertEqual(titles[0].genres, ('Action', 'Sci-Fi'))  # type: ignore[attr-defined]
+
+        names = list(self.db.names.iter_where(death_year=None))
+        self.assertEqual([name.nconst for name in names], ['nm0000998'])  # type: ignore[attr-defined]
+
+        self.assertEqual(len(list(self.db.ratings.iter_where())), 2)
+
+    def test_iter_where_bad_column(self) -> None:
+        message = r"^Column 'banana' not found in table 'titles'$"
+        with self.assertRaisesRegex(ValueError, message):
+            list(self.db.titles.iter_where(banana=1))
+
+    def test_top(self) -> None:
+        ratings = self.db.ratings
+        top = [rating.tconst for rating in ratings.top()]
+        self.assertEqual(top, ['tt0133093', 'tt0000001'])
+        self.assertEqual(len(ratings.top(limit=1)), 1)
+        self.assertEqual(ratings.top(min_votes=1000)[0].tconst, 'tt0133093')
+
+        top = ratings.top(order_by='num_votes', genre='Documentary')
+        self.assertEqual([rating.tconst for rating in top], ['tt0000001'])
+        top = ratings.top(title_type='movie', year=1999)
+        self.assertEqual([rating.tconst for rating in top], ['tt0133093'])
+        self.assertEqual(ratings.top(title_type='movie', year=2000), [])
+        self.assertEqual(ratings.top(parent='tt0159876'), [])
+
+        # Few votes, pulled towards the mean
+        top = ratings.top(order_by='weighted_rating')
+        self.assertEqual([rating.tconst for rating in top], ['tt0133093', 'tt0000001'])
+
+    def test_top_bad_arguments(self) -> None:
+        with self.assertRaisesRegex(ValueError, r"^Cannot order ratings by 'tconst'$"):
+            self.db.ratings.top(order_by='tconst')
+        with self.assertRaisesRegex(ValueError, r"^Genre 'Banana' not found$"):
+            self.db.ratings.top(genre='Banana')
+
+    def test_top_uses_index(self) -> None:
+        for order_by, tie_break in self.db.ratings.top_orders.items():
+            query = (
+                f"EXPLAIN QUERY PLAN {self.db.ratings.select_query} "
+                f"ORDER BY {order_by} DESC, {tie_break} DESC LIMIT 10;"
+            )
+            details = ' '.join(
+                row['detail'] for row in self.db.connection.execute(query))
+            self.assertIn('USING COVERING INDEX', details)
+            self.assertNotIn('TEMP B-TREE', details)
+
+    def test_no_record_class(self) -> None:
+        message = r"^Directors has no record class$"
+        with self.assertRaisesRegex(NotImplementedError, message):
+            self.db.directors.get('tt0001004')
+
+
+class QueryCacheTest(TestCase):
+    """
+    Records fetched by key can be cached in memory.
+    """
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+        create_data_files(self.folder)
+        self.db = Database(cache_size=2)
+        Importer(self.folder, self.db).run()
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def test_disabled(self) -> None:
+        db = Database()
+        self.assertIsNone(db.titles.cache)
+
+    def test_get(self) -> None:
+        titles = self.db.titles
+        assert titles.cache is not None
+        self.assertEqual(titles.get('tt0000831'), samples.title_basics)
+        self.assertEqual(titles.get('tt0000831'), samples.title_basics)
+        self.assertIsNone(titles.get('tt9999999'))
+        self.assertIsNone(titles.get('tt9999999'))
+        self.assertEqual(titles.cache.stats.hits, 2)
+        self.assertEqual(titles.cache.stats.misses, 2)
+
+    def test_get_many(self) -> None:
+        titles = self.db.titles
+        assert titles.cache is not None
+        titles.get('tt0133093')
+        records = titles.get_many(['tt0133093', 'tt0000831', 'tt0000001'])
+        self.assertEqual(
+            [record.tconst for record in records],          # type: ignore[attr-defined]
+            ['tt0133093', 'tt0000831', 'tt0000001'],
+        )
+        self.assertEqual(titles.cache.stats.hits, 1)
+        self.assertEqual(titles.cache.stats.evictions, 1)
+        self.assertEqual(len(titles.cache), 2)
+
+    def test_get_after_insert(self) -> None:
+        # Cached misses are forgotten once the key is inserted
+        titles = self.db.titles
+        record = replace(samples.title_basics, tconst='tt9999999')
+        self.assertIsNone(titles.get('tt9999999'))
+        titles.insert(record)
+        self.assertEqual(titles.get('tt9999999'), record)
+
+        record = replace(samples.title_basics, tconst='tt9999998')
+        self.assertEqual(titles.get_many(['tt9999998']), [])
+        titles.insert_many([record])
+        self.assertEqual(titles.get_many(['tt9999998']), [record])
+
+    def test_cleared_on_import(self) -> None:
+        titles = self.db.titles
+        assert titles.cache is not None
+        titles.get('tt0000831')
+        Importer(self.folder, self.db).import_source(readers.TitleBasics)
+        self.assertEqual(len(titles.cache), 0)
+
+    def test_cleared_on_reopen(self) -> None:
+        path = self.folder / 'imdb.db'
+        Importer.build(self.folder, path)
+        db = Database(path, immutable=True, cache_size=10)
+        db.titles.get('tt0000831')
+        db.reopen()
+        assert db.titles.cache is not None
+        self.assertEqual(len(db.titles.cache), 0)
+        db.connection.close()
+
+
+class StoredCountTest(TestCase):
+    """
+    Row counts are stored by the importer, rather than counted every time.
+    """
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+        create_data_files(self.folder)
+        self.db = Database()
+        Importer(self.folder, self.db).run()
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def test_stored_on_import(self) -> None:
+        self.assertEqual(self.db.metadata.get_value('count.titles'), '3')
+        self.assertEqual(self.db.metadata.get_value('count.title_genres'), '7')
+        self.assertIsNone(self.db.metadata.get_value('count.genres'))
+
+    def test_count_uses_stored(self) -> None:
+        self.db.connection.execute("DELETE FROM titles WHERE tconst = 'tt0000001';")
+        self.assertEqual(self.db.titles.count(), 3)
+        self.assertEqual(self.db.titles.count(exact=True), 2)
+        self.assertEqual(self.db.titles.update_count(), 2)
+        self.assertEqual(self.db.titles.count(), 2)
+
+    def test_insert_updates_count(self) -> None:
+        ratings = self.db.ratings
+        ratings.insert(replace(samples.title_ratings, tconst='tt0000831'))
+        self.assertEqual(ratings.count(), 3)
+
+        # Ignored duplicates are not counted
+        self.assertEqual(self.db.title_genres.insert_many([samples.title_basics]), 0)
+        self.assertEqual(self.db.title_genres.count(), 7)
+        self.assertEqual(self.db.title_genres.count(exact=True), 7)
+
+    def test_not_stored(self) -> None:
+        db = Database()
+        db.titles.insert(samples.title_basics)
+        self.assertIsNone(db.metadata.get_value('count.titles'))
+        self.assertEqual(db.titles.count(), 1)
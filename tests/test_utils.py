@@ -7,6 +7,8 @@ from unittest import TestCase
 from cine.utils import (
     argparse_existing_folder,
     chunkify,
+    id_from_int,
+    id_to_int,
     to_bool,
     to_bool_optional,
     to_int_optional,
@@ -49,6 +51,20 @@ class ChunkifyTest(TestCase):
         self.assertEqual(chunks, ['abcdefghij', 'klmnopqrst', 'uvwxyz'])
 
 
+class IdTest(TestCase):
+    def test_id_from_int(self) -> None:
+        self.assertEqual(id_from_int('tt', 133093), 'tt0133093')
+        self.assertEqual(id_from_int('nm', 12345678), 'nm12345678')
+
+    def test_id_to_int(self) -> None:
+        self.assertEqual(id_to_int('tt0133093'), 133093)
+        self.assertEqual(id_to_int('nm12345678'), 12345678)
+
+    def test_id_to_int_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            id_to_int('tt')
+
+
 class ConverterTest(TestCase):
     """
     Test all the little conversion functions, to_int(), to_list(), etc.